@@ -13,36 +13,29 @@ Features:
 - Compatible with ComfyUI audio workflow
 
 Requirements:
-- google-generativeai
+- requests
 - torch
-- torchaudio
-- PIL
 - numpy
+- google-generativeai (optional, only used by the simulation fallback)
+- aiohttp (optional, lets the async node issue requests without worker threads)
 
 Author: Based on existing Gemini Flash node architecture
 Version: 1.0.0
 """
 
-import os
-import sys
-
-# Add the current directory to Python path to ensure imports work
-current_dir = os.path.dirname(os.path.realpath(__file__))
-if current_dir not in sys.path:
-    sys.path.insert(0, current_dir)
-
-# Import the main node class
+# Import the node classes; the mappings are defined once, in gemini_tts_node.py.
+# Heavy SDKs (google.generativeai, requests) are imported lazily on the code
+# paths that need them, see benchmarks/bench_import.py.
 try:
-    from .gemini_tts_node import GeminiTTS
-    
-    # Define the node mappings for ComfyUI
-    NODE_CLASS_MAPPINGS = {
-        "GeminiTTS": GeminiTTS,
-    }
-
-    NODE_DISPLAY_NAME_MAPPINGS = {
-        "GeminiTTS": "🎙️ Gemini Text-to-Speech",
-    }
+    from .gemini_tts_node import (
+        GeminiTTS,
+        GeminiTTSAsync,
+        GeminiTTSBatch,
+        GeminiTTSDialogue,
+        GeminiTTSJobQueue,
+        NODE_CLASS_MAPPINGS,
+        NODE_DISPLAY_NAME_MAPPINGS,
+    )
     
     # Optional: Add version info
     __version__ = "1.0.0"
@@ -50,6 +43,10 @@ try:
     # Export what should be available when importing this package
     __all__ = [
         "GeminiTTS",
+        "GeminiTTSAsync",
+        "GeminiTTSBatch",
+        "GeminiTTSDialogue",
+        "GeminiTTSJobQueue",
         "NODE_CLASS_MAPPINGS", 
         "NODE_DISPLAY_NAME_MAPPINGS",
         "__version__"
@@ -60,7 +57,7 @@ try:
 except ImportError as e:
     print(f"❌ Error loading Gemini TTS Node: {e}")
     print("Make sure all dependencies are installed:")
-    print("pip install google-generativeai torch torchaudio pillow numpy")
+    print("pip install requests torch numpy")
     
     # Provide empty mappings to prevent ComfyUI from crashing
     NODE_CLASS_MAPPINGS = {}
@@ -93,10 +90,8 @@ PACKAGE_INFO = {
     "version": __version__ if '__version__' in locals() else "unknown",
     "homepage": "https://github.com/yourusername/ComfyUI-Gemini-TTS",
     "requirements": [
-        "google-generativeai>=0.8.0",
+        "requests>=2.25.0",
         "torch>=1.9.0",
-        "torchaudio>=0.9.0", 
-        "pillow>=8.0.0",
         "numpy>=1.21.0"
     ]
 }
\ No newline at end of file
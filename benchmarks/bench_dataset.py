@@ -0,0 +1,105 @@
+# benchmarks/bench_dataset.py
+"""
+Compare one WAV file per clip with gemini_tts.dataset shards for TTS datasets.
+
+Writes --clips clips of 1-3 s of 24 kHz int16 audio both ways, then reads
+every clip back (WAV: wave module; shards: memory-mapped views, summed so the
+pages are actually touched). Reports wall time, file count and peak Python
+memory (tracemalloc) for each step.
+
+Usage: python benchmarks/bench_dataset.py [--clips 2000] [--dir /tmp/bench_dataset]
+"""
+import os
+import sys
+import time
+import wave
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_tts.dataset import ShardWriter, ShardedDataset
+from gemini_tts.job_queue import write_wav
+
+SAMPLE_RATE = 24000
+
+
+def make_clips(n, rng):
+    lengths = rng.integers(SAMPLE_RATE, 3 * SAMPLE_RATE, n)
+    return [rng.integers(-8000, 8000, length, dtype=np.int16) for length in lengths]
+
+
+def timed(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def write_wavs(root, clips):
+    for i, pcm in enumerate(clips):
+        write_wav(os.path.join(root, f"{i:06d}.wav"), pcm, SAMPLE_RATE)
+
+
+def read_wavs(root, n):
+    total = 0
+    for i in range(n):
+        with wave.open(os.path.join(root, f"{i:06d}.wav"), "rb") as f:
+            total += int(np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").sum(dtype=np.int64))
+    return total
+
+
+def write_shards(root, clips):
+    writer = ShardWriter(root, shard_bytes=256 * 2 ** 20)
+    for i, pcm in enumerate(clips):
+        writer.append(pcm, f"Say: line {i}", "Puck", "gemini-2.5-flash-preview-tts", SAMPLE_RATE)
+    writer.close()
+
+
+def read_shards(root):
+    dataset = ShardedDataset(root)
+    return sum(int(clip.sum(dtype=np.int64)) for clip in dataset)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=2000)
+    parser.add_argument("--dir", default=None, help="Scratch directory (default: a temporary one)")
+    args = parser.parse_args()
+
+    clips = make_clips(args.clips, np.random.default_rng(0))
+    expected = sum(int(pcm.sum(dtype=np.int64)) for pcm in clips)
+    audio_mb = sum(pcm.nbytes for pcm in clips) / 2 ** 20
+    scratch = args.dir or tempfile.mkdtemp(prefix="bench_dataset_")
+    wav_root, shard_root = os.path.join(scratch, "wav"), os.path.join(scratch, "shards")
+    os.makedirs(wav_root, exist_ok=True)
+    print(f"{args.clips} clips, {audio_mb:.0f} MB of PCM")
+
+    try:
+        rows = []
+        elapsed, peak, _ = timed(lambda: write_wavs(wav_root, clips))
+        rows.append(("wav write", elapsed, peak, len(os.listdir(wav_root))))
+        elapsed, peak, total = timed(lambda: read_wavs(wav_root, args.clips))
+        assert total == expected
+        rows.append(("wav read", elapsed, peak, len(os.listdir(wav_root))))
+        elapsed, peak, _ = timed(lambda: write_shards(shard_root, clips))
+        rows.append(("shard write", elapsed, peak, len(os.listdir(shard_root))))
+        elapsed, peak, total = timed(lambda: read_shards(shard_root))
+        assert total == expected
+        rows.append(("shard read", elapsed, peak, len(os.listdir(shard_root))))
+    finally:
+        if not args.dir:
+            shutil.rmtree(scratch)
+
+    print(f"{'step':<14}{'ms':>10}{'clips/s':>10}{'peak MB':>10}{'files':>8}")
+    for name, elapsed, peak, files in rows:
+        print(f"{name:<14}{elapsed * 1000:>10.0f}{args.clips / elapsed:>10.0f}{peak / 2 ** 20:>10.1f}{files:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_decode.py
+"""
+Compare the original PCM decode path of try_official_tts with gemini_tts.pcm.
+
+The original path: base64.b64decode -> np.frombuffer -> astype(float32) -> / 32768.
+The new path: blockwise base64 decode into a preallocated int16 array, then a
+single scaling pass into a preallocated float32 buffer (the tensor storage in
+the node).
+
+Peak memory is measured with tracemalloc, which tracks numpy allocations.
+
+Usage: python benchmarks/bench_decode.py [minutes ...]
+"""
+import os
+import sys
+import time
+import base64
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_tts.pcm import b64_to_int16, int16_to_float32
+
+SAMPLE_RATE = 24000
+
+
+def legacy_decode(b64_data):
+    audio_data = base64.b64decode(b64_data)
+    audio_np = np.frombuffer(audio_data, dtype=np.int16)
+    return audio_np.astype(np.float32) / 32768.0
+
+
+def new_decode(b64_data):
+    pcm = b64_to_int16(b64_data)
+    return int16_to_float32(pcm)
+
+
+def measure(fn, b64_data, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(b64_data)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(b64_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main(minutes_list):
+    rng = np.random.default_rng(0)
+    print(f"{'clip':>8} {'path':>8} {'time ms':>10} {'peak MB':>10}")
+    for minutes in minutes_list:
+        samples = int(minutes * 60 * SAMPLE_RATE)
+        pcm = rng.integers(-32768, 32767, samples, dtype=np.int16)
+        b64_data = base64.b64encode(pcm.tobytes()).decode("ascii")
+
+        legacy_time, legacy_peak, legacy_out = measure(legacy_decode, b64_data)
+        new_time, new_peak, new_out = measure(new_decode, b64_data)
+        assert np.array_equal(legacy_out, new_out)
+
+        for name, elapsed, peak in (("legacy", legacy_time, legacy_peak), ("new", new_time, new_peak)):
+            print(f"{minutes:>6.1f}m {name:>8} {elapsed * 1000:>10.1f} {peak / 2 ** 20:>10.1f}")
+        print(f"{'':>8} {'saving':>8} {100 * (1 - new_time / legacy_time):>9.0f}% "
+              f"{100 * (1 - new_peak / legacy_peak):>9.0f}%")
+
+
+if __name__ == "__main__":
+    main([float(arg) for arg in sys.argv[1:]] or [1, 3, 10])
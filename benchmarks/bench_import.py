@@ -0,0 +1,82 @@
+# benchmarks/bench_import.py
+"""
+Measure the cost of loading the node package the way ComfyUI does.
+
+Each run starts a fresh interpreter, pre-imports torch and numpy (ComfyUI has
+them loaded before custom nodes), then imports the package from its folder and
+records the elapsed time, the registered nodes and whether any heavy module
+that should be deferred was pulled in.
+
+Exits non-zero when the median load time exceeds --max-ms, when a deferred
+module was imported at load time, or when no nodes were registered, so it can
+guard startup cost in CI.
+
+Usage: python benchmarks/bench_import.py [--runs 5] [--max-ms 250]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported on the code paths that use them
+DEFERRED_MODULES = ["google.generativeai", "torchaudio", "requests", "aiohttp"]
+
+CHILD = r"""
+import sys, json, time, importlib.util
+import torch, numpy
+root, deferred = sys.argv[1], json.loads(sys.argv[2])
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location(
+    "gemini_tts_package", f"{root}/__init__.py", submodule_search_locations=[root])
+module = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = module
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "ms": elapsed * 1000,
+    "nodes": sorted(module.NODE_CLASS_MAPPINGS),
+    "loaded": [name for name in deferred if name in sys.modules],
+}))
+"""
+
+
+def run_once():
+    result = subprocess.run([sys.executable, "-c", CHILD, ROOT, json.dumps(DEFERRED_MODULES)],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    median_ms = statistics.median(r["ms"] for r in results)
+    loaded = sorted({name for r in results for name in r["loaded"]})
+    nodes = results[-1]["nodes"]
+
+    print(f"📦 Package load: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(r['ms'] for r in results):.1f}, max {max(r['ms'] for r in results):.1f})")
+    print(f"🧩 Registered nodes: {', '.join(nodes) or 'none'}")
+    print(f"💤 Deferred modules imported at load: {', '.join(loaded) or 'none'}")
+
+    failures = []
+    if median_ms > args.max_ms:
+        failures.append(f"median load time {median_ms:.1f} ms exceeds budget of {args.max_ms:.0f} ms")
+    if loaded:
+        failures.append(f"deferred modules imported at load time: {', '.join(loaded)}")
+    if not nodes:
+        failures.append("no nodes registered")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# benchmarks/bench_parse.py
+"""
+Compare reading a generateContent response the old way with InlineDataParser.
+
+The old path: join the body (response.content), decode it to text and
+json.loads it (response.json()), then b64_to_int16 the inlineData string.
+The new path: feed the body chunks to InlineDataParser as they arrive.
+
+The body is generated in 64 KB chunks on the fly, the way it comes off the
+socket, so neither path gets it for free. Each path runs in its own child
+process: peak RSS is the growth of ru_maxrss over the process's baseline,
+and the Python-level peak is measured with tracemalloc.
+
+Usage: python benchmarks/bench_parse.py [minutes ...]
+"""
+import os
+import sys
+import json
+import time
+import base64
+import resource
+import subprocess
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_tts.pcm import b64_to_int16
+from gemini_tts.response_parser import InlineDataParser, audio_from_result, READ_CHUNK_BYTES
+
+SAMPLE_RATE = 24000
+
+
+def make_pcm(minutes):
+    rng = np.random.default_rng(0)
+    return rng.integers(-32768, 32767, int(minutes * 60 * SAMPLE_RATE), dtype=np.int16)
+
+
+def body_parts(pcm):
+    return json.dumps({
+        "candidates": [{"content": {"parts": [{"inlineData": {
+            "mimeType": f"audio/L16;codec=pcm;rate={SAMPLE_RATE}", "data": "@@"}}], "role": "model"},
+            "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": len(pcm) // 960},
+        "modelVersion": "gemini-2.5-flash-preview-tts",
+    }).encode().split(b"@@")
+
+
+def body_length(pcm):
+    """What the Content-Length header would say"""
+    head, tail = body_parts(pcm)
+    return len(head) + (pcm.nbytes + 2) // 3 * 4 + len(tail)
+
+
+def body_chunks(pcm):
+    """Yield a generateContent response body for pcm in READ_CHUNK_BYTES pieces"""
+    head, tail = body_parts(pcm)
+    yield head
+    raw = memoryview(pcm).cast("B")
+    step = READ_CHUNK_BYTES // 4 * 3
+    for start in range(0, len(raw), step):
+        yield base64.b64encode(raw[start:start + step])
+    yield tail
+
+
+def legacy_parse(chunks, size_hint):
+    content = b"".join(chunks)
+    response_data = json.loads(content.decode("utf-8"))
+    part = response_data["candidates"][0]["content"]["parts"][0]
+    return b64_to_int16(part["inlineData"]["data"])
+
+
+def streaming_parse(chunks, size_hint):
+    parser = InlineDataParser(size_hint)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return audio_from_result(parser.close())
+
+
+PATHS = {"legacy": legacy_parse, "streaming": streaming_parse}
+
+
+def child(path, minutes):
+    """Run one path in this process and print JSON with its timings and peaks"""
+    pcm = make_pcm(minutes)
+    fn = PATHS[path]
+    size_hint = body_length(pcm)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    out = fn(body_chunks(pcm), size_hint)
+    elapsed = time.perf_counter() - start
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb
+    assert np.array_equal(out, pcm)
+    del out
+
+    best = elapsed
+    for _ in range(2):
+        start = time.perf_counter()
+        fn(body_chunks(pcm), size_hint)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(body_chunks(pcm), size_hint)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({"time": best, "rss": rss_kb * 1024, "peak": peak}))
+
+
+def run_child(path, minutes):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", path, str(minutes)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(minutes_list):
+    print(f"{'clip':>8} {'path':>10} {'time ms':>10} {'RSS MB':>10} {'peak MB':>10}")
+    for minutes in minutes_list:
+        results = {path: run_child(path, minutes) for path in PATHS}
+        for path, r in results.items():
+            print(f"{minutes:>6.1f}m {path:>10} {r['time'] * 1000:>10.1f} {r['rss'] / 2 ** 20:>10.1f} "
+                  f"{r['peak'] / 2 ** 20:>10.1f}")
+        legacy, new = results["legacy"], results["streaming"]
+        print(f"{'':>8} {'saving':>10} {100 * (1 - new['time'] / legacy['time']):>9.0f}% "
+              f"{100 * (1 - new['rss'] / max(legacy['rss'], 1)):>9.0f}% "
+              f"{100 * (1 - new['peak'] / legacy['peak']):>9.0f}%")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], float(sys.argv[3]))
+    else:
+        main([float(arg) for arg in sys.argv[1:]] or [1, 3, 10])
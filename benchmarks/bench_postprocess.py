@@ -0,0 +1,72 @@
+# benchmarks/bench_postprocess.py
+"""
+Time gemini_tts.postprocess on batches of synthetic 24 kHz speech-like audio.
+
+Each step (trim, resample to 44.1/48 kHz, RMS and LUFS normalization) is timed
+on its own, then the full trim -> resample -> normalize chain, for a batch of
+clips of different lengths with silent padding. The second resample call
+shows the cached-kernel cost.
+
+Usage: python benchmarks/bench_postprocess.py [--batch 8] [--seconds 30]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_tts.postprocess import (trim_silence_batch, resample_batch, measure_rms_db, measure_lufs,
+                                    postprocess_waveform, sinc_resample_kernel)
+
+SAMPLE_RATE = 24000
+
+
+def make_batch(batch, seconds, rng):
+    """Amplitude-modulated noise with 0.5 s of silence on each side, varying lengths"""
+    n = int(seconds * SAMPLE_RATE)
+    waveform = np.zeros((batch, 1, n), dtype=np.float32)
+    lengths = rng.integers(n // 2, n + 1, batch)
+    pad = SAMPLE_RATE // 2
+    for i, length in enumerate(lengths):
+        t = np.arange(length - 2 * pad) / SAMPLE_RATE
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+        waveform[i, 0, pad:length - pad] = 0.1 * envelope * rng.standard_normal(len(t))
+    return waveform, lengths
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    args = parser.parse_args()
+
+    waveform, lengths = make_batch(args.batch, args.seconds, np.random.default_rng(0))
+    audio_seconds = lengths.sum() / SAMPLE_RATE
+    print(f"Batch: {args.batch} clips, {audio_seconds:.0f}s of audio total")
+
+    sinc_resample_kernel.cache_clear()
+    rows = [
+        ("trim -50 dBFS", timed(trim_silence_batch, waveform, lengths, -50.0)),
+        ("resample 48k (cold)", timed(resample_batch, waveform, lengths, SAMPLE_RATE, 48000)),
+        ("resample 48k (cached)", timed(resample_batch, waveform, lengths, SAMPLE_RATE, 48000)),
+        ("resample 44.1k (cold)", timed(resample_batch, waveform, lengths, SAMPLE_RATE, 44100)),
+        ("resample 44.1k (cached)", timed(resample_batch, waveform, lengths, SAMPLE_RATE, 44100)),
+        ("measure rms", timed(measure_rms_db, waveform, lengths)),
+        ("measure lufs", timed(measure_lufs, waveform, lengths, SAMPLE_RATE)),
+        ("full chain 48k + lufs", timed(postprocess_waveform, waveform, SAMPLE_RATE, lengths, 48000, -50.0,
+                                        50, "lufs", -16.0)),
+    ]
+    print(f"{'step':<26}{'ms':>10}{'x realtime':>12}")
+    for name, ms in rows:
+        print(f"{name:<26}{ms:>10.1f}{audio_seconds / (ms / 1000):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# benchmarks/bench_throughput.py
+"""
+End-to-end throughput benchmark against the local mock Gemini TTS server.
+
+Starts gemini_tts.mock_server in-process, points the node's shared HTTP client
+at it and drives the real node entry points:
+
+    single      sequential GeminiTTS.generate_speech calls
+    concurrent  generate_speech from --concurrency threads (one node each)
+    batch       GeminiTTSBatch.generate_batch with --concurrency workers
+    packed      the same batch with pack_short_lines (several lines per request)
+    chunked     one long script through chunk_long_text
+    stream      sequential generate_speech with stream_response
+    graph       a queued workflow of GeminiTTS nodes run one at a time, with prefetch
+                starting them all (--concurrency at once) when the prompt is queued
+
+--hedge P races a backup request against any request slower than the P-th
+percentile of recent latencies (at most --hedge-max-ratio of requests); use a
+heavy-tailed --latency to see the effect on p99.
+
+--keys N spreads the requests over a pool of N fake API keys; combine it with
+--key-rpm to emulate a per-key quota and watch throughput scale with the pool.
+
+Reports throughput, p50/p95/p99 latency, server-side request/429/5xx counts
+(retries = server requests - successful responses) and peak memory.
+
+Usage: python benchmarks/bench_throughput.py --scenario all --requests 20 \\
+           --concurrency 4 --latency lognormal:1.0:0.5 --rate-429 0.05 --rate-5xx 0.05
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import tracemalloc
+import importlib.util
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_API_KEY = "AIza" + "0" * 35
+SCENARIOS = ["single", "concurrent", "batch", "packed", "chunked", "stream", "graph"]
+
+
+def load_package():
+    """Import the node package from its folder the way ComfyUI does"""
+    spec = importlib.util.spec_from_file_location(
+        "gemini_tts_package", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = package
+    spec.loader.exec_module(package)
+    return sys.modules[f"{spec.name}.gemini_tts_node"]
+
+
+def fake_key(i):
+    return "AIza" + f"{i:035d}"
+
+
+def reset_shared_state(node_module, base_url, cache_dir, keys=0, hedge=None):
+    """Point the process-wide singletons at the mock server with pacing disabled"""
+    from gemini_tts_package.gemini_tts.http_client import GeminiHTTPClient
+    from gemini_tts_package.gemini_tts.rate_limiter import RateLimiter
+    from gemini_tts_package.gemini_tts.circuit_breaker import CircuitBreaker
+    from gemini_tts_package.gemini_tts.cache import AudioCache
+    from gemini_tts_package.gemini_tts.key_pool import KeyPool
+    from gemini_tts_package.gemini_tts.hedging import HedgePolicy
+
+    node_module._http_client = GeminiHTTPClient(pool_size=64, base_url=base_url)
+    node_module._rate_limiter = RateLimiter({})
+    node_module._circuit_breaker = CircuitBreaker()
+    node_module._audio_cache = AudioCache(cache_dir)
+    node_module._key_pool = None
+    node_module._hedge_policy = HedgePolicy(**hedge) if hedge else None
+    if keys:
+        node_module._key_pool = KeyPool()
+        for i in range(keys):
+            node_module._key_pool.add(fake_key(i), label=f"key{i}")
+
+
+def prompts(n, offset=0):
+    return [f"Say: Benchmark line {offset + i} with a handful of extra words to speak." for i in range(n)]
+
+
+def is_success(status):
+    return status.startswith("✅") or status.startswith("⚠️ Fallback Success")
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run_scenario(node_module, name, args):
+    common = dict(tts_model=args.model, voice="[M] Puck", api_key="", use_cache=False,
+                  aggressive_retry=True, use_paid_tier=args.paid)
+    latencies, ok = [], 0
+
+    if name in ("single", "stream"):
+        node = node_module.GeminiTTS(api_key=FAKE_API_KEY)
+        for text in prompts(args.requests):
+            elapsed, (_, status) = timed(node.generate_speech, text, stream_response=(name == "stream"), **common)
+            latencies.append(elapsed)
+            ok += is_success(status)
+        return latencies, ok, args.requests
+
+    if name == "concurrent":
+        def one(text):
+            node = node_module.GeminiTTS(api_key=FAKE_API_KEY)
+            return timed(node.generate_speech, text, **common)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for elapsed, (_, status) in pool.map(one, prompts(args.requests)):
+                latencies.append(elapsed)
+                ok += is_success(status)
+        return latencies, ok, args.requests
+
+    if name in ("batch", "packed"):
+        node = node_module.GeminiTTSBatch(api_key=FAKE_API_KEY)
+        original = node.try_official_tts
+
+        def traced(*call_args, **call_kwargs):
+            elapsed, result = timed(original, *call_args, **call_kwargs)
+            latencies.append(elapsed)
+            return result
+        node.try_official_tts = traced
+        _, _, lengths, _ = node.generate_batch("\n".join(prompts(args.requests)), args.model, "[M] Puck",
+                                               api_key="", use_paid_tier=args.paid,
+                                               max_workers=args.concurrency, use_cache=False,
+                                               pack_short_lines=(name == "packed"))
+        return latencies, sum(1 for n in json.loads(lengths) if n), args.requests
+
+    if name == "chunked":
+        node = node_module.GeminiTTS(api_key=FAKE_API_KEY)
+        script = "Say: " + " ".join(prompts(args.requests * 2))
+        elapsed, (_, status) = timed(node.generate_speech, script, chunk_long_text=True, max_chunk_chars=200,
+                                     parallel_chunks=args.concurrency, **common)
+        return [elapsed], int(is_success(status)), 1
+
+    if name == "graph":
+        from gemini_tts_package.gemini_tts.prefetch import PrefetchService
+        # Prefetched nodes are created fresh, so they take the key from the environment
+        os.environ["GEMINI_API_KEY"] = FAKE_API_KEY
+        node_module._prefetcher = PrefetchService(workers=args.concurrency)
+        graph = {}
+        for i, text in enumerate(prompts(args.requests)):
+            graph[f"tts{i}"] = {"class_type": "GeminiTTS", "inputs": {"prompt": text, **common}}
+            graph[f"save{i}"] = {"class_type": "SaveAudio", "inputs": {"audio": [f"tts{i}", 0]}}
+        node_module.prefetch_prompt({"prompt": graph})
+        for node in graph.values():
+            if node["class_type"] == "GeminiTTS":
+                elapsed, (_, status) = timed(node_module.GeminiTTS().generate_speech, **node["inputs"])
+                latencies.append(elapsed)
+                ok += is_success(status)
+        return latencies, ok, args.requests
+
+    raise ValueError(f"Unknown scenario {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="all", choices=SCENARIOS + ["all"])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--model", default="gemini-2.5-flash-preview-tts")
+    parser.add_argument("--paid", action="store_true", help="Use paid-tier retry/timeout behaviour")
+    parser.add_argument("--latency", default="lognormal:0.5:0.4")
+    parser.add_argument("--audio-seconds", type=float, default=None)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--rate-403", type=float, default=0.0)
+    parser.add_argument("--retry-delay", type=float, default=1.0)
+    parser.add_argument("--keys", type=int, default=0, help="Pool this many fake API keys (0: single key)")
+    parser.add_argument("--key-rpm", type=int, default=0, help="Mock per-key requests per minute (0: unlimited)")
+    parser.add_argument("--hedge", type=float, default=0, help="Hedge requests slower than this percentile (0: off)")
+    parser.add_argument("--hedge-max-ratio", type=float, default=0.1)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    node_module = load_package()
+    from gemini_tts_package.gemini_tts.mock_server import MockGeminiServer
+
+    results = []
+    for name in (SCENARIOS if args.scenario == "all" else [args.scenario]):
+        server = MockGeminiServer(latency=args.latency, audio_seconds=args.audio_seconds,
+                                  rate_429=args.rate_429, rate_5xx=args.rate_5xx, rate_403=args.rate_403,
+                                  retry_delay=args.retry_delay, seed=0, key_rpm=args.key_rpm).start()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            hedge = None
+            if args.hedge:
+                hedge = {"percentile": args.hedge, "max_ratio": args.hedge_max_ratio, "min_samples": 10,
+                         "min_delay": 0.0}
+            reset_shared_state(node_module, server.base_url, cache_dir, args.keys, hedge)
+            tracemalloc.start()
+            wall, (latencies, ok, total) = timed(run_scenario, node_module, name, args)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        server.stop()
+
+        stats = server.stats
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (0, 0, 0)
+        results.append({
+            "scenario": name, "items": total, "succeeded": ok, "wall_s": round(wall, 3),
+            "throughput_per_s": round(ok / wall, 3) if wall else 0.0,
+            "p50_s": round(float(p50), 3), "p95_s": round(float(p95), 3), "p99_s": round(float(p99), 3),
+            "server_requests": stats["requests"], "retries": stats["requests"] - stats["ok"],
+            "http_429": stats["429"], "http_5xx": stats["5xx"], "http_403": stats["403"],
+            "peak_traced_mb": round(peak / 2 ** 20, 1),
+        })
+
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\n{'scenario':<11}{'ok/items':>10}{'wall s':>9}{'items/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}"
+          f"{'reqs':>6}{'retry':>6}{'429':>5}{'5xx':>5}{'peak MB':>9}")
+    for r in results:
+        print(f"{r['scenario']:<11}{r['succeeded']:>5}/{r['items']:<4}{r['wall_s']:>9.2f}{r['throughput_per_s']:>9.2f}"
+              f"{r['p50_s']:>8.2f}{r['p95_s']:>8.2f}{r['p99_s']:>8.2f}{r['server_requests']:>6}"
+              f"{r['retries']:>6}{r['http_429']:>5}{r['http_5xx']:>5}{r['peak_traced_mb']:>9.1f}")
+    print(f"Process max RSS: {max_rss_mb:.0f} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results, "max_rss_mb": round(max_rss_mb, 1)}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# gemini_tts/__init__.py
+"""
+Shared runtime support for the Gemini TTS nodes.
+
+The modules in this package hold process-wide infrastructure (audio cache,
+HTTP client, ...) used by the nodes in gemini_tts_node.py. They do not depend
+on ComfyUI and can be imported on their own.
+"""
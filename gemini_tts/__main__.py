@@ -0,0 +1,4 @@
+# gemini_tts/__main__.py
+from .bulk import main
+
+raise SystemExit(main())
@@ -0,0 +1,283 @@
+# gemini_tts/async_engine.py
+import json
+import asyncio
+import threading
+from .rate_limiter import retry_delay_from
+from .response_parser import InlineDataParser, READ_CHUNK_BYTES, parse_inline_response, audio_from_result
+
+
+def _load_aiohttp():
+    """aiohttp if installed, else None (requests are then run on worker threads)"""
+    try:
+        import aiohttp
+        return aiohttp
+    except ImportError:
+        return None
+
+
+def _error_data(headers, body):
+    """Decoded JSON error body, or the raw text when the response is not JSON"""
+    text = body.decode("utf-8", "replace")
+    if str(headers.get("Content-Type", "")).startswith("application/json"):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text
+
+
+class AsyncTTSEngine:
+    """asyncio implementation of the generateContent request/retry loop.
+
+    Backoff and rate-limit waits use asyncio.sleep, so a waiting request costs
+    a suspended coroutine instead of a blocked executor thread. A semaphore
+    bounds how many requests are on the wire at once; everything else queues
+    on the event loop. Cancelling the awaiting task aborts the request (with
+    aiohttp) or abandons it to its worker thread (without).
+    """
+
+    def __init__(self, client, max_concurrency=8):
+        self.client = client
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.aiohttp = _load_aiohttp()
+        self._loop_state = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+
+    async def _state(self):
+        """Semaphore and aiohttp session for the running loop (asyncio objects are loop-bound)"""
+        loop = asyncio.get_running_loop()
+        stale = []
+        with self._lock:
+            state = self._loop_state.get(loop)
+            if state is None:
+                # Forget loops that have been closed since (e.g. one per asyncio.run); keeping
+                # them would hold every loop and its session's connector alive
+                for closed in [other for other in self._loop_state if other.is_closed()]:
+                    stale.append(self._loop_state.pop(closed)["session"])
+                state = self._loop_state[loop] = {
+                    "semaphore": asyncio.Semaphore(self.max_concurrency),
+                    "session": None,
+                }
+        for session in stale:
+            if session is not None and not session.closed:
+                # Closed from this loop: aiohttp marks the connector closed and skips the
+                # transports of the dead loop, so no "Unclosed client session" warning follows
+                await session.close()
+        return state
+
+    def _session(self, state):
+        if state["session"] is None or state["session"].closed:
+            aiohttp = self.aiohttp
+            connector = aiohttp.TCPConnector(limit=self.client.pool_size)
+            state["session"] = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": "ComfyUI-Gemini-TTS/1.0", "Accept-Encoding": "gzip, deflate"},
+            )
+        return state["session"]
+
+    async def post(self, tts_model, api_key, payload, timeout=None):
+        """POST to generateContent; returns (status, headers, body).
+
+        timeout is a (connect, read) pair (default: the client's free-tier
+        timeouts). A 200 body is streamed through InlineDataParser and comes
+        back as its result dict; any other status returns the raw body bytes.
+        """
+        timeout = timeout or self.client.timeouts()
+        state = await self._state()
+        with self._lock:
+            self.queued += 1
+        try:
+            await state["semaphore"].acquire()
+        finally:
+            with self._lock:
+                self.queued -= 1
+        with self._lock:
+            self.in_flight += 1
+        try:
+            if self.aiohttp is None:
+                return await asyncio.to_thread(self._post_blocking, tts_model, api_key, payload, timeout)
+            session = self._session(state)
+            client_timeout = self.aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+            async with session.post(self.client.model_url(tts_model), params={"key": api_key},
+                                    json=payload, timeout=client_timeout) as response:
+                if response.status != 200:
+                    return response.status, response.headers, await response.read()
+                parser = InlineDataParser(response.content_length or 0)
+                async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+                    parser.feed(chunk)
+                result = parser.close()
+                result["bytes_in"] = parser.bytes_in
+                return response.status, response.headers, result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            state["semaphore"].release()
+
+    def _post_blocking(self, tts_model, api_key, payload, timeout):
+        response = self.client.generate_content(tts_model, api_key, payload, timeout, stream=True)
+        if response.status_code != 200:
+            return response.status_code, response.headers, response.content
+        return response.status_code, response.headers, parse_inline_response(response)
+
+    def _transport_errors(self):
+        """(timeout errors, connection errors) raised by the active transport"""
+        if self.aiohttp is None:
+            import requests
+            return (requests.exceptions.Timeout,), (requests.exceptions.RequestException,)
+        return (asyncio.TimeoutError,), (self.aiohttp.ClientError,)
+
+    async def generate(self, tts_model, api_key, payload, tier="free", max_retries=1, timeout=None,
+                       limiter=None, breaker=None, trace=None, max_wait=120, billing_project_id="", pooled=False):
+        """Request audio for payload with retries; returns (int16 PCM array, seconds waited for budget).
+
+        Raises Exception with the same messages as the threaded path, so callers
+        can keep classifying errors by "429" / "PERMISSION_DENIED" / etc.
+        pooled means api_key came from a KeyPool checkout: the breaker was
+        already consulted, and a 429 is raised at once so the caller can move
+        on to another key instead of waiting on this one. timeout is a
+        (connect, read) pair and defaults to the client's timeouts for tier.
+        """
+        timeout = timeout or self.client.timeouts(tier)
+        if breaker is not None and not pooled and not breaker.allow(tts_model, api_key):
+            raise Exception(breaker.open_error(tts_model, api_key))
+
+        timeout_errors, connection_errors = self._transport_errors()
+        estimated_tokens = len(payload["contents"][0]["parts"][0]["text"]) / 4
+        request_bytes = len(json.dumps(payload))
+
+        for attempt in range(max_retries):
+            try:
+                waited = 0.0
+                if limiter:
+                    waited = await limiter.acquire_async(tts_model, tier, tokens=estimated_tokens,
+                                                         max_wait=max_wait, api_key=api_key)
+                    if trace:
+                        trace.add_stage("queue", waited)
+                if trace:
+                    with trace.stage("http"):
+                        status, headers, body = await self.post(tts_model, api_key, payload, timeout)
+                    trace.count("gemini_tts_bytes_sent_total", request_bytes)
+                    trace.count("gemini_tts_bytes_received_total",
+                                body["bytes_in"] if status == 200 else len(body))
+                    trace.count("gemini_tts_http_responses_total", code=status)
+                else:
+                    status, headers, body = await self.post(tts_model, api_key, payload, timeout)
+                print(f"📊 Response status: {status} (attempt {attempt + 1}/{max_retries}, async)")
+
+                if status == 200:
+                    # Decoded while the body was read, so there is no separate base64_decode stage
+                    audio_np = audio_from_result(body)
+                    if breaker is not None:
+                        breaker.record_success(tts_model, api_key)
+                    return audio_np, waited
+
+                error_data = _error_data(headers, body)
+                json_body = error_data if isinstance(error_data, (dict, list)) else None
+                if status == 429:
+                    retry_after = retry_delay_from(headers, json_body)
+                    if limiter and retry_after is not None:
+                        limiter.penalize(tts_model, tier, retry_after, api_key)
+                        if not pooled and attempt < max_retries - 1 and retry_after <= max_wait:
+                            print(f"⚠️ Rate limited, server asked to retry in {retry_after:.0f} seconds...")
+                            if trace:
+                                trace.count("gemini_tts_retries_total", reason="429")
+                            continue
+                    error_text = f"Rate limit (429): {error_data}"
+                    if breaker is not None:
+                        breaker.record_failure(tts_model, api_key, 429, error_text, retry_after)
+                    raise Exception(error_text)
+
+                if status == 403:
+                    if tier == "paid":
+                        error_text = f"Billing/Permission error (403): Check billing project '{billing_project_id}' and API access. {error_data}"
+                    else:
+                        error_text = f"Permission denied (403): {error_data}"
+                    if breaker is not None:
+                        breaker.record_failure(tts_model, api_key, 403, error_text)
+                    raise Exception(error_text)
+
+                if attempt < max_retries - 1 and status >= 500:
+                    backoff_time = retry_delay_from(headers, json_body, 2 ** attempt)
+                    print(f"⚠️ Server error {status}, retrying in {backoff_time} seconds...")
+                    if trace:
+                        trace.count("gemini_tts_retries_total", reason="5xx")
+                    await asyncio.sleep(backoff_time)
+                    continue
+                raise Exception(f"REST API error {status}: {error_data}")
+
+            except timeout_errors:
+                if attempt < max_retries - 1:
+                    backoff_time = 2 ** attempt
+                    print(f"⚠️ Request timeout, retrying in {backoff_time} seconds...")
+                    if trace:
+                        trace.count("gemini_tts_retries_total", reason="timeout")
+                    await asyncio.sleep(backoff_time)
+                    continue
+                raise Exception("Request timeout after retries")
+            except connection_errors as e:
+                if attempt < max_retries - 1:
+                    backoff_time = 2 ** attempt
+                    print(f"⚠️ Request error: {e}, retrying in {backoff_time} seconds...")
+                    if trace:
+                        trace.count("gemini_tts_retries_total", reason="connection")
+                    await asyncio.sleep(backoff_time)
+                    continue
+                raise Exception(f"Request failed: {e}")
+            finally:
+                if breaker is not None:
+                    breaker.release_probe(tts_model, api_key)
+
+        raise Exception("Max retries exceeded")
+
+    async def generate_pooled(self, pool, tts_model, api_key, payload, tier="free", max_retries=1, timeout=None,
+                              limiter=None, breaker=None, trace=None, max_wait=120, billing_project_id=""):
+        """generate() with a KeyPool: a key that is rate limited, denied or invalid hands over to the next.
+
+        Without a pool the request goes out on api_key. Returns
+        (int16 PCM array, seconds waited, API key used, tier used).
+        """
+        if pool is None:
+            audio_np, waited = await self.generate(tts_model, api_key, payload, tier, max_retries, timeout,
+                                                   limiter, breaker, trace, max_wait, billing_project_id)
+            return audio_np, waited, api_key, tier
+
+        estimated_tokens = len(payload["contents"][0]["parts"][0]["text"]) / 4
+        for attempt in range(len(pool)):
+            lease = pool.checkout(tts_model, tier, breaker, limiter, estimated_tokens)
+            if lease is None:
+                raise Exception(pool.exhausted_error(tts_model, breaker))
+            key_tier = lease.tier or tier
+            key_outcome = "error"
+            try:
+                audio_np, waited = await self.generate(tts_model, lease.api_key, payload, key_tier, max_retries,
+                                                       timeout, limiter, breaker, trace, max_wait,
+                                                       lease.billing_project_id or billing_project_id, pooled=True)
+                key_outcome = "success"
+                return audio_np, waited, lease.api_key, key_tier
+            except Exception as error:
+                error_str = str(error)
+                rate_limited = "429" in error_str or "RESOURCE_EXHAUSTED" in error_str
+                key_outcome = "rate_limited" if rate_limited else "error"
+                if "API key not valid" in error_str or "API_KEY_INVALID" in error_str:
+                    pool.disable(lease, "invalid key")
+                if not ((rate_limited or "403" in error_str or lease.disabled) and attempt < len(pool) - 1):
+                    raise
+                print(f"🔑 Key {lease.label} failed ({error_str[:60]}), trying another pooled key...")
+            finally:
+                pool.release(lease, key_outcome)
+
+    def status_line(self):
+        transport = "aiohttp" if self.aiohttp is not None else "threads"
+        with self._lock:
+            in_flight, queued = self.in_flight, self.queued
+        return f"⚡ Async engine ({transport}): {in_flight}/{self.max_concurrency} in flight | {queued} queued"
+
+    async def close(self):
+        """Close the aiohttp session belonging to the running loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loop_state.pop(loop, None)
+        if state and state["session"] is not None:
+            await state["session"].close()
@@ -0,0 +1,52 @@
+# gemini_tts/batch.py
+import json
+import numpy as np
+
+
+def parse_batch_prompts(text):
+    """Parse newline- or JSON-separated prompts into (prompt, voice) pairs.
+
+    JSON input is a list whose items are either strings or objects with a
+    "prompt" (or "text") and an optional "voice". Plain text input is one
+    prompt per line; blank lines and lines starting with "#" are skipped,
+    and a line of the form "Voice | text" selects a voice for that line.
+    voice is None when the item uses the node's default voice.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return []
+
+    items = []
+    if stripped.startswith("["):
+        for entry in json.loads(stripped):
+            if isinstance(entry, str):
+                items.append((entry, None))
+            elif isinstance(entry, dict):
+                prompt = entry.get("prompt") or entry.get("text") or ""
+                items.append((prompt, entry.get("voice") or None))
+            else:
+                raise ValueError(f"Unsupported batch item: {entry!r}")
+        return [(prompt.strip(), voice) for prompt, voice in items if prompt.strip()]
+
+    for line in stripped.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        voice = None
+        if "|" in line:
+            head, tail = line.split("|", 1)
+            if head.strip() and len(head.strip()) <= 40:
+                voice, line = head.strip(), tail.strip()
+        if line:
+            items.append((line, voice))
+    return items
+
+
+def pad_segments(segments):
+    """Stack 1-D float32 segments into a zero-padded (batch, max_len) array plus lengths"""
+    lengths = [0 if s is None else len(s) for s in segments]
+    batch = np.zeros((len(segments), max(lengths + [1])), dtype=np.float32)
+    for i, segment in enumerate(segments):
+        if lengths[i]:
+            batch[i, :lengths[i]] = segment
+    return batch, lengths
@@ -0,0 +1,344 @@
+# gemini_tts/bulk.py
+"""
+Headless bulk synthesis: the node's request/retry/decode core without ComfyUI.
+
+Reads prompts from a JSONL or CSV file (fields: prompt or text, and optional
+voice, model, temperature, id), synthesizes them concurrently through
+AsyncTTSEngine with the same rate limiter, circuit breaker, key pool and
+audio cache the nodes use, and writes one WAV/FLAC/raw PCM file per prompt
+(or appends every clip to a sharded dataset with --format shards) plus
+manifest.jsonl. By default the node's audio_cache/ is used, so
+pre-rendered prompts are cache hits when a ComfyUI workflow asks for them.
+
+Usage:
+    python -m gemini_tts prompts.jsonl -o renders/ --concurrency 8 --format flac
+
+Python:
+    from gemini_tts.bulk import BulkSynthesizer, load_items
+    records = BulkSynthesizer(api_keys=["AIza..."]).render(load_items("prompts.csv"), "renders/")
+"""
+import os
+import re
+import csv
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+
+from .async_engine import AsyncTTSEngine
+from .cache import AudioCache
+from .circuit_breaker import CircuitBreaker
+from .http_client import GeminiHTTPClient, API_BASE_URL, build_tts_payload
+from .chunking import split_instruction
+from .dataset import ShardWriter
+from .job_queue import write_wav, quota_delay
+from .key_pool import KeyPool, parse_key_entries
+from .packing import plan_packs, packed_prompt, split_packed
+from .pcm import int16_to_float32, float32_to_int16
+from .postprocess import postprocess_waveform, NORMALIZE_MODES
+from .rate_limiter import RateLimiter, build_quotas, LOCAL_BUDGET_ERROR
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMATS = ["wav", "flac", "pcm", "shards"]
+DEFAULT_MODEL = "gemini-2.5-flash-preview-tts"
+PLACEHOLDER_KEYS = {"token_here", "place_token_here", "your_api_key", "api_key_here", "enter_your_key", "<api_key>",
+                    "put_your_api-key_here"}
+
+
+def load_config(path=None):
+    """The node's config.json (or path); {} when missing"""
+    path = path or os.path.join(PACKAGE_DIR, "config.json")
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def api_voice(voice):
+    """Accept node display names ("[M] Puck") as well as API voice names ("Puck")"""
+    return re.sub(r"^\[[MF]\]\s*", "", str(voice).strip())
+
+
+def load_items(path, voice="Puck", model=DEFAULT_MODEL, temperature=1.0):
+    """Read prompts from .jsonl or .csv into dicts with prompt, voice, model, temperature and id"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+    items = []
+    for number, row in enumerate(rows, 1):
+        if isinstance(row, str):
+            row = {"prompt": row}
+        prompt = (row.get("prompt") or row.get("text") or "").strip()
+        if not prompt:
+            raise ValueError(f"{path}: item {number} has no prompt")
+        items.append({
+            "id": str(row.get("id") or "").strip(),
+            "prompt": prompt,
+            "voice": api_voice(row.get("voice") or voice),
+            "model": (row.get("model") or model).strip(),
+            "temperature": float(row.get("temperature") or temperature),
+        })
+    return items
+
+
+def write_audio(path, pcm, sample_rate=24000, fmt="wav"):
+    """Write int16 mono PCM as WAV, FLAC (needs soundfile) or headerless little-endian PCM"""
+    if fmt == "wav":
+        write_wav(path, pcm, sample_rate)
+    elif fmt == "pcm":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        pcm.astype("<i2").tofile(path)
+    elif fmt == "flac":
+        try:
+            import soundfile
+        except ImportError:
+            raise RuntimeError("FLAC output needs the soundfile package: pip install soundfile")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        soundfile.write(path, pcm, sample_rate, subtype="PCM_16", format="FLAC")
+    else:
+        raise ValueError(f"Unknown audio format: {fmt}")
+
+
+def output_name(index, item, fmt):
+    label = re.sub(r"[^\w.-]+", "_", item["id"] or item["voice"]).strip("_") or "item"
+    return f"{index:05d}_{label}.{fmt}"
+
+
+def summarize(records, wall_seconds):
+    """Throughput and latency figures for a finished run"""
+    ok = [r for r in records if r["status"] in ("ok", "cached")]
+    latencies = [r["latency"] for r in records if r["status"] == "ok"]
+    audio_seconds = sum(r["seconds"] for r in ok)
+    p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (0.0, 0.0)
+    return {
+        "items": len(records),
+        "succeeded": len(ok),
+        "cached": sum(r["status"] == "cached" for r in records),
+        "failed": len(records) - len(ok),
+        "wall_seconds": round(wall_seconds, 2),
+        "items_per_second": round(len(ok) / wall_seconds, 3) if wall_seconds else 0.0,
+        "audio_seconds": round(audio_seconds, 1),
+        "realtime_factor": round(audio_seconds / wall_seconds, 1) if wall_seconds else 0.0,
+        "p50_latency": round(float(p50), 2),
+        "p95_latency": round(float(p95), 2),
+    }
+
+
+class BulkSynthesizer:
+    """Render many prompts concurrently with the nodes' request stack.
+
+    api_keys (plus GEMINI_API_KEY / GEMINI_API_KEYS and the config's keys)
+    form a KeyPool, so requests spread over every key and fail over between
+    them. Pass cache_dir=False to bypass the audio cache.
+    """
+
+    def __init__(self, api_keys=None, tier="free", concurrency=4, max_retries=3, max_wait=600.0,
+                 cache_dir=None, base_url=None, config=None, rate_limit=True, billing_project_id=""):
+        config = load_config() if config is None else config
+        self.tier = tier
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.billing_project_id = billing_project_id
+
+        self.pool = KeyPool()
+        keys = [key.strip() for key in api_keys or [] if key.strip()]
+        if not keys:
+            for key in (os.environ.get("GEMINI_API_KEY"), config.get("GEMINI_API_KEY")):
+                if key and key.lower().strip() not in PLACEHOLDER_KEYS:
+                    keys.append(key.strip())
+                    break
+        for key in keys:
+            self.pool.add(key, billing_project_id)
+        self.limiter = RateLimiter(build_quotas(config.get("rate_limits"))) if rate_limit else None
+        for entry in parse_key_entries(config.get("api_keys"), os.environ.get("GEMINI_API_KEYS", "")):
+            rate_limits = entry.pop("rate_limits", None)
+            self.pool.add(**entry)
+            if rate_limits and self.limiter:
+                self.limiter.set_key_quotas(entry["api_key"], rate_limits)
+        if not len(self.pool):
+            raise ValueError("No API key: pass --api-key or set GEMINI_API_KEY / GEMINI_API_KEYS")
+
+        base_url = base_url or os.environ.get("GEMINI_API_BASE_URL") or config.get("api_base_url") or API_BASE_URL
+        read_timeout = float(config["http_read_timeout"]) if config.get("http_read_timeout") else None
+        self.client = GeminiHTTPClient(pool_size=max(10, concurrency), read_timeout=read_timeout, base_url=base_url)
+        self.engine = AsyncTTSEngine(self.client, max_concurrency=concurrency)
+        self.breaker = CircuitBreaker()
+        if cache_dir is None:
+            cache_dir = config.get("cache_dir") or os.path.join(PACKAGE_DIR, "audio_cache")
+        self.cache = AudioCache(cache_dir) if cache_dir else None
+
+    async def synthesize_async(self, item):
+        """Return (int16 PCM, from_cache) for one item"""
+        payload = build_tts_payload(item["prompt"], item["voice"], item["temperature"])
+        cache_key = AudioCache.make_key(item["model"], payload) if self.cache else None
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached, True
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            try:
+                pcm, _, _, _ = await self.engine.generate_pooled(
+                    self.pool, item["model"], None, payload, self.tier, self.max_retries, None,
+                    limiter=self.limiter, breaker=self.breaker, max_wait=self.max_wait,
+                    billing_project_id=self.billing_project_id)
+                break
+            except Exception as error:
+                # Every key is out of quota: wait for the window to renew instead of failing the item
+                error_str = str(error)
+                if not ("429" in error_str or "RESOURCE_EXHAUSTED" in error_str or LOCAL_BUDGET_ERROR in error_str):
+                    raise
+                delay = quota_delay(error_str, default=30.0)
+                if time.monotonic() + delay > deadline:
+                    raise
+                print(f"⏸️ Rate limited, resuming in {delay:.0f}s")
+                await asyncio.sleep(delay)
+        if self.cache:
+            try:
+                self.cache.put(cache_key, pcm)
+            except OSError as cache_error:
+                print(f"⚠️ Could not write audio cache entry: {cache_error}")
+        return pcm, False
+
+    async def render_async(self, items, output_dir, fmt="wav", sample_rate=24000, normalize="off",
+                           target_level=-16.0, pack=0):
+        """Synthesize items into output_dir; writes manifest.jsonl and returns its records in input order.
+
+        pack > 1 merges up to that many short lines with the same voice, model,
+        temperature and instruction into one request and splits the audio at
+        the pauses; a pack that does not split cleanly is re-sent line by line.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        total = len(items)
+        done = 0
+        shards = ShardWriter(output_dir) if fmt == "shards" else None
+
+        async def render_one(index, item, shared=None):
+            """shared is (pcm, cached, latency) cut from a packed request, or the error that request raised"""
+            nonlocal done
+            record = {"index": index, **item, "status": "error", "path": None, "samples": 0, "seconds": 0.0,
+                      "sample_rate": sample_rate, "latency": 0.0, "packed": shared is not None, "error": None}
+            start = time.perf_counter()
+            try:
+                if isinstance(shared, Exception):
+                    raise shared
+                if shared is None:
+                    pcm, cached = await self.synthesize_async(item)
+                    record["latency"] = round(time.perf_counter() - start, 3)
+                else:
+                    pcm, cached, record["latency"] = shared
+                rate = 24000
+                if sample_rate != 24000 or normalize != "off":
+                    waveform = int16_to_float32(pcm)[None, None, :]
+                    waveform, rate, _, _ = postprocess_waveform(waveform, 24000, target_sample_rate=sample_rate,
+                                                                normalize=normalize, target_level=target_level)
+                    pcm = float32_to_int16(waveform[0, 0])
+                if shards is not None:
+                    clip, _ = await asyncio.to_thread(shards.append, pcm, item["prompt"], item["voice"],
+                                                      item["model"], rate)
+                    path = f"{output_dir}#{clip}"
+                else:
+                    path = os.path.join(output_dir, output_name(index, item, fmt))
+                    await asyncio.to_thread(write_audio, path, pcm, rate, fmt)
+                record.update(status="cached" if cached else "ok", path=path, samples=len(pcm),
+                              seconds=round(len(pcm) / rate, 3))
+            except Exception as error:
+                record["error"] = str(error)[:500]
+            done += 1
+            mark = "✅" if record["error"] is None else "❌"
+            print(f"{mark} [{done}/{total}] #{index} {item['voice']} {record['seconds']:.1f}s"
+                  + (f" {record['error'][:100]}" if record["error"] else ""))
+            return record
+
+        async def render_pack(indices):
+            if len(indices) == 1:
+                return [await render_one(indices[0], items[indices[0]])]
+            instruction = split_instruction(items[indices[0]]["prompt"])[0]
+            lines = [split_instruction(items[i]["prompt"])[1] for i in indices]
+            start = time.perf_counter()
+            try:
+                pcm, cached = await self.synthesize_async({**items[indices[0]],
+                                                           "prompt": packed_prompt(lines, instruction)})
+            except Exception as error:
+                return await asyncio.gather(*(render_one(i, items[i], error) for i in indices))
+            parts = split_packed(int16_to_float32(pcm), [len(line) for line in lines])
+            if parts is None:
+                print(f"📦 Packed request for {len(indices)} lines did not split cleanly, sending them one by one")
+                return await asyncio.gather(*(render_one(i, items[i]) for i in indices))
+            latency = round(time.perf_counter() - start, 3)
+            return await asyncio.gather(*(render_one(i, items[i], (float32_to_int16(part), cached, latency))
+                                          for i, part in zip(indices, parts)))
+
+        packs = plan_packs([((item["voice"], item["model"], item["temperature"],
+                              split_instruction(item["prompt"])[0].lower()), split_instruction(item["prompt"])[1])
+                            for item in items], max_lines=pack) if pack > 1 else [[i] for i in range(total)]
+        results = await asyncio.gather(*(render_pack(indices) for indices in packs))
+        records = sorted((record for result in results for record in result), key=lambda record: record["index"])
+        if pack > 1:
+            print(f"📦 {len(packs)} packed requests planned for {total} prompts")
+        await self.engine.close()
+        if shards is not None:
+            print(shards.status_line())
+            shards.close()
+        with open(os.path.join(output_dir, "manifest.jsonl"), "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return list(records)
+
+    def render(self, items, output_dir, **kwargs):
+        return asyncio.run(self.render_async(items, output_dir, **kwargs))
+
+    def status_line(self):
+        return self.pool.status_line()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gemini_tts", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", help="JSONL or CSV file of prompts")
+    parser.add_argument("-o", "--output", default="gemini_tts_renders", help="Output directory")
+    parser.add_argument("--format", default="wav", choices=FORMATS)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--voice", default="Puck", help="Default voice for items without one")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Default model for items without one")
+    parser.add_argument("--temperature", type=float, default=1.0)
+    parser.add_argument("--api-key", action="append", default=[], help="API key (repeat to pool several)")
+    parser.add_argument("--paid", action="store_true", help="Use paid-tier rate budgets and timeouts")
+    parser.add_argument("--billing-project-id", default="")
+    parser.add_argument("--pack", type=int, default=0, metavar="N",
+                        help="Merge up to N short lines per request and split the audio at the pauses (0: off)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--max-wait", type=float, default=600.0, help="Longest wait for rate budget (seconds)")
+    parser.add_argument("--sample-rate", type=int, default=24000)
+    parser.add_argument("--normalize", default="off", choices=NORMALIZE_MODES)
+    parser.add_argument("--target-level", type=float, default=-16.0)
+    parser.add_argument("--cache-dir", default=None, help="Audio cache (default: the node's audio_cache/)")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--config", default=None, help="config.json to read keys and limits from")
+    args = parser.parse_args(argv)
+
+    items = load_items(args.prompts, api_voice(args.voice), args.model, args.temperature)
+    synthesizer = BulkSynthesizer(api_keys=args.api_key, tier="paid" if args.paid else "free",
+                                  concurrency=args.concurrency, max_retries=args.retries, max_wait=args.max_wait,
+                                  cache_dir=False if args.no_cache else args.cache_dir,
+                                  config=load_config(args.config), billing_project_id=args.billing_project_id)
+    print(f"🎙️ Rendering {len(items)} prompts with {args.concurrency} concurrent requests -> {args.output}")
+    start = time.perf_counter()
+    records = synthesizer.render(items, args.output, fmt=args.format, sample_rate=args.sample_rate,
+                                 normalize=args.normalize, target_level=args.target_level, pack=args.pack)
+    stats = summarize(records, time.perf_counter() - start)
+    print(f"📊 {stats['succeeded']}/{stats['items']} done ({stats['cached']} cached, {stats['failed']} failed) "
+          f"in {stats['wall_seconds']}s | {stats['items_per_second']} items/s | {stats['audio_seconds']}s audio "
+          f"({stats['realtime_factor']}x realtime) | p50 {stats['p50_latency']}s p95 {stats['p95_latency']}s")
+    print(synthesizer.status_line())
+    print(f"📄 Manifest: {os.path.join(args.output, 'manifest.jsonl')}")
+    return 0 if not stats["failed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
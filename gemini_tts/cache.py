@@ -0,0 +1,136 @@
+# gemini_tts/cache.py
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import numpy as np
+
+
+class AudioCache:
+    """Content-addressed on-disk cache of raw 24 kHz int16 PCM responses.
+
+    An entry's mtime is when it was written and decides max_age_seconds
+    expiry; its atime is when it was last read and decides LRU order.
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3, max_age_seconds=30 * 86400):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    @staticmethod
+    def make_key(tts_model, payload):
+        """Hash the model name and the full generateContent payload"""
+        blob = json.dumps({"model": tts_model, "payload": payload}, sort_keys=True,
+                          separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pcm")
+
+    def get(self, key):
+        """Return a read-only memory-mapped int16 array for key, or None on a miss"""
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            expired = self.max_age_seconds and time.time() - stat.st_mtime > self.max_age_seconds
+            if stat.st_size < 2 or expired:
+                raise FileNotFoundError(path)
+            pcm = np.memmap(path, dtype=np.int16, mode="r")
+            # Mark the entry recently used without moving its write time, so it still expires on age
+            os.utime(path, (time.time(), stat.st_mtime))
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return pcm
+
+    def put(self, key, pcm):
+        """Atomically store raw PCM (bytes or an int16 array) under key, then evict if over budget"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += memoryview(pcm).nbytes
+            over_budget = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".pcm"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        with self._lock:
+            entries = sorted(self._entries())
+            now = time.time()
+            total = sum(size for _, _, size, _ in entries)
+            removed = 0
+
+            for _, mtime, size, path in entries:
+                expired = self.max_age_seconds and now - mtime > self.max_age_seconds
+                if not expired and total <= self.max_bytes:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                    removed += 1
+                except OSError:
+                    pass
+
+            self._total_bytes = total
+            return removed
+
+    def clear(self):
+        """Remove every cached entry and reset the counters"""
+        with self._lock:
+            for _, _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def status_line(self, hit):
+        stats = self.stats()
+        label = "HIT" if hit else "MISS"
+        return f"💾 Cache: {label} (hits {stats['hits']} / misses {stats['misses']})"
@@ -0,0 +1,184 @@
+# gemini_tts/chunking.py
+import re
+import numpy as np
+
+# Leading style instruction such as "Say:" or "Say cheerfully:" that must be
+# repeated on every chunk so each request keeps the same delivery.
+_INSTRUCTION_RE = re.compile(r"^\s*(say\b[^:\n]{0,80}:)\s*", re.IGNORECASE)
+# Whitespace after sentence-final punctuation, optionally followed by one closing quote/bracket.
+# CJK text has no space between sentences, so 。！？ (and a closing 」』）”’) also end one directly.
+_SENTENCE_RE = re.compile(r"(?<=[.!?…。！？][\"'”’)\]])\s+|(?<=[.!?…。！？])\s+"
+                          r"|(?<=[。！？][」』）”’])(?=\S)|(?<=[。！？])(?=[^\s。！？」』）”’])")
+# Clause punctuation where an over-long run without spaces is cut before falling back to a hard cut
+_CLAUSE_BREAKS = "，、；：,;:"
+
+
+def _is_wide(char):
+    """CJK and full-width characters, which are written without spaces between them"""
+    return ord(char) >= 0x2E80
+
+
+def split_instruction(prompt):
+    """Split a leading 'Say ...:' instruction from the text it applies to"""
+    match = _INSTRUCTION_RE.match(prompt)
+    if not match:
+        return "", prompt.strip()
+    return match.group(1) + " ", prompt[match.end():].strip()
+
+
+def _join(left, right):
+    if not left:
+        return right
+    return left + right if _is_wide(left[-1]) or _is_wide(right[0]) else f"{left} {right}"
+
+
+def _wrap_word(word, max_chars):
+    """Cut a run without spaces into pieces of at most max_chars, after clause punctuation when possible"""
+    pieces = []
+    while len(word) > max_chars:
+        cut = max(word.rfind(mark, 0, max_chars) for mark in _CLAUSE_BREAKS) + 1
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(word[:cut])
+        word = word[cut:]
+    if word:
+        pieces.append(word)
+    return pieces
+
+
+def _split_words(text, max_chars):
+    pieces, current = [], ""
+    for word in text.split():
+        for part in _wrap_word(word, max_chars):
+            if current and len(current) + 1 + len(part) > max_chars:
+                pieces.append(current)
+                current = part
+            else:
+                current = _join(current, part)
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text(text, max_chars=1500):
+    """Split text into as few chunks of at most max_chars as paragraph/sentence boundaries allow.
+
+    Whole paragraphs are packed greedily (kept apart by a blank line inside a
+    chunk); a paragraph that does not fit in one chunk is split into sentences
+    which are packed the same way. Sentences longer than max_chars fall back to
+    word boundaries, and words longer than max_chars (such as CJK text without
+    sentence punctuation) are cut at clause punctuation or hard-wrapped.
+    """
+    chunks, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            parts = [paragraph]
+        else:
+            parts = []
+            for sentence in _SENTENCE_RE.split(paragraph):
+                sentence = sentence.strip()
+                if sentence:
+                    parts.extend([sentence] if len(sentence) <= max_chars else _split_words(sentence, max_chars))
+
+        for i, part in enumerate(parts):
+            if not current:
+                current = part
+                continue
+            joined = f"{current}\n\n{part}" if i == 0 else _join(current, part)
+            if len(joined) > max_chars:
+                chunks.append(current)
+                current = part
+            else:
+                current = joined
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_sentences(text):
+    """Split text into sentences (paragraph breaks always end a sentence)"""
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        paragraph = " ".join(paragraph.split())
+        sentences.extend(s.strip() for s in _SENTENCE_RE.split(paragraph) if s.strip())
+    return sentences
+
+
+def trim_silence(samples, threshold=1e-3, margin=240):
+    """Return a view of samples without leading/trailing silence (keeps margin samples)"""
+    loud = np.flatnonzero(np.abs(samples) > threshold)
+    if loud.size == 0:
+        return samples[:0]
+    start = max(0, loud[0] - margin)
+    end = min(len(samples), loud[-1] + 1 + margin)
+    return samples[start:end]
+
+
+def stitch_pcm(segments, sample_rate=24000, pause_ms=250, crossfade_ms=20, trim=True):
+    """Join float32 PCM segments into one array with controlled pauses and crossfades.
+
+    With pause_ms > 0 the inner edges of each segment are faded over
+    crossfade_ms and separated by exactly pause_ms of silence. With
+    pause_ms == 0 adjacent segments are overlap-added with a linear crossfade.
+    The output is written into a single preallocated array.
+    """
+    if trim:
+        segments = [trim_silence(s) for s in segments]
+    segments = [s for s in segments if len(s)]
+    if not segments:
+        return np.zeros(0, dtype=np.float32)
+
+    pause = int(sample_rate * pause_ms / 1000)
+    fade = int(sample_rate * crossfade_ms / 1000)
+    overlaps = []
+    for left, right in zip(segments, segments[1:]):
+        overlaps.append(0 if pause else min(fade, len(left), len(right)))
+
+    total = sum(len(s) for s in segments) + pause * (len(segments) - 1) - sum(overlaps)
+    out = np.zeros(total, dtype=np.float32)
+
+    pos = 0
+    for i, segment in enumerate(segments):
+        segment = segment.astype(np.float32, copy=True)
+        if pause and fade:
+            n = min(fade, len(segment))
+            ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+            if i > 0:
+                segment[:n] *= ramp
+            if i < len(segments) - 1:
+                segment[-n:] *= ramp[::-1]
+
+        overlap = overlaps[i - 1] if i > 0 else 0
+        if overlap:
+            ramp = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+            out[pos:pos + overlap] *= ramp[::-1]
+            segment[:overlap] *= ramp
+            out[pos:pos + overlap] += segment[:overlap]
+            out[pos + overlap:pos + len(segment)] = segment[overlap:]
+        else:
+            out[pos:pos + len(segment)] = segment
+
+        pos += len(segment)
+        if i < len(segments) - 1:
+            pos += pause - overlaps[i]
+    return out
+
+
+def stitch_offsets(lengths, sample_rate=24000, pause_ms=250, crossfade_ms=20):
+    """Start sample of each segment in stitch_pcm(..., trim=False) output (empty segments skipped)"""
+    pause = int(sample_rate * pause_ms / 1000)
+    fade = int(sample_rate * crossfade_ms / 1000)
+    offsets, pos, previous = [], 0, None
+    for length in lengths:
+        if not length:
+            offsets.append(pos)
+            continue
+        if previous is not None:
+            pos += pause if pause else -min(fade, previous, length)
+        offsets.append(pos)
+        pos += length
+        previous = length
+    return offsets
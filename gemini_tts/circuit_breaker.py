@@ -0,0 +1,136 @@
+# gemini_tts/circuit_breaker.py
+import time
+import hashlib
+import threading
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+def key_fingerprint(api_key):
+    """Short stable id for an API key so breaker state never stores the key itself"""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CLOSED
+        self.opened_until = 0.0
+        self.cooldown = 0.0
+        self.last_error = ""
+        self.probe_started = None
+        self.trips = 0
+
+
+class CircuitBreaker:
+    """Per-(model, API key) breaker that remembers quota and permission failures.
+
+    After a 429/RESOURCE_EXHAUSTED or 403 the circuit opens for a cool-down
+    matching the quota window (the server's retry delay when given, a longer
+    one for daily quotas). While open, allow() returns False so callers can
+    skip the round trip. Once the cool-down passes a single half-open probe
+    is let through; success closes the circuit, failure re-opens it with a
+    doubled cool-down. Callers run release_probe() in a finally around every
+    request, so a probe that ends any other way (5xx, timeout, local pacing
+    error) is treated as inconclusive and the next caller may probe.
+    """
+
+    def __init__(self, minute_cooldown=60.0, daily_cooldown=3600.0, permission_cooldown=300.0,
+                 max_cooldown=6 * 3600.0, probe_timeout=120.0):
+        self.minute_cooldown = minute_cooldown
+        self.daily_cooldown = daily_cooldown
+        self.permission_cooldown = permission_cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, model, api_key):
+        key = (model, key_fingerprint(api_key))
+        if key not in self._circuits:
+            self._circuits[key] = _Circuit()
+        return self._circuits[key]
+
+    def allow(self, model, api_key):
+        """Return True if a request to model may be sent now"""
+        with self._lock:
+            circuit = self._circuit(model, api_key)
+            now = time.monotonic()
+            if circuit.state == CLOSED:
+                return True
+            if circuit.state == OPEN and now < circuit.opened_until:
+                return False
+            # Cool-down elapsed: let exactly one probe through at a time
+            if circuit.probe_started is not None and now - circuit.probe_started < self.probe_timeout:
+                return False
+            circuit.state = HALF_OPEN
+            circuit.probe_started = now
+            return True
+
+    def record_success(self, model, api_key):
+        with self._lock:
+            circuit = self._circuit(model, api_key)
+            if circuit.state != CLOSED:
+                print(f"⚡ Circuit for {model} closed again after successful probe")
+            circuit.state = CLOSED
+            circuit.cooldown = 0.0
+            circuit.trips = 0
+            circuit.probe_started = None
+
+    def release_probe(self, model, api_key):
+        """End an in-flight half-open probe that recorded no outcome; a no-op otherwise"""
+        with self._lock:
+            circuit = self._circuit(model, api_key)
+            if circuit.state == HALF_OPEN and circuit.probe_started is not None:
+                circuit.probe_started = None
+                print(f"⚡ Probe for {model} was inconclusive, circuit stays half-open")
+
+    def record_failure(self, model, api_key, status_code, error_text="", retry_after=None):
+        """Open the circuit after a quota (429) or permission (403) failure"""
+        if status_code == 403:
+            cooldown = self.permission_cooldown
+        elif "PerDay" in error_text or "per day" in error_text.lower():
+            cooldown = self.daily_cooldown
+        else:
+            cooldown = retry_after or self.minute_cooldown
+
+        with self._lock:
+            circuit = self._circuit(model, api_key)
+            if circuit.state == HALF_OPEN:
+                # Probe failed: back off harder than the previous cool-down
+                cooldown = max(cooldown, min(self.max_cooldown, circuit.cooldown * 2))
+            circuit.state = OPEN
+            circuit.cooldown = cooldown
+            circuit.opened_until = time.monotonic() + cooldown
+            circuit.last_error = error_text
+            circuit.probe_started = None
+            circuit.trips += 1
+        print(f"⚡ Circuit for {model} opened for {cooldown:.0f}s ({status_code})")
+
+    def open_error(self, model, api_key):
+        """Describe an open circuit, keeping the original error text for classification"""
+        with self._lock:
+            circuit = self._circuit(model, api_key)
+            remaining = max(0.0, circuit.opened_until - time.monotonic())
+            return f"Circuit open for {model} ({remaining:.0f}s left): {circuit.last_error}"
+
+    def snapshot(self, api_key):
+        """Return {model: (state, seconds_until_probe)} for every circuit of api_key"""
+        fingerprint = key_fingerprint(api_key)
+        now = time.monotonic()
+        with self._lock:
+            return {
+                model: (circuit.state, max(0.0, circuit.opened_until - now))
+                for (model, fp), circuit in self._circuits.items() if fp == fingerprint
+            }
+
+    def status_line(self, api_key):
+        parts = []
+        for model, (state, remaining) in sorted(self.snapshot(api_key).items()):
+            short = "Pro" if "pro" in model else "Flash" if "flash" in model else model
+            if state == OPEN:
+                parts.append(f"{short} OPEN ({remaining:.0f}s)")
+            else:
+                parts.append(f"{short} {state}")
+        return "⚡ Circuits: " + (", ".join(parts) if parts else "all closed")
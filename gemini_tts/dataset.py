@@ -0,0 +1,227 @@
+# gemini_tts/dataset.py
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+
+SHARD_BYTES = 1 << 28
+INDEX_FILE = "index.bin"
+TEXTS_FILE = "texts.txt"
+META_FILE = "dataset.json"
+
+# One fixed-size row per clip; offsets and lengths are in samples, text_* in bytes of texts.txt
+INDEX_DTYPE = np.dtype([
+    ("shard", "<u4"), ("offset", "<u8"), ("length", "<u8"), ("sample_rate", "<u4"), ("prompt_hash", "<u8"),
+    ("voice", "S24"), ("model", "S40"), ("text_offset", "<u8"), ("text_length", "<u4"),
+])
+
+
+def prompt_hash(prompt):
+    """64-bit hash of a prompt's text, for finding clips without storing the text in the index"""
+    return int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "little")
+
+
+def shard_path(root, shard):
+    return os.path.join(root, f"shard_{shard:05d}.pcm")
+
+
+def _preallocate(f, size):
+    """Reserve size bytes for an open shard file (real blocks where the OS supports it, else sparse)"""
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError:
+            pass
+    f.truncate(size)
+
+
+class ShardWriter:
+    """Append int16 mono clips into large preallocated shard files plus a compact index.
+
+    Each shard is reserved at shard_bytes up front and filled sequentially;
+    a clip that does not fit starts the next shard. The PCM and the prompt
+    text are written before the clip's index row, so after a crash the index
+    only lists complete clips and writing resumes right after the last one.
+    With dedupe, a (prompt, voice, model, sample rate) already in the index
+    is not written again. One writer per directory at a time. close() gives
+    back the unreserved tail of the current shard; a closed writer reopens its
+    files on the next append.
+    """
+
+    def __init__(self, root, shard_bytes=SHARD_BYTES):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        meta_path = os.path.join(root, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            self.shard_bytes = int(meta["shard_bytes"])
+        else:
+            self.shard_bytes = int(shard_bytes)
+            with open(meta_path, "w") as f:
+                json.dump({"version": 1, "format": "pcm_s16le", "channels": 1, "shard_bytes": self.shard_bytes,
+                           "index_dtype": INDEX_DTYPE.descr}, f)
+        self._lock = threading.Lock()
+
+        index_path = os.path.join(root, INDEX_FILE)
+        rows = np.fromfile(index_path, dtype=INDEX_DTYPE) if os.path.exists(index_path) else np.zeros(0, INDEX_DTYPE)
+        if os.path.exists(index_path) and os.path.getsize(index_path) % INDEX_DTYPE.itemsize:
+            # A torn last row from a crash: drop it
+            with open(index_path, "r+b") as f:
+                f.truncate(len(rows) * INDEX_DTYPE.itemsize)
+        self.clips = len(rows)
+        self.samples = int(rows["length"].sum()) if len(rows) else 0
+        self._seen = {(int(row["prompt_hash"]), bytes(row["voice"]), bytes(row["model"]), int(row["sample_rate"])): i
+                      for i, row in enumerate(rows)}
+        if len(rows):
+            self._shard = int(rows["shard"][-1])
+            self._offset = int(rows["offset"][-1] + rows["length"][-1])
+        else:
+            self._shard, self._offset = 0, 0
+        self._text_offset = int(rows["text_offset"][-1] + rows["text_length"][-1]) if len(rows) else 0
+
+        self._index = None
+        self._shard_file = None
+        self._capacity = 0
+        self._open_files()
+
+    def _open_files(self):
+        texts_path = os.path.join(self.root, TEXTS_FILE)
+        self._index = open(os.path.join(self.root, INDEX_FILE), "ab")
+        self._texts = open(texts_path, "r+b" if os.path.exists(texts_path) else "wb")
+        self._texts.truncate(self._text_offset)
+        self._texts.seek(self._text_offset)
+        self._open_shard(self._shard)
+
+    def _open_shard(self, shard, min_bytes=0):
+        if self._shard_file is not None:
+            self._shard_file.close()
+        path = shard_path(self.root, shard)
+        self._shard_file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        self._capacity = max(self.shard_bytes, min_bytes, os.path.getsize(path))
+        if os.path.getsize(path) < self._capacity:
+            _preallocate(self._shard_file, self._capacity)
+        self._shard = shard
+
+    def append(self, pcm, prompt, voice, model, sample_rate=24000, dedupe=True):
+        """Store one clip; returns (clip index, True if it was written or False if already present)"""
+        pcm = np.ascontiguousarray(pcm, dtype="<i2")
+        text = prompt.encode("utf-8")
+        key = (prompt_hash(prompt), str(voice).encode("utf-8")[:24], str(model).encode("utf-8")[:40],
+               int(sample_rate))
+        with self._lock:
+            if dedupe and key in self._seen:
+                return self._seen[key], False
+            if self._index is None:
+                self._open_files()
+            if (self._offset + len(pcm)) * 2 > self._capacity:
+                self._open_shard(self._shard + 1, pcm.nbytes)
+                self._offset = 0
+            self._shard_file.seek(self._offset * 2)
+            self._shard_file.write(memoryview(pcm).cast("B"))
+            self._shard_file.flush()
+            self._texts.write(text)
+            self._texts.flush()
+
+            row = np.zeros(1, dtype=INDEX_DTYPE)
+            row[0] = (self._shard, self._offset, len(pcm), sample_rate, key[0], key[1], key[2],
+                      self._text_offset, len(text))
+            self._index.write(row.tobytes())
+            self._index.flush()
+
+            clip = self.clips
+            self._seen[key] = clip
+            self.clips += 1
+            self.samples += len(pcm)
+            self._offset += len(pcm)
+            self._text_offset += len(text)
+            return clip, True
+
+    def status_line(self):
+        with self._lock:
+            used = (self._shard * self.shard_bytes + self._offset * 2) / 2 ** 20
+            return f"💾 Dataset {self.root}: {self.clips} clips in {self._shard + 1} shards ({used:.0f} MB)"
+
+    def close(self):
+        """Release the unused tail of the current shard and close the files (safe to call again)"""
+        with self._lock:
+            if self._index is None:
+                return
+            if self._shard_file is not None:
+                self._shard_file.truncate(self._offset * 2)
+                self._shard_file.close()
+                self._shard_file = None
+            self._index.close()
+            self._texts.close()
+            self._index = None
+
+
+class ShardedDataset:
+    """Read a ShardWriter directory; clips come back as zero-copy memory-mapped int16 views.
+
+    The index itself is memory-mapped, so opening a dataset of any size
+    costs a few page faults, and clip audio is only paged in when touched.
+    Call refresh() to see clips appended since the dataset was opened.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._shards = {}
+        self.refresh()
+
+    def refresh(self):
+        index_path = os.path.join(self.root, INDEX_FILE)
+        count = os.path.getsize(index_path) // INDEX_DTYPE.itemsize if os.path.exists(index_path) else 0
+        self.index = (np.memmap(index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,)) if count
+                      else np.zeros(0, dtype=INDEX_DTYPE))
+        texts_path = os.path.join(self.root, TEXTS_FILE)
+        self._texts = (np.memmap(texts_path, dtype=np.uint8, mode="r") if count and os.path.getsize(texts_path)
+                       else np.zeros(0, dtype=np.uint8))
+        # Shards may have grown since they were mapped
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _shard(self, shard):
+        pcm = self._shards.get(shard)
+        if pcm is None:
+            pcm = self._shards[shard] = np.memmap(shard_path(self.root, shard), dtype="<i2", mode="r")
+        return pcm
+
+    def __getitem__(self, clip):
+        """int16 samples of a clip, as a view into its shard"""
+        row = self.index[clip]
+        offset = int(row["offset"])
+        return self._shard(int(row["shard"]))[offset:offset + int(row["length"])]
+
+    def __iter__(self):
+        for clip in range(len(self)):
+            yield self[clip]
+
+    def text(self, clip):
+        row = self.index[clip]
+        start = int(row["text_offset"])
+        return bytes(self._texts[start:start + int(row["text_length"])]).decode("utf-8")
+
+    def info(self, clip):
+        row = self.index[clip]
+        return {"clip": clip, "text": self.text(clip), "voice": row["voice"].decode("utf-8", "replace"),
+                "model": row["model"].decode("utf-8", "replace"), "sample_rate": int(row["sample_rate"]),
+                "samples": int(row["length"]), "seconds": int(row["length"]) / int(row["sample_rate"])}
+
+    def find(self, prompt, voice=None, model=None):
+        """Clip indices for a prompt, optionally narrowed to a voice and model"""
+        mask = self.index["prompt_hash"] == prompt_hash(prompt)
+        if voice is not None:
+            mask &= self.index["voice"] == str(voice).encode("utf-8")[:24]
+        if model is not None:
+            mask &= self.index["model"] == str(model).encode("utf-8")[:40]
+        return np.flatnonzero(mask).tolist()
+
+    def total_seconds(self):
+        if not len(self):
+            return 0.0
+        return float((self.index["length"] / self.index["sample_rate"]).sum())
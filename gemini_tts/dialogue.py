@@ -0,0 +1,109 @@
+# gemini_tts/dialogue.py
+import re
+import json
+from .chunking import split_text
+
+# multiSpeakerVoiceConfig currently accepts exactly two speakers per request
+MAX_SPEAKERS_PER_REQUEST = 2
+
+_TURN_RE = re.compile(r"^\s*([^:\n]{1,40}?)\s*:\s*(.*)$")
+_MAPPING_RE = re.compile(r"^\s*([^=:\n]{1,40}?)\s*[=:]\s*(.+?)\s*$")
+
+
+def parse_speaker_voices(text):
+    """Parse a speaker→voice mapping from a JSON object or "Name = Voice" lines (order preserved)"""
+    stripped = text.strip()
+    if not stripped:
+        return {}
+    if stripped.startswith("{"):
+        mapping = json.loads(stripped)
+        if not isinstance(mapping, dict):
+            raise ValueError("Speaker voices must be a JSON object")
+        return {str(k).strip(): str(v).strip() for k, v in mapping.items()}
+
+    mapping = {}
+    for line in stripped.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _MAPPING_RE.match(line)
+        if not match:
+            raise ValueError(f"Expected 'Speaker = Voice', got: {line}")
+        mapping[match.group(1)] = match.group(2)
+    return mapping
+
+
+def parse_dialogue(script, speakers):
+    """Split a "Speaker: text" script into (instruction, [(speaker, text), ...]).
+
+    Only names present in speakers start a new turn, so colons inside a line
+    do not split it. Untagged lines continue the previous turn; lines before
+    the first turn form the style instruction.
+    """
+    preamble, turns = [], []
+    for line in script.splitlines():
+        if not line.strip():
+            continue
+        match = _TURN_RE.match(line)
+        if match and match.group(1) in speakers:
+            turns.append([match.group(1), match.group(2).strip()])
+        elif turns:
+            turns[-1][1] = f"{turns[-1][1]} {line.strip()}".strip()
+        else:
+            preamble.append(line.strip())
+    return " ".join(preamble), [(speaker, text) for speaker, text in turns if text]
+
+
+def plan_dialogue_requests(turns, max_chars=3000, max_speakers=MAX_SPEAKERS_PER_REQUEST):
+    """Pack consecutive turns into as few requests as possible.
+
+    A request holds at most max_speakers distinct speakers and about
+    max_chars characters of tagged script; turns longer than max_chars are
+    split at sentence boundaries into several turns by the same speaker.
+    """
+    groups, current, speakers, size = [], [], set(), 0
+    for speaker, text in turns:
+        for piece in split_text(text, max(1, max_chars - len(speaker) - 3)):
+            line_len = len(speaker) + len(piece) + 3
+            new_speaker = speaker not in speakers
+            if current and (size + line_len > max_chars or (new_speaker and len(speakers) >= max_speakers)):
+                groups.append(current)
+                current, speakers, size = [], set(), 0
+            current.append((speaker, piece))
+            speakers.add(speaker)
+            size += line_len
+    if current:
+        groups.append(current)
+    return groups
+
+
+def group_speakers(group):
+    """Distinct speakers of a request in order of first appearance"""
+    seen = []
+    for speaker, _ in group:
+        if speaker not in seen:
+            seen.append(speaker)
+    return seen
+
+
+def dialogue_prompt(group, instruction=""):
+    """Prompt text for one request: tagged lines for two speakers, plain text for one"""
+    speakers = group_speakers(group)
+    if len(speakers) == 1:
+        body = " ".join(text for _, text in group)
+        return f"{instruction}\n{body}" if instruction else body
+    header = instruction or f"TTS the following conversation between {' and '.join(speakers)}:"
+    return header + "\n" + "\n".join(f"{speaker}: {text}" for speaker, text in group)
+
+
+def estimate_turn_times(group, start_seconds, duration_seconds):
+    """Spread a request's audio over its turns in proportion to their length (estimates)"""
+    weights = [max(1, len(text)) for _, text in group]
+    total = float(sum(weights))
+    times, position = [], start_seconds
+    for (speaker, text), weight in zip(group, weights):
+        length = duration_seconds * weight / total
+        times.append({"speaker": speaker, "start": round(position, 3),
+                      "end": round(position + length, 3), "text": text})
+        position += length
+    return times
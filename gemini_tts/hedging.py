@@ -0,0 +1,156 @@
+# gemini_tts/hedging.py
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+FLASH_MODEL = "gemini-2.5-flash-preview-tts"
+
+
+class HedgePolicy:
+    """Decide when a slow request gets a backup copy, within a hedge budget.
+
+    Response times of recent requests are kept per model; a request still
+    running after the chosen percentile of that history is hedged. Every
+    request earns max_ratio of a hedge credit (up to burst) and a hedge
+    spends a whole one, so backups stay at most max_ratio of the traffic.
+    """
+
+    def __init__(self, percentile=95.0, max_ratio=0.05, min_samples=20, window=200, min_delay=1.0,
+                 burst=3.0, backup="same"):
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.burst = burst
+        self.backup = backup
+        self._latencies = {}
+        self._credit = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.backup_wins = 0
+        self.budget_denied = 0
+
+    def backup_model(self, model):
+        """Model the backup request goes to: the same one, or Flash when backup is "flash" """
+        return FLASH_MODEL if self.backup == "flash" else model
+
+    def record(self, model, seconds):
+        with self._lock:
+            history = self._latencies.setdefault(model, deque(maxlen=self.window))
+            history.append(seconds)
+
+    def delay(self, model):
+        """Seconds to wait before hedging a request to model; None until there is enough history"""
+        with self._lock:
+            history = self._latencies.get(model)
+            if history is None or len(history) < self.min_samples:
+                return None
+            samples = np.fromiter(history, dtype=np.float64)
+        return max(self.min_delay, float(np.percentile(samples, self.percentile)))
+
+    def start_request(self):
+        with self._lock:
+            self.requests += 1
+            self._credit = min(self.burst, self._credit + self.max_ratio)
+
+    def try_hedge(self):
+        """Spend a hedge credit; False when the budget is used up"""
+        with self._lock:
+            if self._credit < 1.0:
+                self.budget_denied += 1
+                return False
+            self._credit -= 1.0
+            self.hedges += 1
+            return True
+
+    def record_win(self, backup_won):
+        if backup_won:
+            with self._lock:
+                self.backup_wins += 1
+
+    def status_line(self):
+        with self._lock:
+            rate = self.hedges / self.requests if self.requests else 0.0
+            return (f"🏁 Hedging: {self.hedges}/{self.requests} requests hedged ({rate:.1%}), "
+                    f"backup won {self.backup_wins}, {self.budget_denied} over budget")
+
+
+def run_hedged(primary, backup, policy, model, sent=None):
+    """Run primary(); if it outlives the policy's delay and the budget allows, race backup() against it.
+
+    Returns (result, hedge_delay, backup_won) where hedge_delay is None when no
+    backup was sent. The first success wins; if one side fails the other is
+    awaited, and if both fail the primary's error is raised. A blocking HTTP
+    call cannot be interrupted, so the losing thread is left to finish on its
+    own and its result is dropped. The delay is measured against HTTP times,
+    so when sent (a threading.Event set as the request goes out) is given,
+    the clock only starts then, not while primary waits for rate budget.
+    """
+    policy.start_request()
+    delay = policy.delay(model)
+    if delay is None:
+        return primary(), None, False
+
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gemini-tts-hedge")
+    try:
+        first = executor.submit(primary)
+        if sent is not None:
+            first.add_done_callback(lambda _: sent.set())
+            sent.wait()
+        done, _ = wait([first], timeout=delay)
+        if done or not policy.try_hedge():
+            return first.result(), None, False
+
+        print(f"🏁 {model} slower than p{policy.percentile:g} ({delay:.1f}s), sending a backup request")
+        second = executor.submit(backup)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    backup_won = future is second
+                    policy.record_win(backup_won)
+                    return future.result(), delay, backup_won
+        return first.result(), delay, False
+    finally:
+        executor.shutdown(wait=False)
+
+
+async def run_hedged_async(primary, backup, policy, model, sent=None):
+    """run_hedged for coroutine functions (sent is an asyncio.Event); the losing request's task is cancelled"""
+    policy.start_request()
+    delay = policy.delay(model)
+    if delay is None:
+        return await primary(), None, False
+
+    tasks = [asyncio.ensure_future(primary())]
+    try:
+        if sent is not None:
+            tasks[0].add_done_callback(lambda _: sent.set())
+            await sent.wait()
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not policy.try_hedge():
+            return await tasks[0], None, False
+
+        print(f"🏁 {model} slower than p{policy.percentile:g} ({delay:.1f}s), sending a backup request")
+        tasks.append(asyncio.ensure_future(backup()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    backup_won = task is tasks[1]
+                    policy.record_win(backup_won)
+                    return task.result(), delay, backup_won
+        return tasks[0].result(), delay, False
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,120 @@
+# gemini_tts/http_client.py
+import threading
+
+API_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+# Read timeout per tier when http_read_timeout is not configured (paid requests may queue longer)
+DEFAULT_READ_TIMEOUTS = {"free": 30.0, "paid": 60.0}
+
+
+def build_tts_payload(prompt, voice, temperature):
+    """Build the generateContent request body; voice is an API voice name or a {speaker: voice} dict"""
+    if isinstance(voice, dict):
+        speech_config = {
+            "multiSpeakerVoiceConfig": {
+                "speakerVoiceConfigs": [
+                    {"speaker": speaker, "voiceConfig": {"prebuiltVoiceConfig": {"voiceName": name}}}
+                    for speaker, name in voice.items()
+                ]
+            }
+        }
+    else:
+        speech_config = {
+            "voiceConfig": {
+                "prebuiltVoiceConfig": {
+                    "voiceName": voice
+                }
+            }
+        }
+    return {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": temperature,
+            "responseModalities": ["AUDIO"],
+            "speechConfig": speech_config
+        }
+    }
+
+
+class GeminiHTTPClient:
+    """Keep-alive client for the Generative Language REST API, shared across threads.
+
+    One requests.Session is created lazily and reused for every call, so the
+    TCP+TLS handshake is paid once per pooled connection instead of once per
+    request. Per-call state (headers, params, timeout) is passed explicitly
+    and never stored on the session, which keeps concurrent use safe.
+    read_timeout applies to every tier; None keeps DEFAULT_READ_TIMEOUTS.
+    """
+
+    def __init__(self, pool_size=10, connect_timeout=10.0, base_url=API_BASE_URL, read_timeout=None):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.base_url = base_url.rstrip("/")
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    # Deferred so importing the node package does not pay for requests/urllib3
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size,
+                                          pool_block=False, max_retries=0)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({
+                        "User-Agent": "ComfyUI-Gemini-TTS/1.0",
+                        "Accept-Encoding": "gzip, deflate",
+                        "Connection": "keep-alive",
+                    })
+                    self._session = session
+        return self._session
+
+    def read_timeout_for(self, tier):
+        if self.read_timeout:
+            return self.read_timeout
+        return DEFAULT_READ_TIMEOUTS.get(tier, DEFAULT_READ_TIMEOUTS["free"])
+
+    def timeouts(self, tier="free"):
+        """(connect, read) timeout for a request on tier"""
+        return self.connect_timeout, self.read_timeout_for(tier)
+
+    def model_url(self, tts_model, method="generateContent"):
+        return f"{self.base_url}/models/{tts_model}:{method}"
+
+    def generate_content(self, tts_model, api_key, payload, timeout=None, stream=False):
+        """POST payload to models/{tts_model}:generateContent over the pooled session.
+
+        timeout is a (connect, read) pair, see timeouts(). With stream=True the
+        body is left unread for parse_inline_response.
+        """
+        return self.session.post(
+            self.model_url(tts_model),
+            params={"key": api_key},
+            json=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=timeout or self.timeouts(),
+            stream=stream,
+        )
+
+    def stream_generate_content(self, tts_model, api_key, payload, timeout=None):
+        """POST payload to models/{tts_model}:streamGenerateContent as server-sent events"""
+        return self.session.post(
+            self.model_url(tts_model, "streamGenerateContent"),
+            params={"key": api_key, "alt": "sse"},
+            json=payload,
+            headers={"Content-Type": "application/json", "Accept": "text/event-stream"},
+            timeout=timeout or self.timeouts(),
+            stream=True,
+        )
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
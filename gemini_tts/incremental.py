@@ -0,0 +1,67 @@
+# gemini_tts/incremental.py
+import difflib
+import unicodedata
+from .chunking import stitch_pcm, stitch_offsets
+
+_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "‘": "'", "’": "'", "‚": "'"})
+
+
+def normalize_sentence(sentence):
+    """Canonical form used for cache keys: NFC, straight quotes, single spaces"""
+    sentence = unicodedata.normalize("NFC", sentence).translate(_QUOTES)
+    return " ".join(sentence.split())
+
+
+class ScriptRender:
+    """A stitched script render: one key per sentence and where its audio sits in waveform"""
+
+    def __init__(self, keys, offsets, lengths, waveform):
+        self.keys = keys
+        self.offsets = offsets
+        self.lengths = lengths
+        self.waveform = waveform
+
+
+def plan_resynthesis(previous, keys):
+    """Diff the new sentence keys against the previous render.
+
+    Returns (opcodes, needed) where opcodes come from difflib.SequenceMatcher
+    and needed lists the indices into keys whose audio must be produced.
+    """
+    if previous is None:
+        opcodes = [("insert", 0, 0, 0, len(keys))] if keys else []
+    else:
+        opcodes = difflib.SequenceMatcher(None, previous.keys, keys, autojunk=False).get_opcodes()
+    needed = [j for tag, _, _, j1, j2 in opcodes if tag in ("replace", "insert") for j in range(j1, j2)]
+    return opcodes, needed
+
+
+def splice_render(previous, keys, opcodes, new_audio, sample_rate=24000, pause_ms=250, crossfade_ms=20):
+    """Build the new render from unchanged spans of the previous waveform plus new sentence audio.
+
+    Each run of unchanged sentences is copied as one block (its inner pauses
+    intact); blocks and regenerated sentences are joined by stitch_pcm, which
+    fades every boundary so splices do not click.
+    """
+    pieces, layouts = [], []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            start = previous.offsets[i1]
+            end = previous.offsets[i2 - 1] + previous.lengths[i2 - 1]
+            pieces.append(previous.waveform[start:end])
+            layouts.append([(previous.offsets[i] - start, previous.lengths[i]) for i in range(i1, i2)])
+        elif tag in ("replace", "insert"):
+            for j in range(j1, j2):
+                pieces.append(new_audio[j])
+                layouts.append([(0, len(new_audio[j]))])
+
+    waveform = stitch_pcm(pieces, sample_rate=sample_rate, pause_ms=pause_ms,
+                          crossfade_ms=crossfade_ms, trim=False)
+    piece_offsets = stitch_offsets([len(p) for p in pieces], sample_rate=sample_rate,
+                                   pause_ms=pause_ms, crossfade_ms=crossfade_ms)
+    offsets, lengths = [], []
+    for piece_offset, layout in zip(piece_offsets, layouts):
+        for relative, length in layout:
+            offsets.append(piece_offset + relative)
+            lengths.append(length)
+    return ScriptRender(list(keys), offsets, lengths, waveform)
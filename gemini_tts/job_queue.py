@@ -0,0 +1,331 @@
+# gemini_tts/job_queue.py
+import os
+import re
+import json
+import time
+import wave
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from .rate_limiter import LOCAL_BUDGET_ERROR
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    job TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    prompt TEXT NOT NULL,
+    model TEXT NOT NULL,
+    voice TEXT NOT NULL,
+    temperature REAL NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    output_path TEXT,
+    samples INTEGER,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (job, item_key)
+);
+CREATE INDEX IF NOT EXISTS items_ready ON items (status, not_before);
+"""
+
+_COLUMNS = ["id", "job", "item_key", "idx", "prompt", "model", "voice", "temperature", "options", "status",
+            "attempts", "not_before", "lease_until", "output_path", "samples", "error"]
+
+
+def item_key(prompt, model, voice, temperature, options=None):
+    """Identity of a queued item: re-submitting the same item never synthesizes it twice"""
+    blob = json.dumps([prompt, model, voice, float(temperature), options or {}], sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def write_wav(path, pcm, sample_rate=24000):
+    """Atomically write int16 mono PCM as a WAV file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        with wave.open(tmp_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes(pcm.astype("<i2").tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class JobQueue:
+    """SQLite-backed queue of TTS items that survives restarts.
+
+    Items are keyed on (job, prompt/model/voice/temperature/options), so
+    re-submitting a job only adds what is new. Workers claim items with a
+    lease; a worker that dies leaves its item to be re-claimed once the lease
+    expires. not_before holds wall-clock times so quota deferrals outlive the
+    process.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _row(self, row):
+        item = dict(zip(_COLUMNS, row))
+        item["options"] = json.loads(item["options"])
+        return item
+
+    def add_items(self, job, items):
+        """Queue (prompt, model, voice, temperature, options) tuples; returns how many were new"""
+        now = time.time()
+        added = 0
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for idx, (prompt, model, voice, temperature, options) in enumerate(items):
+                    key = item_key(prompt, model, voice, temperature, options)
+                    existing = self._db.execute("SELECT id FROM items WHERE job = ? AND item_key = ?",
+                                                (job, key)).fetchone()
+                    if existing:
+                        self._db.execute("UPDATE items SET idx = ? WHERE id = ?", (idx, existing[0]))
+                        continue
+                    self._db.execute(
+                        "INSERT INTO items (job, item_key, idx, prompt, model, voice, temperature, options, "
+                        "created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (job, key, idx, prompt, model, voice, float(temperature),
+                         json.dumps(options or {}, sort_keys=True), now + idx * 1e-6, now))
+                    added += 1
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return added
+
+    def claim(self, lease_seconds=600.0):
+        """Lease the next ready item (pending and due, or running with an expired lease)"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM items "
+                    "WHERE (status = ? AND not_before <= ?) OR (status = ? AND lease_until < ?) "
+                    "ORDER BY created LIMIT 1", (PENDING, now, RUNNING, now)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE items SET status = ?, lease_until = ?, updated = ? WHERE id = ?",
+                                     (RUNNING, now + lease_seconds, now, row[0]))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return self._row(row) if row is not None else None
+
+    def _update(self, item_id, **fields):
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE items SET {assignments} WHERE id = ?", (*fields.values(), item_id))
+
+    def complete(self, item_id, output_path, samples):
+        self._update(item_id, status=DONE, output_path=output_path, samples=int(samples), error=None,
+                     lease_until=0)
+
+    def defer(self, item_id, seconds, error, attempts):
+        """Put an item back in the queue, not to be claimed for seconds"""
+        self._update(item_id, status=PENDING, not_before=time.time() + seconds, error=error[:500],
+                     attempts=attempts, lease_until=0)
+
+    def fail(self, item_id, error, attempts):
+        self._update(item_id, status=FAILED, error=error[:500], attempts=attempts, lease_until=0)
+
+    def retry_failed(self, job):
+        """Move a job's failed items back to pending; returns how many"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE items SET status = ?, attempts = 0, not_before = 0, updated = ? WHERE job = ? AND status = ?",
+                (PENDING, time.time(), job, FAILED))
+            return cursor.rowcount
+
+    def next_due(self):
+        """Seconds until the earliest pending item is due (0 if one is ready, None if nothing is pending)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(CASE WHEN status = ? THEN not_before ELSE lease_until END) FROM items "
+                "WHERE status IN (?, ?)", (PENDING, PENDING, RUNNING)).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def counts(self, job=None):
+        query = "SELECT status, COUNT(*) FROM items"
+        args = ()
+        if job is not None:
+            query += " WHERE job = ?"
+            args = (job,)
+        with self._lock:
+            rows = self._db.execute(query + " GROUP BY status", args).fetchall()
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def items(self, job):
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM items WHERE job = ? ORDER BY idx",
+                                    (job,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def status_line(self, job):
+        counts = self.counts(job)
+        total = sum(counts.values())
+        line = f"🗂️ Job '{job}': {counts[DONE]}/{total} done, {counts[PENDING] + counts[RUNNING]} queued, {counts[FAILED]} failed"
+        due = self.next_due()
+        if counts[PENDING] and due:
+            line += f" | next item in {due:.0f}s"
+        return line
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def quota_delay(error_str, default=60.0):
+    """Seconds to wait before retrying a rate-limited item, from the error text when it says"""
+    patterns = (r"retryDelay['\"]?:\s*['\"](\d+(?:\.\d+)?)s", r"next slot in (\d+)s", r"\((\d+)s left\)",
+                r"retry in (\d+(?:\.\d+)?)\s*s")
+    for pattern in patterns:
+        match = re.search(pattern, error_str)
+        if match:
+            return max(1.0, float(match.group(1)))
+    if "PerDay" in error_str or "per day" in error_str.lower():
+        return 3600.0
+    return default
+
+
+class JobRunner:
+    """Background workers draining a JobQueue into WAV files.
+
+    Rate-limited items are deferred until the quota window renews without
+    counting as a failed attempt; other errors back off exponentially and are
+    marked failed after max_attempts. synthesize(item) must return int16 PCM.
+    With a dataset (ShardWriter) clips are appended to its shards instead of
+    being written as WAV files, and an item's output_path is "<dir>#<clip>";
+    the dataset is closed whenever the queue has nothing left pending or running.
+    """
+
+    def __init__(self, queue, synthesize, output_dir, workers=1, max_attempts=5, idle_seconds=30.0,
+                 lease_seconds=600.0, sample_rate=24000, dataset=None):
+        self.queue = queue
+        self.synthesize = synthesize
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.idle_seconds = idle_seconds
+        self.lease_seconds = lease_seconds
+        self.sample_rate = sample_rate
+        self.dataset = dataset
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Start the worker threads (no-op if already running); new items also wake idle workers"""
+        self._wake.set()
+        if self.running:
+            return self
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._work, name=f"gemini-tts-job-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def output_path(self, item):
+        job_dir = re.sub(r"[^\w.-]+", "_", item["job"]) or "job"
+        return os.path.join(self.output_dir, job_dir, f"{item['idx']:05d}_{item['item_key'][:8]}.wav")
+
+    def run_once(self):
+        """Process one ready item; returns False when none was ready"""
+        item = self.queue.claim(self.lease_seconds)
+        if item is None:
+            return False
+        label = f"'{item['job']}' #{item['idx'] + 1}"
+        try:
+            pcm = self.synthesize(item)
+            if self.dataset is not None:
+                clip, _ = self.dataset.append(pcm, item["prompt"], item["voice"], item["model"], self.sample_rate)
+                path = f"{self.dataset.root}#{clip}"
+            else:
+                path = self.output_path(item)
+                write_wav(path, pcm, self.sample_rate)
+            self.queue.complete(item["id"], path, len(pcm))
+            print(f"🗂️ Job {label} done -> {path}")
+        except Exception as error:
+            error_str = str(error)
+            if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str or LOCAL_BUDGET_ERROR in error_str:
+                delay = quota_delay(error_str)
+                self.queue.defer(item["id"], delay, error_str, item["attempts"])
+                print(f"⏸️ Job {label} rate limited, resuming in {delay:.0f}s")
+            else:
+                attempts = item["attempts"] + 1
+                if attempts >= self.max_attempts:
+                    self.queue.fail(item["id"], error_str, attempts)
+                    print(f"❌ Job {label} failed after {attempts} attempts: {error_str[:120]}")
+                else:
+                    delay = 30.0 * 2 ** (attempts - 1)
+                    self.queue.defer(item["id"], delay, error_str, attempts)
+                    print(f"⚠️ Job {label} failed ({error_str[:80]}), retrying in {delay:.0f}s")
+        return True
+
+    def run_until_idle(self):
+        """Process items in the calling thread until nothing is ready; returns how many were processed"""
+        processed = 0
+        while self.run_once():
+            processed += 1
+        self._close_dataset_if_drained(self.queue.next_due())
+        return processed
+
+    def _close_dataset_if_drained(self, due):
+        if due is None and self.dataset is not None:
+            self.dataset.close()
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+                due = self.queue.next_due()
+                self._close_dataset_if_drained(due)
+            except Exception as error:
+                print(f"⚠️ Job worker error: {error}")
+                due = self.idle_seconds
+            wait = self.idle_seconds if due is None else min(max(due, 0.5), self.idle_seconds)
+            self._wake.wait(wait)
+            self._wake.clear()
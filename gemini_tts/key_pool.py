@@ -0,0 +1,158 @@
+# gemini_tts/key_pool.py
+import threading
+
+
+def key_label(api_key):
+    """Printable stand-in for an API key (never the key itself)"""
+    return f"…{api_key[-4:]}" if api_key else "no key"
+
+
+class PooledKey:
+    """One API key of the pool, its billing project and usage counters"""
+
+    def __init__(self, api_key, billing_project_id="", tier=None, label=None):
+        self.api_key = api_key
+        self.billing_project_id = billing_project_id or ""
+        self.tier = tier
+        self.label = label or key_label(api_key)
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.disabled = None
+
+
+class KeyPool:
+    """Spread requests over several API keys / billing projects.
+
+    checkout() hands out the healthy key with the shortest predicted wait for
+    rate budget, then the fewest requests in flight, then the fewest requests
+    overall. A key is healthy while its circuit for the model is not open, so
+    keys that hit their quota drop out of rotation until the breaker lets a
+    probe through; keys the API rejects as invalid are disabled for good.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+    def add(self, api_key, billing_project_id="", tier=None, label=None):
+        """Add a key unless it is already pooled; returns its PooledKey"""
+        with self._lock:
+            for key in self._keys:
+                if key.api_key == api_key:
+                    if billing_project_id and not key.billing_project_id:
+                        key.billing_project_id = billing_project_id
+                    return key
+            key = PooledKey(api_key, billing_project_id, tier, label)
+            self._keys.append(key)
+            return key
+
+    def primary_key(self):
+        with self._lock:
+            return self._keys[0].api_key if self._keys else None
+
+    def healthy_keys(self):
+        """(api_key, tier) of every key that is not disabled"""
+        with self._lock:
+            return [(key.api_key, key.tier) for key in self._keys if key.disabled is None]
+
+    def checkout(self, model, tier, breaker=None, limiter=None, tokens=0):
+        """Pick the least-loaded healthy key for model and count it in flight; None if every key is out"""
+        with self._lock:
+            candidates = [key for key in self._keys if key.disabled is None]
+
+            def load(key):
+                wait = limiter.wait_estimate(model, key.tier or tier, tokens, key.api_key) if limiter else 0.0
+                return (wait, key.in_flight, key.requests)
+
+            for key in sorted(candidates, key=load):
+                if breaker is None or breaker.allow(model, key.api_key):
+                    key.in_flight += 1
+                    key.requests += 1
+                    return key
+        return None
+
+    def release(self, key, outcome):
+        """Return a checked-out key; outcome is "success", "rate_limited" or "error" """
+        with self._lock:
+            key.in_flight -= 1
+            if outcome == "success":
+                key.successes += 1
+            elif outcome == "rate_limited":
+                key.rate_limited += 1
+            else:
+                key.errors += 1
+
+    def disable(self, key, reason):
+        with self._lock:
+            if key.disabled is not None:
+                return
+            key.disabled = reason
+        print(f"🔑 Removed API key {key.label} from the pool: {reason}")
+
+    def exhausted_error(self, model, breaker):
+        """Error for when no key can take a request, carrying the underlying error text for classification"""
+        with self._lock:
+            keys = list(self._keys)
+        healthy = [key for key in keys if key.disabled is None]
+        if not healthy:
+            reasons = ", ".join(f"{key.label}: {key.disabled}" for key in keys)
+            return f"API key not valid: every pooled API key is disabled ({reasons})"
+
+        def reopens_in(key):
+            return breaker.snapshot(key.api_key).get(model, (None, 0.0))[1]
+
+        soonest = min(healthy, key=reopens_in)
+        return f"{breaker.open_error(model, soonest.api_key)} [all {len(healthy)} pooled keys cooling down]"
+
+    def usage(self):
+        with self._lock:
+            return [{"key": key.label, "billing_project_id": key.billing_project_id, "requests": key.requests,
+                     "in_flight": key.in_flight, "success": key.successes, "rate_limited": key.rate_limited,
+                     "errors": key.errors, "disabled": key.disabled} for key in self._keys]
+
+    def status_line(self):
+        parts = []
+        for key in self.usage():
+            if key["disabled"]:
+                parts.append(f"{key['key']} disabled ({key['disabled']})")
+                continue
+            part = f"{key['key']} {key['requests']} req"
+            if key["in_flight"]:
+                part += f"/{key['in_flight']} in flight"
+            if key["rate_limited"]:
+                part += f", {key['rate_limited']}×429"
+            parts.append(part)
+        return "🔑 Key pool: " + (", ".join(parts) if parts else "empty")
+
+
+def parse_key_entries(config_keys, env_keys=""):
+    """Pool entries from config "api_keys" (strings or objects) plus comma-separated GEMINI_API_KEYS.
+
+    Object entries may carry billing_project_id, tier, label and per-model
+    rate_limits overriding the tier budgets for that key.
+    """
+    entries = []
+    for item in config_keys or []:
+        if isinstance(item, str):
+            entries.append({"api_key": item.strip()})
+        elif isinstance(item, dict) and item.get("api_key"):
+            entries.append({
+                "api_key": str(item["api_key"]).strip(),
+                "billing_project_id": (item.get("billing_project_id") or "").strip(),
+                "tier": item.get("tier"),
+                "label": item.get("label"),
+                "rate_limits": item.get("rate_limits"),
+            })
+        else:
+            raise ValueError(f"Unsupported api_keys entry: {item!r}")
+    for api_key in (env_keys or "").split(","):
+        if api_key.strip():
+            entries.append({"api_key": api_key.strip()})
+    return [entry for entry in entries if entry["api_key"]]
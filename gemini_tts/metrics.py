@@ -0,0 +1,197 @@
+# gemini_tts/metrics.py
+import os
+import time
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Histogram buckets (seconds) spanning sub-millisecond decode steps to slow Pro round trips
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+_HELP = {
+    "gemini_tts_requests_total": "TTS requests by final outcome",
+    "gemini_tts_stage_seconds": "Time spent per request stage",
+    "gemini_tts_http_responses_total": "HTTP responses by status code",
+    "gemini_tts_retries_total": "Retried attempts by reason",
+    "gemini_tts_fallbacks_total": "Fallback routes taken",
+    "gemini_tts_hedges_total": "Hedged requests by which copy answered first",
+    "gemini_tts_bytes_sent_total": "Request body bytes sent",
+    "gemini_tts_bytes_received_total": "Response body bytes received",
+    "gemini_tts_audio_seconds_total": "Seconds of audio produced",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    escaped = [(k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms rendered in Prometheus text format"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, textfile=None):
+        self.buckets = tuple(buckets)
+        self.textfile = textfile
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist["counts"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def trace(self, model, voice):
+        return RequestTrace(self, model, voice)
+
+    def render_prometheus(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: {"counts": list(v["counts"]), "sum": v["sum"], "count": v["count"]}
+                          for k, v in self._histograms.items()}
+
+        lines = []
+        for name in sorted({n for n, _ in counters}):
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for (n, key), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+        for name in sorted({n for n, _ in histograms}):
+            lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for (n, key), hist in sorted(histograms.items()):
+                if n != name:
+                    continue
+                for bound, count in zip(self.buckets, hist["counts"]):
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': f'{bound:g}'})} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {hist['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {hist['sum']:.6f}")
+                lines.append(f"{name}_count{_format_labels(key)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """JSON-friendly totals: counters by label set and mean/count per histogram"""
+        with self._lock:
+            counters = {f"{n}{_format_labels(k)}": v for (n, k), v in self._counters.items()}
+            histograms = {
+                f"{n}{_format_labels(k)}": {"count": h["count"], "mean": round(h["sum"] / h["count"], 4)}
+                for (n, k), h in self._histograms.items() if h["count"]
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def write_textfile(self, path):
+        """Atomically write the exposition to path (node_exporter textfile collector format)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Expose /metrics (Prometheus) and /metrics.json on a background HTTP server"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body = json.dumps(registry.summary(), indent=2).encode("utf-8")
+                    content_type = "application/json"
+                elif self.path.startswith("/metrics"):
+                    body = registry.render_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class RequestTrace:
+    """Per-request stage timings and counters, recorded into a registry as they happen"""
+
+    def __init__(self, registry, model, voice):
+        self.registry = registry
+        self.model = model
+        self.voice = voice
+        self.stages = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+        # Optional threading/asyncio Event set when the first HTTP attempt goes out (see run_hedged)
+        self.sent = None
+
+    @contextmanager
+    def stage(self, name):
+        if name == "http" and self.sent is not None:
+            self.sent.set()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.registry.observe("gemini_tts_stage_seconds", seconds, stage=name, model=self.model)
+
+    def count(self, name, value=1, **labels):
+        self.counters[name] = self.counters.get(name, 0) + value
+        self.registry.inc(name, value, model=self.model, **labels)
+
+    def merge(self, other):
+        """Add another trace's stages and counters to this one (already recorded in the registry)"""
+        for name, seconds in other.stages.items():
+            if name != "total":
+                self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self, outcome, audio_seconds=0.0):
+        total = time.perf_counter() - self.started
+        self.add_stage("total", total)
+        self.registry.inc("gemini_tts_requests_total", model=self.model, voice=self.voice, outcome=outcome)
+        if audio_seconds:
+            self.count("gemini_tts_audio_seconds_total", audio_seconds, voice=self.voice)
+        return self.summary(outcome)
+
+    def summary(self, outcome=None):
+        return {
+            "model": self.model,
+            "voice": self.voice,
+            "outcome": outcome,
+            "stages_ms": {k: round(v * 1000, 2) for k, v in self.stages.items()},
+            "counters": {k.replace("gemini_tts_", ""): round(v, 3) for k, v in self.counters.items()},
+        }
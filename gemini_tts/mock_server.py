@@ -0,0 +1,269 @@
+# gemini_tts/mock_server.py
+"""
+Local stand-in for the Gemini TTS REST API, for benchmarks and offline testing.
+
+Implements POST /v1beta/models/{model}:generateContent and
+:streamGenerateContent?alt=sse. Responses carry synthetic 24 kHz int16 PCM
+(a quiet sine tone sized from the prompt) with configurable latency, and can
+inject 429 (with a retryDelay body), 5xx and 403 errors at given rates.
+Packed prompts get silence at every pause marker, like the real model.
+key_rpm emulates a per-API-key quota (requests per rolling minute) and
+invalid_keys are rejected the way the real API rejects a bad key.
+
+Run standalone:
+    python -m gemini_tts.mock_server --port 8765 --latency lognormal:1.5:0.4 --rate-429 0.05
+then point the node at it with GEMINI_API_BASE_URL=http://127.0.0.1:8765/v1beta
+"""
+import re
+import json
+import time
+import base64
+import random
+import argparse
+import threading
+import numpy as np
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .packing import PAUSE_MARKER, PAUSE_SECONDS
+
+SAMPLE_RATE = 24000
+_PATH_RE = re.compile(r"^/v1beta/models/([^/:?]+):(generateContent|streamGenerateContent)(?:\?.*)?$")
+
+
+def parse_latency(spec):
+    """Build a sampler (seconds) from "fixed:S", "uniform:LO:HI" or "lognormal:MEDIAN:SIGMA" """
+    kind, *params = str(spec).split(":")
+    values = [float(v) for v in params]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(np.log(median), sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class MockGeminiServer:
+    """Threaded HTTP server emulating the Gemini TTS generateContent endpoints"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0.2", seconds_per_word=0.4,
+                 audio_seconds=None, rate_429=0.0, rate_5xx=0.0, rate_403=0.0, retry_delay=2.0,
+                 stream_chunk_seconds=0.5, seed=None, key_rpm=0, invalid_keys=()):
+        self.sample_latency = parse_latency(latency)
+        self.seconds_per_word = seconds_per_word
+        self.audio_seconds = audio_seconds
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.rate_403 = rate_403
+        self.retry_delay = retry_delay
+        self.stream_chunk_seconds = stream_chunk_seconds
+        self.key_rpm = key_rpm
+        self.invalid_keys = set(invalid_keys)
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "ok": 0, "429": 0, "5xx": 0, "403": 0, "bytes_out": 0, "per_key": {}}
+        self._key_windows = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key, nbytes=0, api_key=""):
+        with self._lock:
+            self.stats[key] += 1
+            self.stats["bytes_out"] += nbytes
+            if key == "ok":
+                label = api_key[-4:]
+                self.stats["per_key"][label] = self.stats["per_key"].get(label, 0) + 1
+
+    def _key_quota_wait(self, api_key):
+        """Seconds until api_key has quota again under key_rpm (0 if the request may proceed)"""
+        now = time.monotonic()
+        with self._lock:
+            window = self._key_windows.setdefault(api_key, deque())
+            while window and now - window[0] >= 60.0:
+                window.popleft()
+            if len(window) >= self.key_rpm:
+                return 60.0 - (now - window[0])
+            window.append(now)
+            return 0.0
+
+    def synth_pcm(self, text):
+        if PAUSE_MARKER in text:
+            # Packed lines: the direction paragraph is not spoken, each marker becomes silence
+            lines = text.split("\n\n", 1)[-1].split(PAUSE_MARKER)
+            silence = np.zeros(int(PAUSE_SECONDS * SAMPLE_RATE), dtype="<i2").tobytes()
+            return silence.join(self.synth_pcm(line) for line in lines)
+        seconds = self.audio_seconds or max(0.5, len(text.split()) * self.seconds_per_word)
+        t = np.arange(int(seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+        return (3000 * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()
+
+    def _send_json(self, handler, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=UTF-8")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+        return len(payload)
+
+    def _error(self, handler, status, code, message, details=None):
+        body = {"error": {"code": status, "message": message, "status": code}}
+        if details:
+            body["error"]["details"] = details
+        return self._send_json(handler, status, body)
+
+    def handle(self, handler):
+        with self._lock:
+            self.stats["requests"] += 1
+        match = _PATH_RE.match(handler.path)
+        length = int(handler.headers.get("Content-Length") or 0)
+        raw = handler.rfile.read(length) if length else b""
+        if not match:
+            self._error(handler, 404, "NOT_FOUND", f"Unknown path {handler.path}")
+            return
+        model, method = match.groups()
+        api_key = parse_qs(urlsplit(handler.path).query).get("key", [""])[0]
+
+        try:
+            request = json.loads(raw or b"{}")
+            text = request["contents"][0]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError):
+            self._error(handler, 400, "INVALID_ARGUMENT", "Malformed generateContent request")
+            return
+
+        if api_key in self.invalid_keys:
+            details = [{"@type": "type.googleapis.com/google.rpc.ErrorInfo", "reason": "API_KEY_INVALID"}]
+            self._error(handler, 400, "INVALID_ARGUMENT", "API key not valid. Please pass a valid API key.",
+                        details)
+            return
+
+        time.sleep(self.sample_latency())
+
+        if self.key_rpm:
+            wait = self._key_quota_wait(api_key)
+            if wait > 0:
+                details = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{wait:.0f}s"}]
+                n = self._error(handler, 429, "RESOURCE_EXHAUSTED",
+                                f"Quota exceeded for {model} on this key (mock)", details)
+                self._count("429", n)
+                return
+
+        roll = self.random.random()
+        if roll < self.rate_429:
+            details = [{"@type": "type.googleapis.com/google.rpc.RetryInfo",
+                        "retryDelay": f"{self.retry_delay:g}s"}]
+            n = self._error(handler, 429, "RESOURCE_EXHAUSTED",
+                            f"Quota exceeded for {model} (mock)", details)
+            self._count("429", n)
+            return
+        roll -= self.rate_429
+        if roll < self.rate_5xx:
+            n = self._error(handler, 503, "UNAVAILABLE", "The model is overloaded (mock)")
+            self._count("5xx", n)
+            return
+        roll -= self.rate_5xx
+        if roll < self.rate_403:
+            n = self._error(handler, 403, "PERMISSION_DENIED", "Permission denied (mock)")
+            self._count("403", n)
+            return
+
+        pcm = self.synth_pcm(text)
+        usage = {"promptTokenCount": max(1, len(text) // 4),
+                 "candidatesTokenCount": len(pcm) // 2 // SAMPLE_RATE * 25}
+        if method == "streamGenerateContent":
+            self._count("ok", self._stream(handler, pcm, usage), api_key)
+        else:
+            body = {"candidates": [{"content": {"parts": [{"inlineData": {
+                "mimeType": f"audio/L16;codec=pcm;rate={SAMPLE_RATE}",
+                "data": base64.b64encode(pcm).decode("ascii")}}], "role": "model"},
+                "finishReason": "STOP"}], "usageMetadata": usage, "modelVersion": model}
+            self._count("ok", self._send_json(handler, 200, body), api_key)
+
+    def _stream(self, handler, pcm, usage):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        step = int(self.stream_chunk_seconds * SAMPLE_RATE) * 2
+        sent = 0
+        for start in range(0, len(pcm), step):
+            event = {"candidates": [{"content": {"parts": [{"inlineData": {
+                "mimeType": f"audio/L16;codec=pcm;rate={SAMPLE_RATE}",
+                "data": base64.b64encode(pcm[start:start + step]).decode("ascii")}}], "role": "model"}}]}
+            if start + step >= len(pcm):
+                event["usageMetadata"] = usage
+            line = f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+            handler.wfile.write(line)
+            handler.wfile.flush()
+            sent += len(line)
+        return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Gemini TTS REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0.2",
+                        help="fixed:S | uniform:LO:HI | lognormal:MEDIAN:SIGMA (seconds)")
+    parser.add_argument("--audio-seconds", type=float, default=None,
+                        help="Fixed clip length; default scales with the prompt word count")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--rate-403", type=float, default=0.0)
+    parser.add_argument("--retry-delay", type=float, default=2.0)
+    parser.add_argument("--key-rpm", type=int, default=0, help="Per-API-key requests per minute (0: unlimited)")
+    parser.add_argument("--invalid-keys", default="", help="Comma-separated API keys to reject as invalid")
+    args = parser.parse_args()
+
+    server = MockGeminiServer(args.host, args.port, latency=args.latency, audio_seconds=args.audio_seconds,
+                              rate_429=args.rate_429, rate_5xx=args.rate_5xx, rate_403=args.rate_403,
+                              retry_delay=args.retry_delay, key_rpm=args.key_rpm,
+                              invalid_keys=[k for k in args.invalid_keys.split(",") if k])
+    print(f"🧪 Mock Gemini TTS server on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
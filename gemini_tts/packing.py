@@ -0,0 +1,94 @@
+# gemini_tts/packing.py
+import numpy as np
+
+# Spoken as silence between packed lines; the model is told never to read it out
+PAUSE_MARKER = "[long pause]"
+PAUSE_SECONDS = 1.5
+
+
+def plan_packs(items, max_lines=8, max_line_chars=160, max_pack_chars=1200):
+    """Group short lines that can share one request.
+
+    items is a list of (group, text) where group holds whatever must match
+    for lines to share a request (voice, model, instruction...). Returns
+    lists of item indices in input order; lines that are too long, or alone
+    in their group, come back as single-item lists.
+    """
+    packs, open_packs = [], {}
+    for index, (group, text) in enumerate(items):
+        if max_lines < 2 or len(text) > max_line_chars:
+            packs.append([index])
+            continue
+        pack = open_packs.get(group)
+        if pack is None or len(pack[0]) >= max_lines or pack[1] + len(text) > max_pack_chars:
+            pack = open_packs[group] = [[], 0]
+            packs.append(pack[0])
+        pack[0].append(index)
+        pack[1] += len(text)
+    return packs
+
+
+def packed_prompt(lines, instruction="", pause_seconds=PAUSE_SECONDS):
+    """One prompt that speaks every line in order with a marked pause in between"""
+    direction = (f"Read the following {len(lines)} lines aloud in order. At every {PAUSE_MARKER} stay completely "
+                 f"silent for about {pause_seconds:g} seconds, and never say the marker itself.")
+    if instruction.strip():
+        direction += f' Deliver every line as instructed by "{instruction.strip()}"'
+    return direction + "\n\n" + f"\n{PAUSE_MARKER}\n".join(line.strip() for line in lines)
+
+
+def frame_energy_db(samples, frame):
+    """Mean-square energy in dBFS of consecutive frames of float32 samples"""
+    n_frames = len(samples) // frame
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    power = np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / frame
+    return 10.0 * np.log10(power + 1e-12)
+
+
+def split_packed(samples, line_chars, sample_rate=24000, threshold_db=-45.0, min_gap_ms=500, frame_ms=10,
+                 margin_ms=60, max_rate_ratio=4.0):
+    """Cut a packed clip back into one float32 view per line, or None if it does not split cleanly.
+
+    Frames quieter than threshold_db form silent runs; interior runs of at
+    least min_gap_ms are the pauses between lines. Exactly len(line_chars)-1
+    pauses must stand out: extra shorter ones (breaths, commas) are ignored
+    only when they are clearly shorter than the chosen pauses. Each line's
+    duration per character must also stay within max_rate_ratio of the
+    others, which catches a pause landing inside a line.
+    """
+    n_lines = len(line_chars)
+    frame = max(1, sample_rate * frame_ms // 1000)
+    silent = frame_energy_db(samples, frame) < threshold_db
+    if n_lines < 2 or silent.all():
+        return None
+
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    interior = (starts > 0) & (ends < len(silent))
+    starts, ends = starts[interior], ends[interior]
+    lengths = ends - starts
+    long_enough = lengths >= max(1, min_gap_ms // frame_ms)
+    starts, ends, lengths = starts[long_enough], ends[long_enough], lengths[long_enough]
+    if len(lengths) < n_lines - 1:
+        return None
+    if len(lengths) > n_lines - 1:
+        order = np.argsort(lengths)[::-1]
+        chosen, rest = order[:n_lines - 1], order[n_lines - 1:]
+        if lengths[rest].max() >= 0.6 * lengths[chosen].min():
+            return None
+        chosen = np.sort(chosen)
+        starts, ends = starts[chosen], ends[chosen]
+
+    # Lines span from the end of one pause to the start of the next, widened by a small margin
+    margin = int(margin_ms // frame_ms)
+    voiced = np.flatnonzero(~silent)
+    line_starts = np.concatenate(([voiced[0]], ends))
+    line_ends = np.concatenate((starts, [voiced[-1] + 1]))
+    bounds_start = np.maximum(line_starts - margin, np.concatenate(([0], (starts + ends) // 2))) * frame
+    bounds_end = np.minimum(line_ends + margin, np.concatenate(((starts + ends) // 2, [len(silent)]))) * frame
+
+    durations = (line_ends - line_starts).astype(np.float64)
+    rates = durations / (np.asarray(line_chars, dtype=np.float64) + 10.0)
+    if rates.min() <= 0 or rates.max() / rates.min() > max_rate_ratio:
+        return None
+    return [samples[start:end] for start, end in zip(bounds_start, bounds_end)]
@@ -0,0 +1,59 @@
+# gemini_tts/pcm.py
+import base64
+import binascii
+import numpy as np
+
+# Base64 characters decoded per step; a multiple of 4 so every block decodes on its own
+DECODE_BLOCK_CHARS = 1 << 20
+
+
+def decoded_size(b64_data):
+    """Exact number of bytes encoded by an unwrapped base64 string"""
+    n = len(b64_data)
+    if n == 0:
+        return 0
+    padding = 2 if b64_data[-2:] == "==" else 1 if b64_data[-1:] == "=" else 0
+    return n // 4 * 3 - padding
+
+
+def b64_to_int16(b64_data, block_chars=DECODE_BLOCK_CHARS):
+    """Decode base64 little-endian PCM straight into a preallocated int16 array.
+
+    The output buffer is allocated once at its final size and filled block by
+    block, so peak memory is the PCM plus one block instead of a full bytes
+    copy followed by further array copies.
+    """
+    if isinstance(b64_data, (bytes, bytearray)):
+        b64_data = b64_data.decode("ascii")
+
+    size = decoded_size(b64_data)
+    raw = np.empty(size + size % 2, dtype=np.uint8)
+    pos = 0
+    try:
+        for start in range(0, len(b64_data), block_chars):
+            block = binascii.a2b_base64(b64_data[start:start + block_chars])
+            raw[pos:pos + len(block)] = np.frombuffer(block, dtype=np.uint8)
+            pos += len(block)
+    except (binascii.Error, ValueError):
+        # Wrapped or otherwise irregular base64: fall back to a single full decode
+        decoded = base64.b64decode(b64_data)
+        raw = np.frombuffer(decoded, dtype=np.uint8)
+        pos = len(decoded)
+
+    return raw[:pos - pos % 2].view("<i2")
+
+
+def int16_to_float32(pcm, out=None):
+    """Scale int16 PCM to float32 in [-1, 1) in a single pass, writing into out if given"""
+    if out is None:
+        out = np.empty(pcm.shape, dtype=np.float32)
+    np.multiply(pcm, np.float32(1.0 / 32768.0), out=out, casting="unsafe")
+    return out
+
+
+def float32_to_int16(samples):
+    """Inverse of int16_to_float32: round back to int16 PCM (clipped to the int16 range)"""
+    scaled = np.multiply(samples, np.float32(32768.0), dtype=np.float32)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype(np.int16)
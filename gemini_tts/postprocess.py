@@ -0,0 +1,239 @@
+# gemini_tts/postprocess.py
+"""
+Batched post-processing for float32 waveforms shaped [batch, channels, samples].
+
+Every step works on the whole batch with array ops: per-item lengths travel
+alongside the zero-padded batch instead of looping over items in Python.
+
+    trim       drop leading/trailing audio below a dBFS threshold (per item, left-aligned)
+    resample   windowed-sinc polyphase resampling; kernels cached per rate pair
+    normalize  RMS or ITU-R BS.1770-style gated loudness (LUFS) to a target level,
+               with a peak ceiling
+"""
+import math
+from functools import lru_cache
+import numpy as np
+
+NORMALIZE_MODES = ["off", "rms", "lufs"]
+
+# Output frames per resampling block; bounds the strided-window matmul's working set
+RESAMPLE_BLOCK_FRAMES = 1 << 16
+
+
+def db_to_amplitude(db):
+    return 10.0 ** (db / 20.0)
+
+
+def _fast_fft_len(n):
+    """Smallest 2^a * 3^b * 5^c >= n; FFT sizes with large prime factors are many times slower"""
+    best = 1 << max(0, (n - 1).bit_length())
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            size = power35 << max(0, (-(-n // power35) - 1).bit_length())
+            best = min(best, size)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+def _valid_mask(lengths, n):
+    """[batch, 1, n] bool mask of the samples inside each item's length"""
+    return (np.arange(n)[None, :] < lengths[:, None])[:, None, :]
+
+
+def trim_silence_batch(waveform, lengths, threshold_db=-50.0, margin_ms=50, sample_rate=24000):
+    """Trim each item to its first/last sample above threshold_db; returns (waveform, lengths).
+
+    Items are shifted to start at index 0 and the batch is cut to the longest
+    trimmed item. Items with no sample above the threshold are left as they are.
+    """
+    batch, channels, n = waveform.shape
+    loud = np.abs(waveform).max(axis=1) > db_to_amplitude(threshold_db)
+    loud &= np.arange(n)[None, :] < lengths[:, None]
+    has_audio = loud.any(axis=1)
+    margin = int(sample_rate * margin_ms / 1000)
+
+    first = loud.argmax(axis=1)
+    last = n - 1 - loud[:, ::-1].argmax(axis=1)
+    start = np.where(has_audio, np.maximum(first - margin, 0), 0)
+    end = np.where(has_audio, np.minimum(last + 1 + margin, lengths), lengths)
+    new_lengths = end - start
+
+    width = int(new_lengths.max()) if batch else 0
+    index = np.minimum(start[:, None] + np.arange(width)[None, :], max(n - 1, 0))
+    trimmed = np.take_along_axis(waveform, np.broadcast_to(index[:, None, :], (batch, channels, width)), axis=2)
+    trimmed *= _valid_mask(new_lengths, width)
+    return trimmed, new_lengths
+
+
+@lru_cache(maxsize=32)
+def sinc_resample_kernel(orig_freq, new_freq, lowpass_filter_width=6, rolloff=0.99):
+    """Hann-windowed sinc polyphase kernel [new, taps] for a reduced rate pair, plus its half width"""
+    base_freq = min(orig_freq, new_freq) * rolloff
+    width = math.ceil(lowpass_filter_width * orig_freq / base_freq)
+    idx = np.arange(-width, width + orig_freq, dtype=np.float64)[None, :] / orig_freq
+    t = np.arange(0, -new_freq, -1, dtype=np.float64)[:, None] / new_freq + idx
+    t = np.clip(t * base_freq, -lowpass_filter_width, lowpass_filter_width)
+    window = np.cos(t * math.pi / lowpass_filter_width / 2) ** 2
+    kernel = (np.sinc(t) * window * (base_freq / orig_freq)).astype(np.float32)
+    kernel.setflags(write=False)
+    return kernel, width
+
+
+def resample_batch(waveform, lengths, orig_sr, new_sr):
+    """Resample [batch, channels, samples] with a polyphase sinc kernel; returns (waveform, lengths).
+
+    Each output frame of `new` samples is one window of the input (stride `orig`)
+    multiplied by the kernel matrix, so the work is a strided view plus matmuls.
+    """
+    if orig_sr == new_sr:
+        return waveform, lengths
+    gcd = math.gcd(int(orig_sr), int(new_sr))
+    orig, new = int(orig_sr) // gcd, int(new_sr) // gcd
+    kernel, width = sinc_resample_kernel(orig, new)
+
+    batch, channels, n = waveform.shape
+    flat = np.pad(waveform.reshape(batch * channels, n), ((0, 0), (width, width + orig)))
+    windows = np.lib.stride_tricks.sliding_window_view(flat, kernel.shape[1], axis=1)[:, ::orig]
+    target = math.ceil(new * n / orig)
+    frames = min(windows.shape[1], math.ceil(target / new))
+
+    out = np.empty((batch * channels, frames, new), dtype=np.float32)
+    for block in range(0, frames, RESAMPLE_BLOCK_FRAMES):
+        stop = min(frames, block + RESAMPLE_BLOCK_FRAMES)
+        np.matmul(windows[:, block:stop], kernel.T, out=out[:, block:stop])
+
+    resampled = out.reshape(batch, channels, frames * new)[..., :target]
+    new_lengths = (lengths * new + orig - 1) // orig
+    resampled *= _valid_mask(new_lengths, target)
+    return resampled, new_lengths
+
+
+def _biquad_response(b, a, freqs, sample_rate):
+    """Complex frequency response of a biquad at freqs (Hz)"""
+    z = np.exp(-2j * np.pi * freqs / sample_rate)
+    return (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+
+
+@lru_cache(maxsize=16)
+def k_weighting(n_fft, sample_rate):
+    """BS.1770 K-weighting (high shelf + high pass) as an rfft-domain response for n_fft samples"""
+    freqs = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+
+    gain_db, q, fc = 4.0, 1 / math.sqrt(2), 1500.0
+    A = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * fc / sample_rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    shelf_b = (A * ((A + 1) + (A - 1) * cos_w0 + 2 * math.sqrt(A) * alpha),
+               -2 * A * ((A - 1) + (A + 1) * cos_w0),
+               A * ((A + 1) + (A - 1) * cos_w0 - 2 * math.sqrt(A) * alpha))
+    shelf_a = ((A + 1) - (A - 1) * cos_w0 + 2 * math.sqrt(A) * alpha,
+               2 * ((A - 1) - (A + 1) * cos_w0),
+               (A + 1) - (A - 1) * cos_w0 - 2 * math.sqrt(A) * alpha)
+
+    q, fc = 0.5, 38.0
+    w0 = 2 * math.pi * fc / sample_rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    pass_b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+    pass_a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+
+    response = _biquad_response(shelf_b, shelf_a, freqs, sample_rate)
+    response *= _biquad_response(pass_b, pass_a, freqs, sample_rate)
+    return response.astype(np.complex64)
+
+
+def measure_rms_db(waveform, lengths):
+    """RMS level in dBFS per item over its valid samples"""
+    power = np.square(waveform).sum(axis=(1, 2)) / (np.maximum(lengths, 1) * waveform.shape[1])
+    return 10 * np.log10(np.maximum(power, 1e-12))
+
+
+def measure_lufs(waveform, lengths, sample_rate, block_ms=400, overlap=0.75):
+    """Gated integrated loudness per item (BS.1770 style: K-weighting, -70 LUFS and -10 LU gates)"""
+    batch, channels, n = waveform.shape
+    # Zero padding keeps the FFT filter's circular wrap-around out of the signal
+    n_fft = _fast_fft_len(n + int(sample_rate * 0.1))
+    weighted = np.fft.irfft(np.fft.rfft(waveform, n=n_fft) * k_weighting(n_fft, sample_rate), n=n_fft)[..., :n]
+    weighted *= _valid_mask(lengths, n)
+
+    block = int(sample_rate * block_ms / 1000)
+    hop = max(1, int(block * (1 - overlap)))
+    energy = np.zeros((batch, n + 1))
+    np.cumsum(np.square(weighted).sum(axis=1), axis=1, out=energy[:, 1:])
+    starts = np.arange(0, max(1, n - block + 1), hop)
+    ends = np.minimum(starts + block, n)
+    block_power = (energy[:, ends] - energy[:, starts]) / np.maximum(ends - starts, 1)
+
+    # Blocks must lie inside the item; items shorter than one block are measured as a whole
+    inside = ends[None, :] <= lengths[:, None]
+    short = lengths < block
+    inside[:, 0] |= short
+    block_power[:, 0] = np.where(short, energy[np.arange(batch), lengths] / np.maximum(lengths, 1),
+                                 block_power[:, 0])
+
+    block_loudness = -0.691 + 10 * np.log10(np.maximum(block_power, 1e-12))
+    gated = inside & (block_loudness > -70.0)
+    mean_power = (block_power * gated).sum(axis=1) / np.maximum(gated.sum(axis=1), 1)
+    relative_gate = -0.691 + 10 * np.log10(np.maximum(mean_power, 1e-12)) - 10.0
+    gated &= block_loudness > relative_gate[:, None]
+    mean_power = (block_power * gated).sum(axis=1) / np.maximum(gated.sum(axis=1), 1)
+    return -0.691 + 10 * np.log10(np.maximum(mean_power, 1e-12))
+
+
+def normalize_batch(waveform, lengths, sample_rate, mode="lufs", target_level=-16.0, peak_ceiling_db=-1.0):
+    """Scale each item to target_level (dBFS for rms, LUFS for lufs), never above the peak ceiling.
+
+    Returns (waveform, measured levels, applied gains in dB); waveform is scaled in place.
+    """
+    if mode == "rms":
+        measured = measure_rms_db(waveform, lengths)
+    elif mode == "lufs":
+        measured = measure_lufs(waveform, lengths, sample_rate)
+    else:
+        raise ValueError(f"Unknown normalize mode: {mode}")
+
+    peak = np.maximum(np.abs(waveform).max(axis=(1, 2)), 1e-9)
+    max_gain_db = peak_ceiling_db - 20 * np.log10(peak)
+    # Silent items (nothing above -70) are left alone rather than amplified into noise
+    gain_db = np.where(measured > -70.0, np.minimum(target_level - measured, max_gain_db), 0.0)
+    waveform *= (10.0 ** (gain_db / 20.0)).astype(np.float32)[:, None, None]
+    return waveform, measured, gain_db
+
+
+def postprocess_waveform(waveform, sample_rate, lengths=None, target_sample_rate=0, trim_db=None,
+                         trim_margin_ms=50, normalize="off", target_level=-16.0, peak_ceiling_db=-1.0):
+    """Run trim → resample → normalize; returns (waveform, sample_rate, lengths, report).
+
+    waveform is float32 [batch, channels, samples] and is not modified; it is only
+    copied when no trim/resample step has already produced a new array.
+    """
+    source = waveform = np.asarray(waveform, dtype=np.float32)
+    if lengths is None:
+        lengths = np.full(waveform.shape[0], waveform.shape[-1], dtype=np.int64)
+    else:
+        lengths = np.asarray(lengths, dtype=np.int64)
+    report = {}
+
+    if trim_db is not None:
+        before = int(lengths.sum())
+        waveform, lengths = trim_silence_batch(waveform, lengths, trim_db, trim_margin_ms, sample_rate)
+        report["trimmed_seconds"] = round((before - int(lengths.sum())) / sample_rate, 3)
+
+    if target_sample_rate and int(target_sample_rate) != sample_rate:
+        waveform, lengths = resample_batch(waveform, lengths, sample_rate, int(target_sample_rate))
+        report["resampled"] = f"{sample_rate}->{int(target_sample_rate)}"
+        sample_rate = int(target_sample_rate)
+
+    if normalize != "off":
+        if waveform is source:
+            waveform = waveform.copy()
+        waveform, measured, gain_db = normalize_batch(waveform, lengths, sample_rate, normalize,
+                                                      target_level, peak_ceiling_db)
+        report[normalize] = [round(float(v), 2) for v in measured]
+        report["gain_db"] = [round(float(v), 2) for v in gain_db]
+
+    return np.ascontiguousarray(waveform), sample_rate, lengths, report
@@ -0,0 +1,128 @@
+# gemini_tts/prefetch.py
+import json
+import time
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def is_link(value):
+    """True for an API-format graph input that is wired to another node's output: [node_id, index]"""
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[1], int)
+
+
+def constant_nodes(graph, class_types):
+    """(node_id, inputs) of every node of class_types whose inputs are all constants and whose
+    output something else in the graph consumes (an unconsumed node is never executed)"""
+    consumed = set()
+    for node in graph.values():
+        for value in (node.get("inputs") or {}).values():
+            if is_link(value):
+                consumed.add(str(value[0]))
+    found = []
+    for node_id, node in graph.items():
+        inputs = node.get("inputs") or {}
+        if node.get("class_type") not in class_types or str(node_id) not in consumed:
+            continue
+        if not any(is_link(value) for value in inputs.values()):
+            found.append((node_id, dict(inputs)))
+    return found
+
+
+def call_inputs(fn, inputs):
+    """fn's keyword arguments for a node call: inputs it accepts, with its defaults for the rest"""
+    values = {}
+    for name, param in inspect.signature(fn).parameters.items():
+        if name == "self" or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        if name in inputs:
+            values[name] = inputs[name]
+        elif param.default is not param.empty:
+            values[name] = param.default
+    return values
+
+
+def input_key(fn, inputs):
+    """Stable digest of a node call, the same whether inputs came from the graph or from the call"""
+    text = json.dumps(call_inputs(fn, inputs), sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PrefetchService:
+    """Run node calls in the background ahead of execution and hand the results over later.
+
+    submit() starts a call for an input key unless one is already pending or
+    the last call for that key succeeded (ComfyUI then serves the node from
+    its execution cache, so a new call would only spend quota). take() waits
+    for and removes a pending result. Results nobody collects are dropped
+    after ttl seconds. The last outcome per key is remembered for IS_CHANGED.
+    enabled only tells the on-prompt handler whether to submit anything.
+    """
+
+    def __init__(self, workers=4, ttl=600.0, max_outcomes=1024, enabled=True):
+        self.enabled = enabled
+        self.workers = workers
+        self.ttl = ttl
+        self.max_outcomes = max_outcomes
+        self._executor = None
+        self._pending = {}
+        self._outcomes = OrderedDict()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.collected = 0
+        self.expired = 0
+
+    def _expire(self, now):
+        for key, (future, submitted) in list(self._pending.items()):
+            if future.done() and now - submitted > self.ttl:
+                del self._pending[key]
+                self.expired += 1
+
+    def submit(self, key, fn):
+        """Start fn() in the background for key; returns True if a call was started"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if key in self._pending or self._outcomes.get(key):
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(1, self.workers),
+                                                    thread_name_prefix="gemini-tts-prefetch")
+            self._pending[key] = (self._executor.submit(fn), now)
+            self.started += 1
+            return True
+
+    def take(self, key):
+        """Wait for the background call for key and return its result; None if there is none or it raised"""
+        with self._lock:
+            entry = self._pending.pop(key, None)
+        if entry is None:
+            return None
+        try:
+            result = entry[0].result()
+        except Exception as error:
+            print(f"⚠️ Prefetched request failed, running it again: {error}")
+            return None
+        with self._lock:
+            self.collected += 1
+        return result
+
+    def record(self, key, ok):
+        with self._lock:
+            self._outcomes[key] = ok
+            self._outcomes.move_to_end(key)
+            while len(self._outcomes) > self.max_outcomes:
+                self._outcomes.popitem(last=False)
+
+    def outcome(self, key):
+        """True/False for the last call with key, None if it has not run"""
+        with self._lock:
+            return self._outcomes.get(key)
+
+    def status_line(self):
+        with self._lock:
+            pending = sum(1 for future, _ in self._pending.values() if not future.done())
+            return (f"🛰️ Prefetch: {self.started} started, {self.collected} collected, {pending} running, "
+                    f"{self.expired} expired")
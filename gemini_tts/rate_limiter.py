@@ -0,0 +1,237 @@
+# gemini_tts/rate_limiter.py
+import re
+import time
+import threading
+from .circuit_breaker import key_fingerprint
+
+# Requests/minute pacing per tier. Only RPM is paced by default: daily and token budgets
+# differ between paid tiers and the buckets live in memory, so "tpm" and "rpd" are applied
+# only when set in config.json under "rate_limits". Pro TTS is not part of the free tier;
+# free Pro requests get their own bucket with Flash's numbers and are rejected upstream anyway.
+DEFAULT_QUOTAS = {
+    "free": {
+        "gemini-2.5-flash-preview-tts": {"rpm": 3},
+        "gemini-2.5-pro-preview-tts": {"rpm": 3},
+    },
+    "paid": {
+        "gemini-2.5-flash-preview-tts": {"rpm": 10},
+        "gemini-2.5-pro-preview-tts": {"rpm": 10},
+    },
+}
+
+# Start of every RateLimitExceeded message, so callers can tell it from a server 429
+LOCAL_BUDGET_ERROR = "Local rate budget exhausted"
+
+_WINDOWS = {"rpm": 60.0, "tpm": 60.0, "rpd": 86400.0}
+
+
+def build_quotas(overrides=None):
+    """DEFAULT_QUOTAS with config "rate_limits" overrides ({tier: {model: {"rpm": ...}}}) merged in"""
+    quotas = {tier: dict(models) for tier, models in DEFAULT_QUOTAS.items()}
+    for tier, models in (overrides or {}).items():
+        for model, limits in models.items():
+            quotas.setdefault(tier, {}).setdefault(model, {})
+            quotas[tier][model] = {**quotas[tier][model], **limits}
+    return quotas
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would have to wait longer than the caller allows; nothing was sent"""
+
+
+class TokenBucket:
+    """Token bucket with reservation semantics: reserving may go negative and returns the wait"""
+
+    def __init__(self, capacity, window_seconds):
+        self.capacity = float(capacity)
+        self.refill_rate = self.capacity / window_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        deficit = max(0.0, amount - self.tokens)
+        return max(deficit / self.refill_rate, self.blocked_until - now)
+
+    def consume(self, amount, now):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def block_for(self, seconds, now):
+        """Drain the bucket and refuse new reservations for seconds (server-side 429)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def remaining(self, now):
+        self._refill(now)
+        return max(0, int(self.tokens))
+
+
+class RateLimiter:
+    """Process-wide limiter pacing requests against per-model RPM/TPM/RPD budgets.
+
+    Budgets are keyed on (tier, model, API key): every key's project has its own
+    quota. acquire() reserves capacity from every applicable bucket and sleeps
+    until the reservation is due, so concurrent callers are spread out instead
+    of all firing into a 429.
+    """
+
+    def __init__(self, quotas=None):
+        self.quotas = DEFAULT_QUOTAS if quotas is None else quotas
+        self.key_quotas = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.paced_requests = 0
+        self.server_rejections = 0
+
+    def set_key_quotas(self, api_key, quotas):
+        """Override the tier budgets for one API key: {model: {"rpm": ..., "tpm": ..., "rpd": ...}}"""
+        with self._lock:
+            fingerprint = key_fingerprint(api_key)
+            self.key_quotas[fingerprint] = quotas
+            for key in [key for key in self._buckets if key[2] == fingerprint]:
+                del self._buckets[key]
+
+    def _buckets_for(self, tier, model, api_key=None):
+        key = (tier, model, key_fingerprint(api_key) if api_key else None)
+        if key not in self._buckets:
+            limits = {**self.quotas.get(tier, {}).get(model, {}),
+                      **self.key_quotas.get(key[2], {}).get(model, {})}
+            self._buckets[key] = {
+                name: TokenBucket(limits[name], _WINDOWS[name])
+                for name in _WINDOWS if limits.get(name)
+            }
+        return self._buckets[key]
+
+    def wait_estimate(self, model, tier, tokens=0, api_key=None):
+        """Seconds a request would have to wait for budget right now, without reserving anything"""
+        with self._lock:
+            buckets = self._buckets_for(tier, model, api_key)
+            now = time.monotonic()
+            amounts = {"rpm": 1, "rpd": 1, "tpm": tokens}
+            return max([bucket.wait_time(amounts[name], now) for name, bucket in buckets.items()] or [0.0])
+
+    def headroom(self, model, tier, api_key=None):
+        """Fraction (0-1) of the tightest request budget (RPM/RPD) left for model, or None if unlimited"""
+        with self._lock:
+            buckets = self._buckets_for(tier, model, api_key)
+            now = time.monotonic()
+            fractions = [bucket.remaining(now) / bucket.capacity for name, bucket in buckets.items() if name != "tpm"]
+            return min(fractions) if fractions else None
+
+    def reserve(self, model, tier, tokens=0, max_wait=None, api_key=None):
+        """Reserve one request (and tokens) for model without sleeping; returns the seconds to wait.
+
+        Callers that get a positive wait must sleep it and then call release_waiter().
+        """
+        with self._lock:
+            buckets = self._buckets_for(tier, model, api_key)
+            if not buckets:
+                return 0.0
+            now = time.monotonic()
+            amounts = {"rpm": 1, "rpd": 1, "tpm": tokens}
+            wait = max(bucket.wait_time(amounts[name], now) for name, bucket in buckets.items())
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitExceeded(
+                    f"{LOCAL_BUDGET_ERROR} for {model} ({tier} tier): next slot in {wait:.0f}s, "
+                    f"over the {max_wait:.0f}s limit (request not sent)")
+            for name, bucket in buckets.items():
+                bucket.consume(amounts[name], now)
+            if wait > 0:
+                self.waiting += 1
+                self.paced_requests += 1
+                self.total_wait += wait
+        if wait > 0:
+            print(f"🚦 Pacing {model} ({tier} tier): waiting {wait:.1f}s for rate budget")
+        return wait
+
+    def release_waiter(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def acquire(self, model, tier, tokens=0, max_wait=None, api_key=None):
+        """Reserve one request (and tokens) for model; blocks and returns the seconds waited"""
+        wait = self.reserve(model, tier, tokens, max_wait, api_key)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self.release_waiter()
+        return wait
+
+    async def acquire_async(self, model, tier, tokens=0, max_wait=None, api_key=None):
+        """Like acquire(), but waits with asyncio.sleep so the event loop keeps running"""
+        import asyncio
+        wait = self.reserve(model, tier, tokens, max_wait, api_key)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.release_waiter()
+        return wait
+
+    def penalize(self, model, tier, retry_after, api_key=None):
+        """Block model until the server-provided retry delay has passed"""
+        with self._lock:
+            self.server_rejections += 1
+            now = time.monotonic()
+            for name, bucket in self._buckets_for(tier, model, api_key).items():
+                if name != "rpd":
+                    bucket.block_for(retry_after, now)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self.waiting,
+                "paced_requests": self.paced_requests,
+                "total_wait_seconds": round(self.total_wait, 2),
+                "server_rejections": self.server_rejections,
+            }
+
+    def status_line(self, model, tier, waited=0.0, api_key=None):
+        with self._lock:
+            buckets = self._buckets_for(tier, model, api_key)
+            now = time.monotonic()
+            parts = [f"{bucket.remaining(now)}/{int(bucket.capacity)} {name.upper()}"
+                     for name, bucket in buckets.items() if name != "tpm"]
+            queue = self.waiting
+        budget = ", ".join(parts) if parts else "unlimited"
+        return f"🚦 Rate budget ({tier}): {budget} left | waited {waited:.1f}s | queue {queue}"
+
+
+def parse_retry_delay(response, default=None):
+    """Extract the retry delay in seconds from a 429 response (Retry-After or retryDelay)"""
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    return retry_delay_from(response.headers, body, default)
+
+
+def retry_delay_from(headers, body, default=None):
+    """Retry delay from response headers and an already-decoded JSON error body"""
+    header = headers.get("Retry-After")
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+
+    if isinstance(body, list) and body:
+        body = body[0]
+    if isinstance(body, dict):
+        for detail in body.get("error", {}).get("details", []):
+            delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+            match = re.match(r"^\s*([\d.]+)s\s*$", str(delay or ""))
+            if match:
+                return float(match.group(1))
+    return default
@@ -0,0 +1,228 @@
+# gemini_tts/response_parser.py
+import json
+import binascii
+import numpy as np
+
+from .pcm import DECODE_BLOCK_CHARS
+
+READ_CHUNK_BYTES = 1 << 16
+_WHITESPACE = b" \t\r\n"
+
+
+class InlineDataParser:
+    """Incremental generateContent response reader that never builds the audio string.
+
+    Body bytes are fed as they arrive. Every inlineData.data string is
+    base64-decoded in fixed-size blocks straight into one growing PCM buffer;
+    the rest of the document (a few KB: mimeType, usageMetadata, finishReason,
+    error payloads) is kept as a skeleton with each data string replaced by ""
+    and parsed with json.loads at the end. Peak memory is the PCM plus one
+    read chunk and one decode block, instead of the body, the parsed dict and
+    the decoded bytes side by side.
+    """
+
+    def __init__(self, size_hint=0, block_chars=DECODE_BLOCK_CHARS):
+        self.block_chars = block_chars - block_chars % 4
+        # Base64 is 4/3 of the PCM, so a body size is a safe first guess at the buffer
+        self._raw = np.empty(max(int(size_hint) * 3 // 4, 1 << 16), dtype=np.uint8)
+        self._pos = 0
+        self._skeleton = bytearray()
+        self._stack = []
+        self._mode = "skeleton"
+        self._string_is_key = False
+        self._string = bytearray()
+        self._escape = False
+        self._pending = bytearray()
+        self.bytes_in = 0
+        self.parts = 0
+
+    def _append_pcm(self, block):
+        end = self._pos + len(block)
+        if end > len(self._raw):
+            grown = np.empty(max(end, len(self._raw) * 2), dtype=np.uint8)
+            grown[:self._pos] = self._raw[:self._pos]
+            self._raw = grown
+        self._raw[self._pos:end] = np.frombuffer(block, dtype=np.uint8)
+        self._pos = end
+
+    def _decode_pending(self, final=False):
+        usable = len(self._pending) if final else len(self._pending) - len(self._pending) % 4
+        if not usable:
+            return
+        try:
+            self._append_pcm(binascii.a2b_base64(self._pending[:usable]))
+        except binascii.Error as error:
+            raise ValueError(f"Invalid base64 audio in response: {error}")
+        del self._pending[:usable]
+
+    def _in_data_field(self):
+        """True when the next string is the value of an inlineData object's "data" key"""
+        if not self._stack:
+            return False
+        top = self._stack[-1]
+        return top[0] == "{" and top[1] == "inlineData" and top[2] == "data" and not top[3]
+
+    def feed(self, chunk):
+        self.bytes_in += len(chunk)
+        i, n = 0, len(chunk)
+        while i < n:
+            if self._mode == "data":
+                i = self._feed_data(chunk, i)
+            elif self._mode == "string":
+                i = self._feed_string(chunk, i)
+            else:
+                i = self._feed_skeleton(chunk, i)
+
+    def _feed_skeleton(self, chunk, i):
+        c = chunk[i:i + 1]
+        if c == b'"':
+            if self._in_data_field():
+                # The audio string itself: decode it on the fly, keep "" in the skeleton
+                self._skeleton += b'""'
+                self._mode = "data"
+                self.parts += 1
+            else:
+                top = self._stack[-1] if self._stack else None
+                self._string_is_key = top is not None and top[0] == "{" and top[3]
+                self._string = bytearray(b'"')
+                self._escape = False
+                self._mode = "string"
+            return i + 1
+        if c in b"{[":
+            parent = self._stack[-1] if self._stack else None
+            name = parent[2] if parent is not None and parent[0] == "{" else None
+            # [container, its key in the parent, current key, expecting a key]
+            self._stack.append([c.decode(), name, None, c == b"{"])
+        elif c in b"}]":
+            if self._stack:
+                self._stack.pop()
+        elif c == b":":
+            if self._stack:
+                self._stack[-1][3] = False
+        elif c == b",":
+            if self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][3] = True
+        elif c in _WHITESPACE:
+            return i + 1
+        self._skeleton += c
+        return i + 1
+
+    def _feed_string(self, chunk, i):
+        n = len(chunk)
+        while i < n:
+            if self._escape:
+                self._string.append(chunk[i])
+                self._escape = False
+                i += 1
+                continue
+            end = chunk.find(b'"', i)
+            backslash = chunk.find(b"\\", i, end if end >= 0 else n)
+            if backslash >= 0:
+                self._string += chunk[i:backslash + 1]
+                self._escape = True
+                i = backslash + 1
+                continue
+            if end < 0:
+                self._string += chunk[i:]
+                return n
+            self._string += chunk[i:end + 1]
+            if self._string_is_key:
+                self._stack[-1][2] = json.loads(bytes(self._string))
+            self._skeleton += self._string
+            self._string = bytearray()
+            self._mode = "skeleton"
+            return end + 1
+        return n
+
+    def _feed_data(self, chunk, i):
+        end = chunk.find(b'"', i)
+        segment = chunk[i:] if end < 0 else chunk[i:end]
+        if self._escape:
+            segment = b"\\" + segment
+            self._escape = False
+        if b"\\" in segment:
+            # Escaped solidus or wrapped lines; base64 itself has no backslashes
+            if segment.endswith(b"\\") and (len(segment) - len(segment.rstrip(b"\\"))) % 2:
+                segment = segment[:-1]
+                self._escape = True
+            segment = segment.replace(b"\\/", b"/").replace(b"\\n", b"").replace(b"\\r", b"")
+        self._pending += segment
+        if end < 0:
+            if len(self._pending) >= self.block_chars:
+                self._decode_pending()
+            return len(chunk)
+        # One part ends here; flush it with its padding before the next part starts
+        self._decode_pending(final=True)
+        self._mode = "skeleton"
+        return end + 1
+
+    def close(self):
+        """Finish parsing; returns a dict with pcm (int16 array or None), mime_type, usage_metadata,
+        finish_reason, error and the skeleton document (data strings emptied)"""
+        if self._mode != "skeleton" or self._stack:
+            raise ValueError("Truncated JSON response")
+        try:
+            document = json.loads(bytes(self._skeleton)) if self._skeleton else None
+        except ValueError as error:
+            raise ValueError(f"Invalid JSON response: {error}")
+        responses = document if isinstance(document, list) else [document]
+
+        result = {"pcm": None, "mime_type": None, "usage_metadata": None, "finish_reason": None,
+                  "error": None, "document": document}
+        for response in responses:
+            if not isinstance(response, dict):
+                continue
+            result["error"] = result["error"] or response.get("error")
+            result["usage_metadata"] = response.get("usageMetadata") or result["usage_metadata"]
+            for candidate in response.get("candidates") or []:
+                result["finish_reason"] = candidate.get("finishReason") or result["finish_reason"]
+                for part in (candidate.get("content") or {}).get("parts") or []:
+                    inline = part.get("inlineData")
+                    if inline and not result["mime_type"]:
+                        result["mime_type"] = inline.get("mimeType")
+        if self.parts:
+            pos = self._pos - self._pos % 2
+            result["pcm"] = self._raw[:pos].view("<i2")
+        return result
+
+
+def parse_inline_response(response, chunk_bytes=READ_CHUNK_BYTES):
+    """Stream a requests.Response (sent with stream=True) through InlineDataParser"""
+    try:
+        size_hint = int(response.headers.get("Content-Length") or 0)
+    except ValueError:
+        size_hint = 0
+    if response.headers.get("Content-Encoding"):
+        # Content-Length counts compressed bytes; the decoded body is larger
+        size_hint *= 3
+    parser = InlineDataParser(size_hint)
+    for chunk in response.iter_content(chunk_size=chunk_bytes):
+        parser.feed(chunk)
+    result = parser.close()
+    result["bytes_in"] = parser.bytes_in
+    return result
+
+
+def parse_inline_body(body, chunk_bytes=READ_CHUNK_BYTES):
+    """InlineDataParser over a body that is already in memory (skips the dict and the data string copy)"""
+    parser = InlineDataParser(len(body))
+    view = memoryview(body)
+    for start in range(0, len(body), chunk_bytes):
+        parser.feed(bytes(view[start:start + chunk_bytes]))
+    result = parser.close()
+    result["bytes_in"] = parser.bytes_in
+    return result
+
+
+def audio_from_result(result):
+    """int16 PCM from a parsed response, raising the same errors as the dict-based path"""
+    if result["error"]:
+        raise Exception(f"REST API error in response body: {result['error']}")
+    if result["pcm"] is None:
+        document = result["document"]
+        if isinstance(document, list):
+            document = document[0] if document else {}
+        if not (isinstance(document, dict) and document.get("candidates")):
+            raise Exception("Invalid REST response structure")
+        raise Exception("No audio data found in REST response")
+    return result["pcm"]
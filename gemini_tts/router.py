@@ -0,0 +1,135 @@
+# gemini_tts/router.py
+import threading
+from collections import deque
+
+import numpy as np
+
+from .circuit_breaker import CLOSED
+
+PRO_MODEL = "gemini-2.5-pro-preview-tts"
+FLASH_MODEL = "gemini-2.5-flash-preview-tts"
+AUTO_MODEL = "auto"
+PREFERENCES = ["balanced", "quality", "speed"]
+
+# Stages that together make up a request's time on the wire (headers and body are timed apart)
+REQUEST_STAGES = ("http", "body_parse", "stream")
+
+# (fixed seconds, seconds per character) guesses used until a model has enough history
+DEFAULT_LATENCY = {PRO_MODEL: (3.0, 0.02), FLASH_MODEL: (1.5, 0.01)}
+
+# How much slower than Flash Pro may be expected to be (ratio, plus extra seconds) and the share
+# of Pro's request budget kept in reserve before a preference moves a request to Flash
+ROUTING_POLICIES = {
+    "quality": {"slowdown": 3.0, "slack": 30.0, "reserve": 0.0},
+    "balanced": {"slowdown": 1.5, "slack": 5.0, "reserve": 0.2},
+    "speed": {"slowdown": 1.0, "slack": 0.0, "reserve": 0.0},
+}
+
+
+def request_seconds(trace):
+    """Seconds a traced request spent on the wire, excluding queueing for rate budget"""
+    return sum(trace.stages.get(stage, 0.0) for stage in REQUEST_STAGES)
+
+
+def short_name(model):
+    return "Pro" if "pro" in model else "Flash" if "flash" in model else model
+
+
+class ModelRouter:
+    """Choose Pro or Flash for each request sent with the "auto" model.
+
+    Recent requests give each model a latency estimate (observed times scaled
+    to the request's length) and an error rate. A request's expected cost on a
+    model is that latency plus the wait for rate budget, divided by the chance
+    of it succeeding. Pro is chosen while its cost stays within the
+    preference's slowdown of Flash's and more than the preference's reserve
+    of its request budget is left; a model whose circuit is open on every key
+    is ruled out. preference is used when a request does not name one.
+    """
+
+    def __init__(self, window=50, min_samples=5, overhead_chars=200, max_error_rate=0.5, preference="balanced"):
+        self.preference = preference
+        self.window = window
+        self.min_samples = min_samples
+        self.overhead_chars = overhead_chars
+        self.max_error_rate = max_error_rate
+        self._history = {}
+        self._lock = threading.Lock()
+        self.decisions = {PRO_MODEL: 0, FLASH_MODEL: 0}
+
+    def record(self, model, seconds, chars, ok=True):
+        with self._lock:
+            history = self._history.setdefault(model, deque(maxlen=self.window))
+            history.append((seconds, chars, ok))
+
+    def estimate(self, model, chars):
+        """(predicted seconds for chars characters, recent error rate) for model"""
+        with self._lock:
+            history = list(self._history.get(model, ()))
+        good = [(seconds, sample_chars) for seconds, sample_chars, ok in history if ok]
+        errors = (len(history) - len(good)) / len(history) if len(history) >= self.min_samples else 0.0
+        if len(good) < self.min_samples:
+            fixed, per_char = DEFAULT_LATENCY.get(model, DEFAULT_LATENCY[FLASH_MODEL])
+            return fixed + per_char * chars, errors
+        # Scale each observation to this length; the overhead term stands in for fixed per-request cost
+        seconds, sample_chars = np.array(good, dtype=np.float64).T
+        scaled = seconds * (chars + self.overhead_chars) / (sample_chars + self.overhead_chars)
+        return float(np.median(scaled)), errors
+
+    def _model_view(self, model, chars, tier, limiter, breaker, keys):
+        latency, errors = self.estimate(model, chars)
+        tokens = chars / 4
+        blocked_for = None
+        if breaker is not None:
+            reopens = []
+            for api_key, _ in keys:
+                state, remaining = breaker.snapshot(api_key).get(model, (CLOSED, 0.0))
+                reopens.append(remaining if state != CLOSED else 0.0)
+            if reopens and min(reopens) > 0:
+                blocked_for = min(reopens)
+        wait, headroom = 0.0, None
+        if limiter is not None:
+            wait = min(limiter.wait_estimate(model, key_tier or tier, tokens, api_key) for api_key, key_tier in keys)
+            fractions = [limiter.headroom(model, key_tier or tier, api_key) for api_key, key_tier in keys]
+            fractions = [fraction for fraction in fractions if fraction is not None]
+            headroom = max(fractions) if fractions else None
+        return {"latency": latency, "errors": errors, "wait": wait, "headroom": headroom,
+                "blocked_for": blocked_for, "cost": (latency + wait) / max(0.1, 1.0 - errors)}
+
+    def choose(self, chars, preference=None, tier="free", limiter=None, breaker=None, keys=None):
+        """Return (model, reason) for a request of chars characters.
+
+        keys is a list of (api_key, tier or None) the request may be sent with;
+        limiter and breaker are the shared RateLimiter and CircuitBreaker.
+        """
+        preference = preference or self.preference
+        policy = ROUTING_POLICIES.get(preference, ROUTING_POLICIES["balanced"])
+        keys = keys or [(None, None)]
+        pro = self._model_view(PRO_MODEL, chars, tier, limiter, breaker, keys)
+        flash = self._model_view(FLASH_MODEL, chars, tier, limiter, breaker, keys)
+        estimates = f"Pro ~{pro['cost']:.1f}s vs Flash ~{flash['cost']:.1f}s for {chars} chars"
+
+        if pro["blocked_for"] and not flash["blocked_for"]:
+            model, reason = FLASH_MODEL, f"Pro circuit open ({pro['blocked_for']:.0f}s left)"
+        elif flash["blocked_for"] and not pro["blocked_for"]:
+            model, reason = PRO_MODEL, f"Flash circuit open ({flash['blocked_for']:.0f}s left)"
+        elif pro["blocked_for"] and flash["blocked_for"]:
+            model = PRO_MODEL if pro["blocked_for"] < flash["blocked_for"] else FLASH_MODEL
+            reason = f"both circuits open, {short_name(model)} reopens first"
+        elif pro["errors"] >= self.max_error_rate and flash["errors"] < self.max_error_rate:
+            model, reason = FLASH_MODEL, f"Pro failing ({pro['errors']:.0%} of recent requests)"
+        elif pro["headroom"] is not None and pro["headroom"] < policy["reserve"]:
+            model = FLASH_MODEL
+            reason = f"Pro quota {pro['headroom']:.0%} left, keeping {policy['reserve']:.0%} in reserve"
+        elif pro["cost"] > flash["cost"] * policy["slowdown"] + policy["slack"]:
+            model, reason = FLASH_MODEL, estimates
+        else:
+            model, reason = PRO_MODEL, estimates
+        with self._lock:
+            self.decisions[model] = self.decisions.get(model, 0) + 1
+        return model, f"{preference}: {reason}"
+
+    def status_line(self):
+        with self._lock:
+            pro, flash = self.decisions.get(PRO_MODEL, 0), self.decisions.get(FLASH_MODEL, 0)
+        return f"🧭 Auto routing: {pro} Pro / {flash} Flash so far"
@@ -0,0 +1,104 @@
+# gemini_tts/singleflight.py
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight block and receive the very same result object (or exception)
+    instead of issuing their own request. Nothing is retained once the call
+    completes; completed results are the audio cache's job.
+
+    do_async() is the event-loop counterpart: coroutines on the same loop
+    await the leader's future instead of blocking a thread. Blocking and
+    async callers are tracked separately and never wait on each other.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() once per in-flight key; returns (result, shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key, fn):
+        """Await fn() once per in-flight key on the running loop; returns (result, shared)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._async_calls.get((loop, key))
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self._async_calls[(loop, key)] = loop.create_future()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            # shield: a cancelled follower must not cancel the leader's result for the others
+            return await asyncio.shield(future), True
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Mark the exception retrieved so a leader without followers logs no warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._async_calls[(loop, key)]
+        return result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls) + len(self._async_calls)
+
+    def status_line(self):
+        with self._lock:
+            return f"🔗 Coalesced: {self.coalesced} of {self.executed + self.coalesced} calls shared an in-flight request"
@@ -0,0 +1,95 @@
+# gemini_tts/streaming.py
+import json
+import time
+import base64
+import numpy as np
+
+
+def iter_sse_events(response):
+    """Yield the JSON payload of every `data:` event in a server-sent events response"""
+    data_lines = []
+    for line in response.iter_lines(chunk_size=8192):
+        if not line:
+            if data_lines:
+                yield json.loads(b"\n".join(data_lines))
+                data_lines = []
+            continue
+        if line.startswith(b"data:"):
+            data_lines.append(line[5:].lstrip())
+    if data_lines:
+        yield json.loads(b"\n".join(data_lines))
+
+
+def iter_inline_data(event):
+    """Yield (mime_type, base64 data) for every inlineData part in a response event"""
+    for candidate in event.get("candidates", []):
+        for part in candidate.get("content", {}).get("parts", []):
+            inline = part.get("inlineData")
+            if inline and inline.get("data"):
+                yield inline.get("mimeType", ""), inline["data"]
+
+
+class StreamingPCMDecoder:
+    """Decode inlineData chunks into a growing int16 PCM buffer as they arrive.
+
+    on_chunk(new_samples, total_samples) is called after every decoded chunk
+    with an int16 view of the newly appended samples, which lets callers
+    drive progress bars or play a preview before the stream completes.
+    """
+
+    def __init__(self, on_chunk=None):
+        self.on_chunk = on_chunk
+        self.buffer = bytearray()
+        self.usage_metadata = None
+        self.mime_type = None
+        self.events = 0
+
+    @property
+    def total_samples(self):
+        return len(self.buffer) // 2
+
+    def feed(self, event):
+        self.events += 1
+        if "usageMetadata" in event:
+            self.usage_metadata = event["usageMetadata"]
+
+        for mime_type, data in iter_inline_data(event):
+            self.mime_type = self.mime_type or mime_type
+            start = self.total_samples * 2
+            self.buffer += base64.b64decode(data)
+            end = len(self.buffer) - len(self.buffer) % 2
+            if self.on_chunk and end > start:
+                # Copy the slice: a live view would pin the bytearray and block resizing
+                new_samples = np.frombuffer(self.buffer[start:end], dtype=np.int16)
+                self.on_chunk(new_samples, end // 2)
+
+    def pcm_bytes(self):
+        """Return the accumulated PCM, dropping a trailing odd byte if the stream ended mid-sample"""
+        return bytes(self.buffer[:self.total_samples * 2])
+
+
+def read_pcm_stream(response, on_chunk=None, started_at=None):
+    """Consume a streamGenerateContent SSE response into raw int16 PCM.
+
+    Returns (pcm_bytes, timings) where timings holds the time to the first
+    response byte, the first decoded audio and the complete stream, measured
+    from started_at (defaults to now), plus the number of body bytes read.
+    """
+    started_at = started_at if started_at is not None else time.time()
+    decoder = StreamingPCMDecoder(on_chunk=on_chunk)
+    timings = {"first_byte": None, "first_audio": None, "total": None}
+
+    for event in iter_sse_events(response):
+        if timings["first_byte"] is None:
+            timings["first_byte"] = time.time() - started_at
+        if "error" in event:
+            raise Exception(f"Streaming API error: {event['error']}")
+        decoder.feed(event)
+        if timings["first_audio"] is None and decoder.total_samples:
+            timings["first_audio"] = time.time() - started_at
+
+    timings["total"] = time.time() - started_at
+    timings["bytes_in"] = response.raw.tell() if hasattr(response.raw, "tell") else len(decoder.buffer)
+    if not decoder.total_samples:
+        raise Exception("No audio data found in streaming response")
+    return decoder.pcm_bytes(), timings
@@ -1,13 +1,38 @@
 # Gemini_TTS_Node.py
 import os
+import sys
+import atexit
 import json
-import base64
-import tempfile
 import torch
-import torchaudio
 import numpy as np
-from io import BytesIO
-import google.generativeai as genai
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from .gemini_tts.cache import AudioCache
+from .gemini_tts.http_client import GeminiHTTPClient, API_BASE_URL, build_tts_payload
+from .gemini_tts.chunking import (split_instruction, split_text, split_sentences, stitch_pcm, stitch_offsets,
+                                  trim_silence)
+from .gemini_tts.postprocess import postprocess_waveform, NORMALIZE_MODES
+from .gemini_tts.incremental import normalize_sentence, plan_resynthesis, splice_render
+from .gemini_tts.batch import parse_batch_prompts, pad_segments
+from .gemini_tts.packing import plan_packs, packed_prompt, split_packed
+from .gemini_tts.dialogue import (parse_speaker_voices, parse_dialogue, plan_dialogue_requests,
+                                  group_speakers, dialogue_prompt, estimate_turn_times)
+from .gemini_tts.streaming import read_pcm_stream
+from .gemini_tts.response_parser import parse_inline_response, audio_from_result
+from .gemini_tts.rate_limiter import RateLimiter, build_quotas, parse_retry_delay, LOCAL_BUDGET_ERROR
+from .gemini_tts.circuit_breaker import CircuitBreaker, key_fingerprint
+from .gemini_tts.key_pool import KeyPool, parse_key_entries
+from .gemini_tts.hedging import HedgePolicy, run_hedged, run_hedged_async
+from .gemini_tts.router import (ModelRouter, AUTO_MODEL, PRO_MODEL, FLASH_MODEL, PREFERENCES, request_seconds,
+                                short_name)
+from .gemini_tts.pcm import int16_to_float32, float32_to_int16
+from .gemini_tts.metrics import MetricsRegistry
+from .gemini_tts.singleflight import SingleFlight
+from .gemini_tts.prefetch import PrefetchService, constant_nodes, call_inputs, input_key
+from .gemini_tts.async_engine import AsyncTTSEngine
+from .gemini_tts.job_queue import JobQueue, JobRunner
+from .gemini_tts.dataset import ShardWriter, SHARD_BYTES
 
 p = os.path.dirname(os.path.realpath(__file__))
 
@@ -20,10 +45,157 @@ def get_config():
     except:
         return {}
 
+_config_lock = threading.Lock()
+
 def save_config(config):
     config_path = os.path.join(p, 'config.json')
-    with open(config_path, 'w') as f:
-        json.dump(config, f, indent=4)
+    with _config_lock:
+        # Merge so settings that are not node inputs (cache, ...) survive a key update
+        current = get_config()
+        merged = {**current, **config}
+        if merged == current:
+            return
+        # Replace the file in one step so a concurrent get_config never sees it half written
+        temp_path = f"{config_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(merged, f, indent=4)
+        os.replace(temp_path, config_path)
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+def get_audio_cache():
+    """Return the process-wide audio cache configured from config.json"""
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            config = get_config()
+            cache_dir = config.get("cache_dir") or os.path.join(p, "audio_cache")
+            max_mb = float(config.get("cache_max_mb", 2048))
+            max_age_days = float(config.get("cache_max_age_days", 30))
+            _audio_cache = AudioCache(cache_dir, max_bytes=int(max_mb * 1024 * 1024),
+                                      max_age_seconds=max_age_days * 86400)
+        return _audio_cache
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+def get_http_client():
+    """Return the process-wide pooled HTTP client configured from config.json"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            config = get_config()
+            # GEMINI_API_BASE_URL points the node at another endpoint, e.g. gemini_tts.mock_server
+            base_url = os.environ.get("GEMINI_API_BASE_URL") or config.get("api_base_url") or API_BASE_URL
+            _http_client = GeminiHTTPClient(
+                pool_size=int(config.get("http_pool_size", 10)),
+                connect_timeout=float(config.get("http_connect_timeout", 10)),
+                read_timeout=float(config["http_read_timeout"]) if config.get("http_read_timeout") else None,
+                base_url=base_url,
+            )
+        return _http_client
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter shared by every node, or None if disabled"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            config = get_config()
+            # False remembers "disabled" so config.json is not read again on every request
+            _rate_limiter = (RateLimiter(build_quotas(config.get("rate_limits")))
+                             if config.get("rate_limiter_enabled", True) else False)
+        return _rate_limiter or None
+
+_request_settings = None
+_request_settings_lock = threading.Lock()
+
+def get_request_settings():
+    """Per-request config values that belong to no shared object, read once like the singletons"""
+    global _request_settings
+    with _request_settings_lock:
+        if _request_settings is None:
+            config = get_config()
+            _request_settings = {"max_wait": float(config.get("rate_limit_max_wait", 120))}
+        return _request_settings
+
+_circuit_breaker = None
+_circuit_breaker_lock = threading.Lock()
+
+def get_circuit_breaker():
+    """Return the process-wide per-model circuit breaker"""
+    global _circuit_breaker
+    with _circuit_breaker_lock:
+        if _circuit_breaker is None:
+            config = get_config()
+            _circuit_breaker = CircuitBreaker(
+                minute_cooldown=float(config.get("breaker_minute_cooldown", 60)),
+                daily_cooldown=float(config.get("breaker_daily_cooldown", 3600)),
+            )
+        return _circuit_breaker
+
+_hedge_policy = None
+_hedge_policy_lock = threading.Lock()
+
+def get_hedge_policy():
+    """Return the process-wide request hedging policy, or None unless hedge_requests is enabled"""
+    global _hedge_policy
+    with _hedge_policy_lock:
+        if _hedge_policy is None:
+            config = get_config()
+            if not config.get("hedge_requests", False):
+                _hedge_policy = False
+                return None
+            _hedge_policy = HedgePolicy(
+                percentile=float(config.get("hedge_percentile", 95)),
+                max_ratio=float(config.get("hedge_max_ratio", 0.05)),
+                min_samples=int(config.get("hedge_min_samples", 20)),
+                min_delay=float(config.get("hedge_min_delay", 1.0)),
+                backup=config.get("hedge_backup", "same"),
+            )
+        return _hedge_policy or None
+
+_model_router = None
+_model_router_lock = threading.Lock()
+
+def get_model_router():
+    """Return the process-wide Pro/Flash router used by the "auto" model"""
+    global _model_router
+    with _model_router_lock:
+        if _model_router is None:
+            config = get_config()
+            _model_router = ModelRouter(
+                window=int(config.get("auto_model_window", 50)),
+                max_error_rate=float(config.get("auto_model_max_error_rate", 0.5)),
+                preference=config.get("auto_model_preference", "balanced"),
+            )
+        return _model_router
+
+_key_pool = None
+_key_pool_lock = threading.Lock()
+
+def get_key_pool():
+    """Return the process-wide API key pool (config api_keys / GEMINI_API_KEYS), or None if not configured"""
+    global _key_pool
+    with _key_pool_lock:
+        if _key_pool is None:
+            entries = parse_key_entries(get_config().get("api_keys"), os.environ.get("GEMINI_API_KEYS", ""))
+            if not entries:
+                _key_pool = False
+                return None
+            limiter = get_rate_limiter()
+            pool = KeyPool()
+            for entry in entries:
+                rate_limits = entry.pop("rate_limits", None)
+                pool.add(**entry)
+                if rate_limits and limiter:
+                    limiter.set_key_quotas(entry["api_key"], rate_limits)
+            print(f"🔑 API key pool: {len(pool)} keys")
+            _key_pool = pool
+        return _key_pool or None
 
 # Official Gemini TTS voices with exact gender information updated from provided list
 GEMINI_VOICES_WITH_GENDER = [
@@ -103,6 +275,254 @@ VOICE_CHARACTERISTICS_UPDATED = {
     "Zubenelgenubi": "Male • Casual and conversational",
 }
 
+# Callables invoked as hook(new_samples, total_samples, sample_rate) while a streamed
+# response is decoded; new_samples is an int16 numpy array of the samples just received
+STREAM_PREVIEW_HOOKS = []
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """Return the process-wide metrics registry, starting the /metrics endpoint if configured"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            config = get_config()
+            _metrics = MetricsRegistry(textfile=config.get("metrics_textfile"))
+            port = config.get("metrics_port")
+            if port:
+                try:
+                    _metrics.serve(int(port))
+                    print(f"📈 Metrics endpoint: http://127.0.0.1:{port}/metrics")
+                except OSError as serve_error:
+                    print(f"⚠️ Could not start metrics endpoint on port {port}: {serve_error}")
+        return _metrics
+
+def export_metrics():
+    """Write the Prometheus text file if metrics_textfile is configured"""
+    metrics = get_metrics()
+    path = metrics.textfile
+    if path:
+        try:
+            metrics.write_textfile(path)
+        except OSError as export_error:
+            print(f"⚠️ Could not write metrics file {path}: {export_error}")
+
+_async_engine = None
+_async_engine_lock = threading.Lock()
+
+def get_async_engine():
+    """Return the process-wide asyncio engine sharing the pooled client's endpoint settings"""
+    global _async_engine
+    with _async_engine_lock:
+        if _async_engine is None:
+            max_concurrency = int(get_config().get("async_max_concurrency", 8))
+            _async_engine = AsyncTTSEngine(get_http_client(), max_concurrency=max_concurrency)
+        return _async_engine
+
+# Collapses identical concurrent requests (same model and payload) into one HTTP call
+_single_flight = SingleFlight()
+
+def get_single_flight():
+    return _single_flight
+
+_job_queue = None
+_job_runner = None
+_job_lock = threading.Lock()
+
+def job_queue_path():
+    return get_config().get("job_queue_db") or os.path.join(p, "jobs.sqlite3")
+
+def job_output_dir():
+    """Where queued jobs write their WAV files: config job_output_dir, else ComfyUI's output folder"""
+    configured = get_config().get("job_output_dir")
+    if configured:
+        return configured
+    try:
+        import folder_paths
+        return os.path.join(folder_paths.get_output_directory(), "gemini_tts_jobs")
+    except ImportError:
+        return os.path.join(p, "job_outputs")
+
+_dataset_writers = {}
+_dataset_lock = threading.Lock()
+
+def output_path(path):
+    """Resolve a relative output path against ComfyUI's output folder (the node folder outside ComfyUI)"""
+    if os.path.isabs(path):
+        return path
+    try:
+        import folder_paths
+        return os.path.join(folder_paths.get_output_directory(), path)
+    except ImportError:
+        return os.path.join(p, path)
+
+def get_dataset_writer(dataset_dir):
+    """Return the process-wide shard writer for a dataset directory (one writer per directory)"""
+    root = os.path.abspath(output_path(dataset_dir.strip()))
+    with _dataset_lock:
+        writer = _dataset_writers.get(root)
+        if writer is None:
+            if not _dataset_writers:
+                atexit.register(close_dataset_writers)
+            shard_bytes = int(float(get_config().get("dataset_shard_mb", SHARD_BYTES / 2 ** 20)) * 2 ** 20)
+            writer = _dataset_writers[root] = ShardWriter(root, shard_bytes)
+        return writer
+
+def close_dataset_writers():
+    """Trim and close every open dataset writer (they reopen on their next append)"""
+    with _dataset_lock:
+        writers = list(_dataset_writers.values())
+    for writer in writers:
+        try:
+            writer.close()
+        except OSError as close_error:
+            print(f"⚠️ Could not close dataset {writer.root}: {close_error}")
+
+def get_job_queue():
+    """Return the process-wide SQLite job queue"""
+    global _job_queue
+    with _job_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(job_queue_path())
+        return _job_queue
+
+def get_job_runner():
+    """Return the process-wide background runner that drains the job queue"""
+    global _job_runner
+    queue = get_job_queue()
+    with _job_lock:
+        if _job_runner is None:
+            workers = int(get_config().get("job_queue_workers", 1))
+            dataset_dir = get_config().get("job_dataset_dir")
+            dataset = get_dataset_writer(dataset_dir) if dataset_dir else None
+            _job_runner = JobRunner(queue, synthesize_job_item, job_output_dir(), workers=workers, dataset=dataset)
+        return _job_runner
+
+def synthesize_job_item(item):
+    """Synthesize one queued item through the regular request path; returns int16 PCM"""
+    # A fresh node resolves the API key (env, then config.json) every time, so a restarted
+    # process picks up the key that was saved when the job was queued
+    node = GeminiTTS()
+    if not node.api_key:
+        raise Exception("API key required to run queued jobs (set GEMINI_API_KEY or save one from a node)")
+    options = item["options"]
+    use_paid_tier = options.get("use_paid_tier", False)
+    audio, _ = node.try_official_tts(item["prompt"], item["model"], item["voice"], item["temperature"],
+                                     use_paid_tier, options.get("billing_project_id", ""),
+                                     5 if use_paid_tier else 1, False, True)
+    return float32_to_int16(audio["waveform"][0, 0].numpy())
+
+_jobs_resumed = False
+
+def resume_pending_jobs():
+    """Restart the job runner if the queue still has unfinished items (once per process)"""
+    global _jobs_resumed
+    with _job_lock:
+        if _jobs_resumed:
+            return
+        _jobs_resumed = True
+    if not get_config().get("job_queue_autoresume", True) or not os.path.exists(job_queue_path()):
+        return
+    try:
+        if get_job_queue().next_due() is not None:
+            print(f"🗂️ Resuming queued TTS jobs: {get_job_queue().counts()}")
+            get_job_runner().start()
+    except Exception as resume_error:
+        print(f"⚠️ Could not resume queued TTS jobs: {resume_error}")
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher():
+    """Return the process-wide prefetch service (it only starts threads once something is prefetched)"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            config = get_config()
+            _prefetcher = PrefetchService(workers=int(config.get("prefetch_workers", 4)),
+                                          ttl=float(config.get("prefetch_ttl", 600)),
+                                          enabled=bool(config.get("prefetch_enabled", False)))
+            if _prefetcher.enabled:
+                print("🛰️ Gemini TTS prefetch enabled")
+        return _prefetcher
+
+def prefetch_prompt(json_data):
+    """ComfyUI on-prompt handler: start every GeminiTTS node whose inputs are all constants right away"""
+    try:
+        if not get_prefetcher().enabled:
+            return json_data
+        started = 0
+        for node_id, inputs in constant_nodes(json_data.get("prompt") or {}, ("GeminiTTS",)):
+            # Incremental renders depend on the node's previous run, streaming is about seeing audio early
+            if inputs.get("incremental_resynthesis") or inputs.get("stream_response"):
+                continue
+            inputs = call_inputs(GeminiTTS.generate_speech, inputs)
+            key = input_key(GeminiTTS.generate_speech, inputs)
+            started += get_prefetcher().submit(key, lambda inputs=inputs: prefetch_speech(inputs))
+        if started:
+            print(f"🛰️ Prefetching {started} Gemini TTS node(s) for the queued prompt")
+    except Exception as prefetch_error:
+        print(f"⚠️ Could not prefetch Gemini TTS nodes: {prefetch_error}")
+    return json_data
+
+def prefetch_speech(inputs):
+    node = GeminiTTS()
+    node.prefetching = True
+    return node.generate_speech(**inputs)
+
+def is_success_status(status):
+    return status.startswith("✅") or status.startswith("⚠️ Fallback Success")
+
+def is_rate_limited(error_str):
+    return "429" in error_str or "RESOURCE_EXHAUSTED" in error_str
+
+def classify_error(error_str):
+    """Which handler a failed request goes to: local_budget, rate_limited, invalid_key, billing or other"""
+    if LOCAL_BUDGET_ERROR in error_str:
+        return "local_budget"
+    if is_rate_limited(error_str):
+        return "rate_limited"
+    if "API key not valid" in error_str or "INVALID_ARGUMENT" in error_str:
+        return "invalid_key"
+    if ("PERMISSION_DENIED" in error_str or "billing" in error_str.lower() or "USER_PROJECT_DENIED" in error_str
+            or "not found or deleted" in error_str):
+        return "billing"
+    return "other"
+
+def resolve_voice(voice):
+    """Convert a display name like "[M] Puck" to its API voice name"""
+    for display_name, api_name in GEMINI_VOICES_WITH_GENDER:
+        if display_name == voice:
+            return api_name
+    return voice
+
+OUTPUT_SAMPLE_RATES = ["24000", "16000", "22050", "32000", "44100", "48000"]
+
+def postprocess_options(output_sample_rate, trim_silence_db, normalize_loudness, target_level):
+    """Keyword arguments for postprocess_waveform, or None when every step is off"""
+    options = {
+        "target_sample_rate": int(output_sample_rate) if int(output_sample_rate) != 24000 else 0,
+        "trim_db": trim_silence_db if trim_silence_db < 0 else None,
+        "normalize": normalize_loudness,
+        "target_level": target_level,
+    }
+    if not options["target_sample_rate"] and options["trim_db"] is None and normalize_loudness == "off":
+        return None
+    return options
+
+def voice_label(voice):
+    """Readable voice name for logs and metric labels, e.g. "Kore+Puck" for a speaker mapping"""
+    if isinstance(voice, dict):
+        return "+".join(voice.values())
+    return voice
+
+def voice_details(voice, show_voice_info):
+    """Status line describing the voice when show_voice_info is on ("" otherwise)"""
+    if show_voice_info and voice in VOICE_CHARACTERISTICS_UPDATED:
+        return f"\n🎭 Voice: {VOICE_CHARACTERISTICS_UPDATED[voice]}"
+    return ""
+
 class GeminiTTS:
     def __init__(self, api_key=None):
         env_key = os.environ.get("GEMINI_API_KEY")
@@ -119,12 +539,18 @@ class GeminiTTS:
                 config = get_config()
                 self.api_key = config.get("GEMINI_API_KEY")
 
+        # A configured key pool is enough on its own
+        if not self.api_key:
+            pool = get_key_pool()
+            if pool is not None:
+                self.api_key = pool.primary_key()
+
     @classmethod
     def INPUT_TYPES(cls):
         return {
             "required": {
                 "prompt": ("STRING", {"default": "Say: Hello, this is a test of Gemini text-to-speech.", "multiline": True}),
-                "tts_model": (["gemini-2.5-pro-preview-tts", "gemini-2.5-flash-preview-tts"], {"default": "gemini-2.5-pro-preview-tts"}),
+                "tts_model": (["gemini-2.5-pro-preview-tts", "gemini-2.5-flash-preview-tts", AUTO_MODEL], {"default": "gemini-2.5-pro-preview-tts"}),
                 "voice": (GEMINI_VOICES_DISPLAY, {"default": "[M] Puck"}),
                 "temperature": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 2.0, "step": 0.1}),
             },
@@ -136,6 +562,19 @@ class GeminiTTS:
                 "billing_project_id": ("STRING", {"default": ""}),
                 "aggressive_retry": ("BOOLEAN", {"default": False}),
                 "show_voice_info": ("BOOLEAN", {"default": False}),
+                "use_cache": ("BOOLEAN", {"default": True}),
+                "chunk_long_text": ("BOOLEAN", {"default": False}),
+                "max_chunk_chars": ("INT", {"default": 1500, "min": 200, "max": 8000, "step": 100}),
+                "parallel_chunks": ("INT", {"default": 3, "min": 1, "max": 8}),
+                "chunk_pause_ms": ("INT", {"default": 250, "min": 0, "max": 2000, "step": 10}),
+                "stream_response": ("BOOLEAN", {"default": False}),
+                "include_metrics": ("BOOLEAN", {"default": False}),
+                "incremental_resynthesis": ("BOOLEAN", {"default": False}),
+                "output_sample_rate": (OUTPUT_SAMPLE_RATES, {"default": "24000"}),
+                "trim_silence_db": ("FLOAT", {"default": 0.0, "min": -90.0, "max": 0.0, "step": 1.0}),
+                "normalize_loudness": (NORMALIZE_MODES, {"default": "off"}),
+                "target_level": ("FLOAT", {"default": -16.0, "min": -40.0, "max": -1.0, "step": 0.5}),
+                "auto_preference": (PREFERENCES, {"default": "balanced"}),
             }
         }
 
@@ -144,55 +583,75 @@ class GeminiTTS:
     FUNCTION = "generate_speech"
     CATEGORY = "Gemini TTS"
 
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        # Same inputs, same audio: let ComfyUI reuse the cached output, unless that output was a failure.
+        # Only generate_speech records outcomes; subclasses keep plain input-based caching.
+        key = input_key(getattr(cls, cls.FUNCTION), kwargs)
+        if cls is GeminiTTS and get_prefetcher().outcome(key) is False:
+            return float("nan")
+        return key
+
     def generate_speech(self, prompt, tts_model="gemini-2.5-pro-preview-tts", voice="[M] Puck", 
                        temperature=1.0, api_key="", auto_fallback_to_flash=True, retry_delay=30, 
                        use_paid_tier=False, billing_project_id="", aggressive_retry=False, 
-                       show_voice_info=False):
+                       show_voice_info=False, use_cache=True, chunk_long_text=False, max_chunk_chars=1500,
+                       parallel_chunks=3, chunk_pause_ms=250, stream_response=False, include_metrics=False,
+                       incremental_resynthesis=False, output_sample_rate="24000", trim_silence_db=0.0,
+                       normalize_loudness="off", target_level=-16.0, auto_preference=None):
+        """Generate speech, collecting the result of a prefetch started when the prompt was queued"""
+        inputs = {name: value for name, value in locals().items() if name != "self"}
+        key = input_key(GeminiTTS.generate_speech, inputs)
+        prefetcher = get_prefetcher()
+        result = None
+        if not getattr(self, "prefetching", False):
+            result = prefetcher.take(key)
+            if result is not None:
+                print(f"🛰️ Using prefetched audio for: {prompt[:60]}...")
+                result = (result[0], result[1] + "\n" + prefetcher.status_line())
+        if result is None:
+            result = self.render_speech(**inputs)
+        prefetcher.record(key, is_success_status(result[1]))
+        return result
+
+    def render_speech(self, prompt, tts_model="gemini-2.5-pro-preview-tts", voice="[M] Puck", 
+                      temperature=1.0, api_key="", auto_fallback_to_flash=True, retry_delay=30, 
+                      use_paid_tier=False, billing_project_id="", aggressive_retry=False, 
+                      show_voice_info=False, use_cache=True, chunk_long_text=False, max_chunk_chars=1500,
+                      parallel_chunks=3, chunk_pause_ms=250, stream_response=False, include_metrics=False,
+                      incremental_resynthesis=False, output_sample_rate="24000", trim_silence_db=0.0,
+                      normalize_loudness="off", target_level=-16.0, auto_preference=None):
         """Generate speech using Gemini TTS with paid tier support and intelligent fallback"""
         
-        # Handle API key with better validation
-        if api_key.strip():
-            self.api_key = api_key.strip()
-            config_data = {
-                "GEMINI_API_KEY": self.api_key,
-                "use_paid_tier": use_paid_tier,
-                "billing_project_id": billing_project_id.strip() if billing_project_id.strip() else None
+        self.postprocess_options = postprocess_options(output_sample_rate, trim_silence_db,
+                                                       normalize_loudness, target_level)
+        self.stream_response = stream_response
+        self.include_metrics = include_metrics
+        self.auto_preference = auto_preference
+        
+        # Long scripts are split and synthesized chunk by chunk (see synthesize)
+        self.chunk_options = None
+        if chunk_long_text and len(prompt) > max_chunk_chars:
+            self.chunk_options = {
+                "max_chars": max_chunk_chars,
+                "workers": parallel_chunks,
+                "pause_ms": chunk_pause_ms,
             }
-            save_config(config_data)
-            print(f"🔑 Using provided API key: {self.api_key[:15]}...{self.api_key[-5:]}")
-
-        if not self.api_key:
-            error_msg = "❌ API key required. Please set GEMINI_API_KEY environment variable or enter in node."
-            empty_audio = {"waveform": torch.zeros(1, 1, 24000), "sample_rate": 24000}
-            return (empty_audio, error_msg)
-
-        # Validate API key format
-        if not self.api_key.startswith("AIza") or len(self.api_key) < 35:
-            error_msg = f"❌ Invalid API key format. Key should start with 'AIza' and be ~39 characters long.\n"
-            error_msg += f"Current key: {self.api_key[:15]}... (length: {len(self.api_key)})"
+        
+        # Edited scripts only re-synthesize the sentences that changed (see try_incremental_tts)
+        self.incremental_options = None
+        if incremental_resynthesis:
+            self.incremental_options = {"workers": parallel_chunks, "pause_ms": chunk_pause_ms}
+        
+        # Background prefetches never write config.json; the node saves the key when it executes
+        error_msg = self.check_credentials(api_key, use_paid_tier, billing_project_id,
+                                           persist=not getattr(self, "prefetching", False))
+        if error_msg:
             empty_audio = {"waveform": torch.zeros(1, 1, 24000), "sample_rate": 24000}
             return (empty_audio, error_msg)
 
-        # Validate billing project ID format if using paid tier
-        if use_paid_tier and billing_project_id.strip():
-            project_id = billing_project_id.strip()
-            # Project IDs should be 6-30 characters, lowercase letters, numbers, and hyphens
-            if not project_id.replace('-', '').replace('_', '').isalnum():
-                error_msg = f"❌ Invalid project ID format: {project_id}\n"
-                error_msg += f"💡 Project IDs should contain only letters, numbers, and hyphens\n"
-                error_msg += f"💡 Example: 'my-project-123' or 'project-name'\n"
-                error_msg += f"💡 Find your project ID in Google Cloud Console"
-                empty_audio = {"waveform": torch.zeros(1, 1, 24000), "sample_rate": 24000}
-                return (empty_audio, error_msg)
-
         # Convert display name to API name
-        voice_api_name = voice
-        if voice in GEMINI_VOICES_DISPLAY:
-            # Find the corresponding API name
-            for display_name, api_name in GEMINI_VOICES_WITH_GENDER:
-                if display_name == voice:
-                    voice_api_name = api_name
-                    break
+        voice_api_name = resolve_voice(voice)
         
         # Display tier information with voice characteristics
         tier_info = "💰 Paid Tier" if use_paid_tier else "🆓 Free Tier"
@@ -216,149 +675,647 @@ class GeminiTTS:
         
         # Try the requested model first
         try:
-            return self.try_official_tts(prompt, tts_model, voice_api_name, temperature, use_paid_tier, 
-                                       billing_project_id.strip(), max_retries, show_voice_info)
+            return self.synthesize(prompt, tts_model, voice_api_name, temperature, use_paid_tier, 
+                                   billing_project_id.strip(), max_retries, show_voice_info, use_cache)
         except Exception as error:
             error_str = str(error)
             print(f"⚠️ {tts_model} failed: {error_str}")
             
+            error_kind = classify_error(error_str)
+            
+            # Our own pacing gave up before sending anything
+            if error_kind == "local_budget":
+                return self.handle_local_budget(error_str, tts_model)
+            
             # Handle rate limiting with paid tier awareness
-            if ("429" in error_str or "RESOURCE_EXHAUSTED" in error_str):
+            elif error_kind == "rate_limited":
                 return self.handle_rate_limiting(error_str, tts_model, prompt, voice_api_name, temperature, 
                                                auto_fallback_to_flash, retry_delay, use_paid_tier, 
-                                               billing_project_id.strip(), max_retries, show_voice_info)
+                                               billing_project_id.strip(), max_retries, show_voice_info,
+                                               use_cache)
             
             # Handle API key errors
-            elif "API key not valid" in error_str or "INVALID_ARGUMENT" in error_str:
+            elif error_kind == "invalid_key":
                 print("🔄 Falling back to working Gemini model for TTS simulation...")
                 return self.fallback_tts_simulation(prompt, voice_api_name, temperature)
             
             # Handle billing/quota errors
-            elif "PERMISSION_DENIED" in error_str or "billing" in error_str.lower() or "USER_PROJECT_DENIED" in error_str or "not found or deleted" in error_str:
+            elif error_kind == "billing":
                 return self.handle_billing_error(error_str, use_paid_tier, billing_project_id.strip())
             
             # Handle other errors
             else:
                 return self.handle_complete_failure(error_str, retry_delay, tts_model)
 
+    def check_credentials(self, api_key, use_paid_tier, billing_project_id, persist=True):
+        """Apply a node-provided API key and validate credentials; returns an error message or None.
+
+        With persist, a node-provided key is saved to config.json for future runs.
+        """
+        # Handle API key with better validation
+        if api_key.strip():
+            self.api_key = api_key.strip()
+            if persist:
+                config_data = {
+                    "GEMINI_API_KEY": self.api_key,
+                    "use_paid_tier": use_paid_tier,
+                    "billing_project_id": billing_project_id.strip() if billing_project_id.strip() else None
+                }
+                save_config(config_data)
+            print(f"🔑 Using provided API key: {self.api_key[:15]}...{self.api_key[-5:]}")
+
+        if not self.api_key:
+            error_msg = "❌ API key required. Please set GEMINI_API_KEY environment variable or enter in node."
+            return error_msg
+
+        # Validate API key format
+        if not self.api_key.startswith("AIza") or len(self.api_key) < 35:
+            error_msg = f"❌ Invalid API key format. Key should start with 'AIza' and be ~39 characters long.\n"
+            error_msg += f"Current key: {self.api_key[:15]}... (length: {len(self.api_key)})"
+            return error_msg
+
+        # Validate billing project ID format if using paid tier
+        if use_paid_tier and billing_project_id.strip():
+            project_id = billing_project_id.strip()
+            # Project IDs should be 6-30 characters, lowercase letters, numbers, and hyphens
+            if not project_id.replace('-', '').replace('_', '').isalnum():
+                error_msg = f"❌ Invalid project ID format: {project_id}\n"
+                error_msg += f"💡 Project IDs should contain only letters, numbers, and hyphens\n"
+                error_msg += f"💡 Example: 'my-project-123' or 'project-name'\n"
+                error_msg += f"💡 Find your project ID in Google Cloud Console"
+                return error_msg
+
+        # The node's own key joins the pool instead of bypassing it
+        pool = get_key_pool()
+        if pool is not None:
+            pool.add(self.api_key, billing_project_id.strip())
+
+        return None
+
+    def synthesize(self, prompt, tts_model, voice, temperature, use_paid_tier=False, 
+                   billing_project_id="", max_retries=1, show_voice_info=False, use_cache=True):
+        """Route a request to chunked or single-request synthesis"""
+        stream = getattr(self, "stream_response", False)
+        if getattr(self, "incremental_options", None):
+            result = self.try_incremental_tts(prompt, tts_model, voice, temperature, use_paid_tier,
+                                              billing_project_id, max_retries, show_voice_info, use_cache,
+                                              stream=stream, **self.incremental_options)
+        elif getattr(self, "chunk_options", None):
+            result = self.try_chunked_tts(prompt, tts_model, voice, temperature, use_paid_tier,
+                                          billing_project_id, max_retries, show_voice_info, use_cache,
+                                          stream=stream, **self.chunk_options)
+        else:
+            result = self.try_official_tts(prompt, tts_model, voice, temperature, use_paid_tier,
+                                           billing_project_id, max_retries, show_voice_info, use_cache, stream)
+        return self.apply_postprocess(result)
+
+    def apply_postprocess(self, result):
+        """Run the optional trim/resample/normalize stage on a successful (audio, status) result"""
+        options = getattr(self, "postprocess_options", None)
+        if not options:
+            return result
+        audio, status = result
+        waveform, sample_rate, _, report = postprocess_waveform(audio["waveform"].numpy(), audio["sample_rate"],
+                                                                **options)
+        status += f"\n🎚️ Post-processing: {json.dumps(report)}"
+        return ({"waveform": torch.from_numpy(waveform), "sample_rate": sample_rate}, status)
+
+    def try_chunked_tts(self, prompt, tts_model, voice, temperature, use_paid_tier=False,
+                        billing_project_id="", max_retries=1, show_voice_info=False, use_cache=True,
+                        stream=False, max_chars=1500, workers=3, pause_ms=250, crossfade_ms=20,
+                        retry_rounds=2):
+        """Synthesize a long script as parallel chunks and stitch the PCM back together"""
+        import time
+        
+        instruction, body = split_instruction(prompt)
+        texts = [instruction + chunk for chunk in split_text(body, max_chars)]
+        segments = [None] * len(texts)
+        errors = {}
+        pending = list(range(len(texts)))
+        print(f"✂️ Chunked synthesis: {len(texts)} chunks (≤{max_chars} chars), {workers} in parallel")
+        
+        start = time.time()
+        for round_index in range(retry_rounds + 1):
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as pool:
+                futures = {
+                    pool.submit(self.try_official_tts, texts[i], tts_model, voice, temperature,
+                                use_paid_tier, billing_project_id, max_retries, False, use_cache,
+                                stream): i
+                    for i in pending
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        audio, _ = future.result()
+                        segments[i] = audio["waveform"][0, 0].numpy()
+                        errors.pop(i, None)
+                    except Exception as chunk_error:
+                        errors[i] = str(chunk_error)
+            
+            pending = [i for i in pending if segments[i] is None]
+            if not pending:
+                break
+            if round_index < retry_rounds:
+                backoff_time = 2 ** round_index
+                print(f"⚠️ {len(pending)} chunk(s) failed, retrying only those in {backoff_time} seconds...")
+                time.sleep(backoff_time)
+        
+        if pending:
+            first_error = errors[pending[0]]
+            raise Exception(f"{len(pending)}/{len(texts)} chunks failed after retries: {first_error}")
+        
+        stitched = stitch_pcm(segments, sample_rate=24000, pause_ms=pause_ms, crossfade_ms=crossfade_ms)
+        audio_dict = {
+            "waveform": torch.from_numpy(stitched).unsqueeze(0).unsqueeze(0),
+            "sample_rate": 24000
+        }
+        
+        tier_label = "💰 Paid" if use_paid_tier else "🆓 Free"
+        success_msg = f"✅ Chunked TTS Success: {tts_model} with {voice} voice\n"
+        success_msg += f"🏪 Tier: {tier_label} | ✂️ {len(texts)} chunks in {time.time() - start:.1f}s | "
+        success_msg += f"📊 Generated {len(stitched)} samples at 24kHz"
+        if use_cache:
+            cache_stats = get_audio_cache().stats()
+            success_msg += f"\n💾 Cache: hits {cache_stats['hits']} / misses {cache_stats['misses']}"
+        if show_voice_info and voice in VOICE_CHARACTERISTICS_UPDATED:
+            success_msg += f"\n🎭 Voice: {VOICE_CHARACTERISTICS_UPDATED[voice]}"
+        return (audio_dict, success_msg)
+
+    def try_incremental_tts(self, prompt, tts_model, voice, temperature, use_paid_tier=False,
+                            billing_project_id="", max_retries=1, show_voice_info=False, use_cache=True,
+                            stream=False, workers=3, pause_ms=250, crossfade_ms=20):
+        """Re-synthesize only the sentences that changed since this node's previous run and splice them in"""
+        import time
+        
+        instruction, body = split_instruction(prompt)
+        texts = [instruction + normalize_sentence(sentence) for sentence in split_sentences(body)]
+        keys = [AudioCache.make_key(tts_model, build_tts_payload(text, voice, temperature)) for text in texts]
+        previous = getattr(self, "last_render", None)
+        opcodes, needed = plan_resynthesis(previous, keys)
+        print(f"♻️ Incremental synthesis: {len(texts)} sentences, {len(needed)} to synthesize")
+        
+        start = time.time()
+        new_audio = {}
+        from_cache = 0
+        if needed:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(needed)))) as pool:
+                futures = {
+                    pool.submit(self.try_official_tts, texts[j], tts_model, voice, temperature,
+                                use_paid_tier, billing_project_id, max_retries, False, use_cache,
+                                stream): j
+                    for j in needed
+                }
+                for future in as_completed(futures):
+                    audio, sentence_msg = future.result()
+                    new_audio[futures[future]] = trim_silence(audio["waveform"][0, 0].numpy())
+                    from_cache += sentence_msg.startswith("✅ Cached")
+        
+        render = splice_render(previous, keys, opcodes, new_audio, sample_rate=24000,
+                               pause_ms=pause_ms, crossfade_ms=crossfade_ms)
+        self.last_render = render
+        # The render is kept for the next splice, so downstream nodes get their own copy
+        audio_dict = {
+            "waveform": torch.from_numpy(render.waveform.copy()).unsqueeze(0).unsqueeze(0),
+            "sample_rate": 24000
+        }
+        
+        reused = len(texts) - len(needed)
+        tier_label = "💰 Paid" if use_paid_tier else "🆓 Free"
+        success_msg = f"✅ Incremental TTS Success: {tts_model} with {voice} voice\n"
+        success_msg += f"🏪 Tier: {tier_label} | 📊 Generated {len(render.waveform)} samples at 24kHz "
+        success_msg += f"in {time.time() - start:.1f}s\n"
+        success_msg += f"♻️ Sentences: {reused} reused, {len(needed) - from_cache} regenerated, "
+        success_msg += f"{from_cache} from disk cache (of {len(texts)})"
+        if show_voice_info and voice in VOICE_CHARACTERISTICS_UPDATED:
+            success_msg += f"\n🎭 Voice: {VOICE_CHARACTERISTICS_UPDATED[voice]}"
+        return (audio_dict, success_msg)
+
     def try_official_tts(self, prompt, tts_model, voice, temperature, use_paid_tier=False, 
-                        billing_project_id="", max_retries=1, show_voice_info=False):
+                        billing_project_id="", max_retries=1, show_voice_info=False, use_cache=True,
+                        stream=False):
         """Try the official TTS API with paid tier support"""
+        if tts_model == AUTO_MODEL:
+            return self.try_routed_tts(prompt, voice, temperature, use_paid_tier, billing_project_id, max_retries,
+                                       show_voice_info, use_cache, stream)
+        trace = get_metrics().trace(tts_model, voice_label(voice))
+        flight = get_single_flight()
+        leader = {}
+        
+        def run():
+            audio_dict, leader["status"] = self.send_hedged_request(prompt, tts_model, voice, temperature,
+                                                                    use_paid_tier, billing_project_id,
+                                                                    max_retries, show_voice_info, use_cache,
+                                                                    stream, trace)
+            return audio_dict
+        
+        try:
+            # Identical concurrent requests share one HTTP call and the same waveform tensor
+            audio_dict, shared = flight.do(
+                self.flight_key(prompt, tts_model, voice, temperature, use_paid_tier, billing_project_id), run)
+        except Exception as error:
+            self.fail_request(trace, error)
+            raise
+        
+        if shared:
+            outcome = "coalesced"
+            success_msg = self.coalesced_status(tts_model, voice, use_paid_tier, audio_dict, show_voice_info)
+        else:
+            outcome = "success" if ("http" in trace.stages or "hedge_wait" in trace.stages) else "cache_hit"
+            success_msg = leader["status"]
+        success_msg = self.finish_request(trace, outcome, audio_dict["waveform"].shape[-1] / 24000, success_msg)
+        return (audio_dict, success_msg)
+
+    def flight_key(self, prompt, tts_model, voice, temperature, use_paid_tier, billing_project_id):
+        """SingleFlight key: requests only coalesce when they would be sent with the same key, tier and project"""
+        return AudioCache.make_key(tts_model, {
+            "payload": build_tts_payload(prompt, voice, temperature),
+            "api_key": key_fingerprint(self.api_key),
+            "paid": use_paid_tier,
+            "project": billing_project_id,
+        })
+
+    def coalesced_status(self, tts_model, voice, use_paid_tier, audio_dict, show_voice_info):
+        """Status for a caller that received another caller's in-flight audio, built from its own arguments"""
+        print(f"🔗 Reused result of an identical in-flight request for {tts_model} / {voice_label(voice)}")
+        tier_label = "💰 Paid" if use_paid_tier else "🆓 Free"
+        success_msg = f"✅ Coalesced TTS: {tts_model} with {voice_label(voice)} voice\n"
+        success_msg += f"🏪 Tier: {tier_label} | 📊 Generated {audio_dict['waveform'].shape[-1]} samples at 24kHz\n"
+        success_msg += get_single_flight().status_line()
+        return success_msg + voice_details(voice, show_voice_info)
+
+    def fail_request(self, trace, error):
+        """Close a failed request's trace, labelled by whether it was rate limited"""
+        trace.finish("rate_limited" if is_rate_limited(str(error)) else "error")
+        export_metrics()
+
+    def finish_request(self, trace, outcome, audio_seconds, success_msg):
+        """Close a request's trace and export metrics; returns success_msg, with the summary if include_metrics"""
+        summary = trace.finish(outcome, audio_seconds=audio_seconds)
+        export_metrics()
+        if getattr(self, "include_metrics", False):
+            success_msg += f"\n📈 Metrics: {json.dumps(summary)}"
+        return success_msg
+
+    def cached_result(self, cache, cache_key, tts_model, voice, use_paid_tier, show_voice_info, trace):
+        """(audio, status) for a cached request, or None on a miss"""
+        with trace.stage("cache_lookup"):
+            cached_pcm = cache.get(cache_key)
+        if cached_pcm is None:
+            return None
+        print(f"💾 Cache hit for {tts_model} / {voice_label(voice)} ({len(cached_pcm)} samples)")
+        with trace.stage("tensor_build"):
+            audio_dict = self.pcm_to_audio(cached_pcm)
+        tier_label = "💰 Paid" if use_paid_tier else "🆓 Free"
+        success_msg = f"✅ Cached TTS: {tts_model} with {voice_label(voice)} voice\n"
+        success_msg += f"🏪 Tier: {tier_label} | 📊 Generated {len(cached_pcm)} samples at 24kHz\n"
+        success_msg += cache.status_line(hit=True)
+        return (audio_dict, success_msg + voice_details(voice, show_voice_info))
+
+    def store_audio(self, cache, cache_key, audio_np):
+        """Write freshly generated PCM to the cache; returns the cache status line"""
+        try:
+            cache.put(cache_key, audio_np)
+        except OSError as cache_error:
+            print(f"⚠️ Could not write audio cache entry: {cache_error}")
+        return "\n" + cache.status_line(hit=False)
+
+    def request_status(self, tts_model, voice, use_paid_tier, samples, details, limiter, key_tier, waited,
+                       api_key, breaker, pool):
+        """Status message for a successful request: what was generated, then budget, circuit and key pool"""
+        tier_label = "💰 Paid" if use_paid_tier else "🆓 Free"
+        success_msg = f"✅ REST TTS Success: {tts_model} with {voice_label(voice)} voice\n"
+        success_msg += f"🏪 Tier: {tier_label} | 📊 Generated {samples} samples at 24kHz"
+        success_msg += details
+        if limiter:
+            success_msg += "\n" + limiter.status_line(tts_model, key_tier, waited, api_key)
+        success_msg += "\n" + breaker.status_line(api_key)
+        if pool:
+            success_msg += "\n" + pool.status_line()
+        return success_msg
+
+    def record_attempt(self, router, policy, tts_model, prompt, attempt_trace, ok):
+        """Feed a request that reached the wire to the router and, when it succeeded, the hedge policy"""
+        if "http" not in attempt_trace.stages:
+            return
+        # Every request feeds the router, whichever model was asked for
+        router.record(tts_model, request_seconds(attempt_trace), len(prompt), ok=ok)
+        if ok and policy:
+            policy.record(tts_model, attempt_trace.stages["http"])
+
+    def hedge_status(self, trace, policy, tts_model, backup_model, hedge_delay, backup_won):
+        """Record a hedged request's wait and winner; returns its status lines ("" if it was not hedged)"""
+        if hedge_delay is None:
+            return ""
+        trace.add_stage("hedge_wait", hedge_delay)
+        get_metrics().inc("gemini_tts_hedges_total", model=tts_model, winner="backup" if backup_won else "primary")
+        winner = f"backup request ({backup_model})" if backup_won else "original request"
+        return f"\n🏁 Hedged after {hedge_delay:.1f}s: {winner} answered first\n" + policy.status_line()
+
+    def route_model(self, prompt, use_paid_tier):
+        """Pick Pro or Flash for an "auto" request; returns (model, reason)"""
+        preference = getattr(self, "auto_preference", None)
+        pool = get_key_pool()
+        keys = pool.healthy_keys() if pool else [(self.api_key, None)]
+        model, reason = get_model_router().choose(len(prompt), preference, "paid" if use_paid_tier else "free",
+                                                  get_rate_limiter(), get_circuit_breaker(), keys)
+        print(f"🧭 Auto model: {short_name(model)} ({reason})")
+        return model, reason
+
+    def try_routed_tts(self, prompt, voice, temperature, use_paid_tier=False, billing_project_id="",
+                       max_retries=1, show_voice_info=False, use_cache=True, stream=False):
+        """try_official_tts on the model the router picks, moving to Flash if Pro turns out to be rate limited"""
+        model, reason = self.route_model(prompt, use_paid_tier)
+        try:
+            audio_dict, success_msg = self.try_official_tts(prompt, model, voice, temperature, use_paid_tier,
+                                                            billing_project_id, max_retries, show_voice_info,
+                                                            use_cache, stream)
+        except Exception as error:
+            if not self.should_reroute(model, error):
+                raise
+            model, reason = FLASH_MODEL, reason + ", then Pro was rate limited"
+            audio_dict, success_msg = self.try_official_tts(prompt, model, voice, temperature, use_paid_tier,
+                                                            billing_project_id, max_retries, show_voice_info,
+                                                            use_cache, stream)
+        return (audio_dict, success_msg + self.routed_status(model, reason))
+
+    def should_reroute(self, model, error):
+        """True when an "auto" request sent to Pro was rate limited and should go to Flash instead"""
+        if model != PRO_MODEL or not is_rate_limited(str(error)):
+            return False
+        print("🧭 Pro was rate limited, sending the auto request to Flash")
+        get_metrics().inc("gemini_tts_fallbacks_total", source=PRO_MODEL, target=FLASH_MODEL)
+        return True
+
+    def routed_status(self, model, reason):
+        return f"\n🧭 Auto model: {short_name(model)} ({reason})\n" + get_model_router().status_line()
+
+    def send_hedged_request(self, prompt, tts_model, voice, temperature, use_paid_tier, billing_project_id,
+                            max_retries, show_voice_info, use_cache, stream, trace):
+        """send_tts_request, raced by a backup request once it runs slower than usual (see HedgePolicy)"""
+        policy = get_hedge_policy()
+        router = get_model_router()
+        
+        def primary(attempt_trace):
+            try:
+                result = self.send_tts_request(prompt, tts_model, voice, temperature, use_paid_tier,
+                                               billing_project_id, max_retries, show_voice_info, use_cache,
+                                               stream, attempt_trace)
+            except Exception:
+                self.record_attempt(router, policy, tts_model, prompt, attempt_trace, ok=False)
+                raise
+            self.record_attempt(router, policy, tts_model, prompt, attempt_trace, ok=True)
+            return result
+        
+        # Streamed responses already deliver audio early, so they are not hedged
+        if policy is None or stream:
+            return primary(trace)
+        
+        # Each side of a hedge records into its own trace; only the winner's is merged into trace,
+        # since the loser may still be running after this request has finished
+        backup_model = policy.backup_model(tts_model)
+        primary_trace = get_metrics().trace(tts_model, voice_label(voice))
+        primary_trace.sent = threading.Event()
+        backup_trace = get_metrics().trace(backup_model, voice_label(voice))
+        
+        def backup():
+            try:
+                audio_dict, success_msg = self.send_tts_request(prompt, backup_model, voice, temperature,
+                                                                use_paid_tier, billing_project_id, max_retries,
+                                                                show_voice_info, use_cache, False, backup_trace)
+            except Exception:
+                backup_trace.finish("error")
+                raise
+            backup_trace.finish("hedge", audio_seconds=audio_dict["waveform"].shape[-1] / 24000)
+            return audio_dict, success_msg
+        
+        try:
+            (audio_dict, success_msg), hedge_delay, backup_won = run_hedged(
+                lambda: primary(primary_trace), backup, policy, tts_model, sent=primary_trace.sent)
+        except Exception:
+            trace.merge(primary_trace)
+            raise
+        trace.merge(backup_trace if backup_won else primary_trace)
+        success_msg += self.hedge_status(trace, policy, tts_model, backup_model, hedge_delay, backup_won)
+        return audio_dict, success_msg
+
+    def send_tts_request(self, prompt, tts_model, voice, temperature, use_paid_tier, billing_project_id,
+                         max_retries, show_voice_info, use_cache, stream, trace):
+        """Issue the REST request with retries, recording stage timings into trace"""
         import requests
         import json
         import time
         
-        # Construct URL with paid tier considerations
-        base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{tts_model}:generateContent"
+        client = get_http_client()
+        url = client.model_url(tts_model)
         
-        url = f"{base_url}?key={self.api_key}"
+        data = build_tts_payload(prompt, voice, temperature)
         
-        headers = {"Content-Type": "application/json", "User-Agent": "ComfyUI-Gemini-TTS/1.0"}
+        tier = "paid" if use_paid_tier else "free"
+        cache = get_audio_cache() if use_cache else None
+        cache_key = AudioCache.make_key(tts_model, data) if cache else None
         
-        data = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "temperature": temperature,
-                "responseModalities": ["AUDIO"],
-                "speechConfig": {
-                    "voiceConfig": {
-                        "prebuiltVoiceConfig": {
-                            "voiceName": voice
-                        }
-                    }
-                }
-            }
-        }
+        if cache:
+            cached = self.cached_result(cache, cache_key, tts_model, voice, use_paid_tier, show_voice_info, trace)
+            if cached is not None:
+                return cached
+        
+        # Skip the round trip entirely while this model is known to be out of quota
+        breaker = get_circuit_breaker()
+        pool = get_key_pool()
+        api_key, key_tier, key_project = self.api_key, tier, billing_project_id
+        if pool is None and not breaker.allow(tts_model, api_key):
+            open_error = breaker.open_error(tts_model, api_key)
+            print(f"⚡ Skipping {tts_model}: {open_error[:120]}")
+            raise Exception(open_error)
+        
+        if stream:
+            url = client.model_url(tts_model, "streamGenerateContent")
+        print(f"🌐 Making REST request to: {url[:80]}?key=***")
+        print(f"📦 Request data: Model={tts_model}, Voice={voice_label(voice)}, Temp={temperature}")
         
-        print(f"🌐 Making REST request to: {url[:80]}...?key=***")
-        print(f"📦 Request data: Model={tts_model}, Voice={voice}, Temp={temperature}")
+        limiter = get_rate_limiter()
+        max_wait = get_request_settings()["max_wait"]
+        estimated_tokens = len(prompt) / 4
+        request_bytes = len(json.dumps(data))
+        # With a key pool, a key that is rate limited or rejected hands the request to the next one
+        attempts = max_retries + (len(pool) - 1 if pool else 0)
         
-        for attempt in range(max_retries):
+        for attempt in range(attempts):
+            lease = None
+            if pool:
+                lease = pool.checkout(tts_model, tier, breaker, limiter, estimated_tokens)
+                if lease is None:
+                    open_error = pool.exhausted_error(tts_model, breaker)
+                    print(f"⚡ Skipping {tts_model}: {open_error[:120]}")
+                    raise Exception(open_error)
+                api_key, key_tier = lease.api_key, lease.tier or tier
+                key_project = lease.billing_project_id or billing_project_id
+            outcome = "error"
             try:
-                timeout = 60 if use_paid_tier else 30
-                response = requests.post(url, headers=headers, json=data, timeout=timeout)
-                print(f"📊 Response status: {response.status_code} (attempt {attempt + 1}/{max_retries})")
+                waited = 0.0
+                if limiter:
+                    waited = limiter.acquire(tts_model, key_tier, tokens=estimated_tokens, max_wait=max_wait,
+                                             api_key=api_key)
+                    trace.add_stage("queue", waited)
+                timeout = client.timeouts(key_tier)
+                request_start = time.time()
+                with trace.stage("http"):
+                    if stream:
+                        response = client.stream_generate_content(tts_model, api_key, data, timeout=timeout)
+                    else:
+                        response = client.generate_content(tts_model, api_key, data, timeout=timeout, stream=True)
+                trace.count("gemini_tts_bytes_sent_total", request_bytes)
+                trace.count("gemini_tts_http_responses_total", code=response.status_code)
+                print(f"📊 Response status: {response.status_code} (attempt {attempt + 1}/{attempts})")
                 
                 if response.status_code == 200:
-                    response_data = response.json()
-                    
-                    if ("candidates" in response_data and len(response_data["candidates"]) > 0 and
-                        "content" in response_data["candidates"][0] and
-                        "parts" in response_data["candidates"][0]["content"] and
-                        len(response_data["candidates"][0]["content"]["parts"]) > 0):
-                        
-                        part = response_data["candidates"][0]["content"]["parts"][0]
-                        
-                        if "inlineData" in part and "data" in part["inlineData"]:
-                            audio_data_b64 = part["inlineData"]["data"]
-                            audio_data = base64.b64decode(audio_data_b64)
-                            
-                            # Convert PCM data to tensor
-                            audio_np = np.frombuffer(audio_data, dtype=np.int16)
-                            audio_float = audio_np.astype(np.float32) / 32768.0
-                            waveform = torch.from_numpy(audio_float).unsqueeze(0)
-                            
-                            audio_dict = {
-                                "waveform": waveform.unsqueeze(0),
-                                "sample_rate": 24000
-                            }
-                            
-                            tier_label = "💰 Paid" if use_paid_tier else "🆓 Free"
-                            success_msg = f"✅ REST TTS Success: {tts_model} with {voice} voice\n"
-                            success_msg += f"🏪 Tier: {tier_label} | 📊 Generated {len(audio_float)} samples at 24kHz"
-                            
-                            if show_voice_info and voice in VOICE_CHARACTERISTICS_UPDATED:
-                                success_msg += f"\n🎭 Voice: {VOICE_CHARACTERISTICS_UPDATED[voice]}"
-                            
-                            return (audio_dict, success_msg)
-                        else:
-                            raise Exception("No audio data found in REST response")
+                    latency_info = ""
+                    if stream:
+                        with trace.stage("stream"):
+                            audio_data, timings = read_pcm_stream(response, self.stream_progress(prompt),
+                                                                  started_at=request_start)
+                        trace.add_stage("time_to_first_audio", timings["first_audio"])
+                        trace.count("gemini_tts_bytes_received_total", timings["bytes_in"])
+                        audio_np = np.frombuffer(audio_data, dtype=np.int16)
+                        latency_info = f"\n⏱️ Streamed: first byte {timings['first_byte']:.2f}s | "
+                        latency_info += f"first audio {timings['first_audio']:.2f}s | total {timings['total']:.2f}s"
                     else:
-                        raise Exception("Invalid REST response structure")
+                        # Read the body incrementally, decoding the audio without building the JSON dict
+                        with trace.stage("body_parse"):
+                            parsed = parse_inline_response(response)
+                        trace.count("gemini_tts_bytes_received_total", parsed["bytes_in"])
+                        audio_np = audio_from_result(parsed)
+                        usage = parsed["usage_metadata"] or {}
+                        if usage:
+                            latency_info = (f"\n🧾 Tokens: {usage.get('promptTokenCount', 0)} prompt, "
+                                            f"{usage.get('candidatesTokenCount', 0)} audio | {parsed['mime_type']}")
+                    
+                    # Convert PCM data to tensor
+                    with trace.stage("tensor_build"):
+                        audio_dict = self.pcm_to_audio(audio_np)
+                    
+                    outcome = "success"
+                    breaker.record_success(tts_model, api_key)
+                    success_msg = self.request_status(tts_model, voice, use_paid_tier, len(audio_np), latency_info,
+                                                      limiter, key_tier, waited, api_key, breaker, pool)
+                    if cache:
+                        success_msg += self.store_audio(cache, cache_key, audio_np)
+                    success_msg += voice_details(voice, show_voice_info)
+                    
+                    return (audio_dict, success_msg)
                         
                 elif response.status_code == 429:
                     error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-                    raise Exception(f"Rate limit (429): {error_data}")
+                    retry_after = parse_retry_delay(response)
+                    outcome = "rate_limited"
+                    error_text = f"Rate limit (429): {error_data}"
+                    if pool and attempt < attempts - 1:
+                        # This key's quota is spent; its open circuit keeps it out of rotation
+                        if limiter and retry_after is not None:
+                            limiter.penalize(tts_model, key_tier, retry_after, api_key)
+                        breaker.record_failure(tts_model, api_key, 429, error_text, retry_after)
+                        print(f"🔑 Key {lease.label} rate limited, trying another pooled key...")
+                        trace.count("gemini_tts_retries_total", reason="429")
+                        continue
+                    if limiter and retry_after is not None:
+                        # Hold every caller of this model until the server's retry delay has passed
+                        limiter.penalize(tts_model, key_tier, retry_after, api_key)
+                        if attempt < attempts - 1 and retry_after <= max_wait:
+                            print(f"⚠️ Rate limited, server asked to retry in {retry_after:.0f} seconds...")
+                            trace.count("gemini_tts_retries_total", reason="429")
+                            continue
+                    breaker.record_failure(tts_model, api_key, 429, error_text, retry_after)
+                    raise Exception(error_text)
                     
                 elif response.status_code == 403:
                     error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
                     if use_paid_tier:
-                        raise Exception(f"Billing/Permission error (403): Check billing project '{billing_project_id}' and API access. {error_data}")
+                        error_text = f"Billing/Permission error (403): Check billing project '{key_project}' and API access. {error_data}"
                     else:
-                        raise Exception(f"Permission denied (403): {error_data}")
+                        error_text = f"Permission denied (403): {error_data}"
+                    breaker.record_failure(tts_model, api_key, 403, error_text)
+                    if pool and attempt < attempts - 1:
+                        print(f"🔑 Key {lease.label} was denied, trying another pooled key...")
+                        continue
+                    raise Exception(error_text)
                     
                 else:
                     error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-                    if attempt < max_retries - 1 and response.status_code >= 500:
-                        backoff_time = 2 ** attempt
+                    if pool and ("API key not valid" in str(error_data) or "API_KEY_INVALID" in str(error_data)):
+                        pool.disable(lease, "invalid key")
+                        if attempt < attempts - 1:
+                            continue
+                    if attempt < attempts - 1 and response.status_code >= 500:
+                        backoff_time = parse_retry_delay(response, 2 ** attempt)
                         print(f"⚠️ Server error {response.status_code}, retrying in {backoff_time} seconds...")
+                        trace.count("gemini_tts_retries_total", reason="5xx")
                         time.sleep(backoff_time)
                         continue
                     else:
                         raise Exception(f"REST API error {response.status_code}: {error_data}")
                         
             except requests.exceptions.Timeout:
-                if attempt < max_retries - 1:
+                if attempt < attempts - 1:
                     backoff_time = 2 ** attempt
                     print(f"⚠️ Request timeout, retrying in {backoff_time} seconds...")
+                    trace.count("gemini_tts_retries_total", reason="timeout")
                     time.sleep(backoff_time)
                     continue
                 else:
                     raise Exception("Request timeout after retries")
             except requests.exceptions.RequestException as e:
-                if attempt < max_retries - 1:
+                if attempt < attempts - 1:
                     backoff_time = 2 ** attempt
                     print(f"⚠️ Request error: {e}, retrying in {backoff_time} seconds...")
+                    trace.count("gemini_tts_retries_total", reason="connection")
                     time.sleep(backoff_time)
                     continue
                 else:
                     raise Exception(f"Request failed: {e}")
+            finally:
+                breaker.release_probe(tts_model, api_key)
+                if lease is not None:
+                    pool.release(lease, outcome)
         
         raise Exception("Max retries exceeded")
 
+    def stream_progress(self, prompt):
+        """Build the on_chunk callback that reports streaming progress and feeds preview hooks"""
+        try:
+            from comfy.utils import ProgressBar
+            progress_bar = ProgressBar(100)
+        except ImportError:
+            progress_bar = None
+        
+        # Rough length estimate (same 0.4 s/word heuristic as the pricing helpers)
+        expected_samples = max(2.0, len(prompt.split()) * 0.4) * 24000
+        
+        def on_chunk(new_samples, total_samples):
+            if total_samples == len(new_samples):
+                print(f"🔊 First audio chunk received ({len(new_samples)} samples)")
+            if progress_bar is not None:
+                progress_bar.update_absolute(min(99, int(100 * total_samples / expected_samples)))
+            for hook in STREAM_PREVIEW_HOOKS:
+                try:
+                    hook(new_samples, total_samples, 24000)
+                except Exception as hook_error:
+                    print(f"⚠️ Stream preview hook failed: {hook_error}")
+        
+        return on_chunk
+
+    def pcm_to_audio(self, audio_np):
+        """Convert 24 kHz int16 PCM samples into a ComfyUI AUDIO dict"""
+        # Scale straight into the final [1, 1, samples] tensor: one pass, no temporaries
+        waveform = torch.empty((1, 1, len(audio_np)), dtype=torch.float32)
+        int16_to_float32(audio_np, out=waveform.numpy()[0, 0])
+        return {
+            "waveform": waveform,
+            "sample_rate": 24000
+        }
+
     def handle_rate_limiting(self, error_str, tts_model, prompt, voice, temperature, 
                            auto_fallback_to_flash, retry_delay, use_paid_tier, 
-                           billing_project_id, max_retries, show_voice_info):
+                           billing_project_id, max_retries, show_voice_info, use_cache=True):
         """Handle rate limiting with paid tier awareness"""
         
         if use_paid_tier:
@@ -373,19 +1330,14 @@ class GeminiTTS:
             if auto_fallback_to_flash:
                 try:
                     flash_model = "gemini-2.5-flash-preview-tts"
-                    result = self.try_official_tts(prompt, flash_model, voice, temperature, 
-                                                 use_paid_tier, billing_project_id, max_retries, show_voice_info)
+                    result = self.synthesize(prompt, flash_model, voice, temperature, 
+                                             use_paid_tier, billing_project_id, max_retries, show_voice_info,
+                                             use_cache)
                     audio, original_msg = result
-                    fallback_msg = f"⚠️ Fallback Success: Used Flash model (Pro was rate limited)\n"
-                    fallback_msg += f"🎙️ Voice: {voice} (Flash quality)\n" 
-                    fallback_msg += f"💡 Consider upgrading to paid tier for consistent Pro access\n"
-                    fallback_msg += f"💰 Paid Pro: $1.00 input + $20.00 output per 1M tokens\n"
-                    fallback_msg += f"💰 Paid Flash: $0.50 input + $10.00 output per 1M tokens\n"
-                    fallback_msg += f"📊 Generated audio at 24kHz"
-                    return (audio, fallback_msg)
+                    return (audio, self.flash_fallback_status(tts_model, flash_model, voice))
                 except Exception as flash_error:
                     flash_error_str = str(flash_error)
-                    if "429" in flash_error_str or "RESOURCE_EXHAUSTED" in flash_error_str:
+                    if is_rate_limited(flash_error_str):
                         return self.fallback_tts_simulation(prompt, voice, temperature, both_models_exhausted=True)
                     else:
                         return self.handle_complete_failure(flash_error_str, retry_delay, "both models")
@@ -402,6 +1354,18 @@ class GeminiTTS:
         else:
             return self.fallback_tts_simulation(prompt, voice, temperature, both_models_exhausted=True)
 
+    def flash_fallback_status(self, tts_model, flash_model, voice):
+        """Count a Pro -> Flash fallback and describe it"""
+        get_metrics().inc("gemini_tts_fallbacks_total", source=tts_model, target=flash_model)
+        fallback_msg = f"⚠️ Fallback Success: Used Flash model (Pro was rate limited)\n"
+        fallback_msg += f"🎙️ Voice: {voice} (Flash quality)\n" 
+        fallback_msg += f"💡 Consider upgrading to paid tier for consistent Pro access\n"
+        fallback_msg += f"💰 Paid Pro: $1.00 input + $20.00 output per 1M tokens\n"
+        fallback_msg += f"💰 Paid Flash: $0.50 input + $10.00 output per 1M tokens\n"
+        fallback_msg += f"📊 Generated audio at 24kHz\n"
+        fallback_msg += get_circuit_breaker().status_line(self.api_key)
+        return fallback_msg
+
     def handle_billing_error(self, error_str, use_paid_tier, billing_project_id):
         """Handle billing and permission errors"""
         if use_paid_tier:
@@ -447,7 +1411,10 @@ class GeminiTTS:
 
     def fallback_tts_simulation(self, prompt, voice, temperature, both_models_exhausted=False):
         """Enhanced fallback using the working Gemini model to simulate TTS"""
+        get_metrics().inc("gemini_tts_fallbacks_total", source="tts", target="simulation")
         try:
+            # The SDK is only needed on this path; importing it lazily keeps node loading fast
+            import google.generativeai as genai
             genai.configure(api_key=self.api_key)
             model = genai.GenerativeModel('gemini-2.0-flash-exp')
             
@@ -550,6 +1517,14 @@ class GeminiTTS:
         
         return total_cost
 
+    def handle_local_budget(self, error_str, tts_model):
+        """The shared rate limiter could not fit the request within rate_limit_max_wait"""
+        error_msg = f"⏳ {tts_model}: local rate budget exhausted, nothing was sent to the API\n"
+        error_msg += f"🔧 {error_str[:150]}\n"
+        error_msg += f"💡 Raise rate_limit_max_wait, or this model's budget under rate_limits in config.json"
+        empty_audio = {"waveform": torch.zeros(1, 1, 24000), "sample_rate": 24000}
+        return (empty_audio, error_msg)
+
     def handle_complete_failure(self, error_str, retry_delay, tts_model):
         """Handle complete TTS failure with helpful messaging"""
         error_msg = f"❌ TTS failed: {tts_model}\n"
@@ -559,10 +1534,765 @@ class GeminiTTS:
         empty_audio = {"waveform": torch.zeros(1, 1, 24000), "sample_rate": 24000}
         return (empty_audio, error_msg)
 
+class GeminiTTSAsync(GeminiTTS):
+    """GeminiTTS with a coroutine entry point for ComfyUI's async node execution.
+
+    Waits (rate budget, 429 retry delays, backoff) are asyncio sleeps on the
+    event loop instead of blocked threads. Older ComfyUI versions that cannot
+    await a FUNCTION keep using the synchronous GeminiTTS node.
+    """
+
+    FUNCTION = "generate_speech_async"
+
+    async def generate_speech_async(self, prompt, tts_model="gemini-2.5-pro-preview-tts", voice="[M] Puck",
+                                    temperature=1.0, api_key="", auto_fallback_to_flash=True, retry_delay=30,
+                                    use_paid_tier=False, billing_project_id="", aggressive_retry=False,
+                                    show_voice_info=False, use_cache=True, chunk_long_text=False,
+                                    max_chunk_chars=1500, parallel_chunks=3, chunk_pause_ms=250,
+                                    stream_response=False, include_metrics=False,
+                                    incremental_resynthesis=False, output_sample_rate="24000",
+                                    trim_silence_db=0.0, normalize_loudness="off", target_level=-16.0,
+                                    auto_preference=None):
+        """Generate speech on the event loop, with the same fallbacks as generate_speech"""
+        if stream_response or incremental_resynthesis:
+            # SSE decoding drives the progress bar and preview hooks, and incremental renders
+            # keep per-node splice state, so both stay on the synchronous path in a worker thread
+            return await asyncio.to_thread(
+                self.generate_speech, prompt, tts_model, voice, temperature, api_key, auto_fallback_to_flash,
+                retry_delay, use_paid_tier, billing_project_id, aggressive_retry, show_voice_info, use_cache,
+                chunk_long_text, max_chunk_chars, parallel_chunks, chunk_pause_ms, stream_response,
+                include_metrics, incremental_resynthesis, output_sample_rate, trim_silence_db,
+                normalize_loudness, target_level, auto_preference)
+        
+        self.postprocess_options = postprocess_options(output_sample_rate, trim_silence_db,
+                                                       normalize_loudness, target_level)
+        self.stream_response = False
+        self.include_metrics = include_metrics
+        self.auto_preference = auto_preference
+        self.incremental_options = None
+        self.chunk_options = None
+        if chunk_long_text and len(prompt) > max_chunk_chars:
+            self.chunk_options = {
+                "max_chars": max_chunk_chars,
+                "workers": parallel_chunks,
+                "pause_ms": chunk_pause_ms,
+            }
+        
+        error_msg = self.check_credentials(api_key, use_paid_tier, billing_project_id)
+        if error_msg:
+            empty_audio = {"waveform": torch.zeros(1, 1, 24000), "sample_rate": 24000}
+            return (empty_audio, error_msg)
+        
+        voice_api_name = resolve_voice(voice)
+        billing_project_id = billing_project_id.strip()
+        print(f"🎙️ Generating TTS (async): Model={tts_model}, Voice={voice} -> {voice_api_name}, Temp={temperature}")
+        print(f"📝 Prompt: {prompt[:100]}...")
+        
+        max_retries = 5 if (use_paid_tier or aggressive_retry) else 1
+        
+        try:
+            return await self.synthesize_async(prompt, tts_model, voice_api_name, temperature, use_paid_tier,
+                                               billing_project_id, max_retries, show_voice_info, use_cache)
+        except Exception as error:
+            error_str = str(error)
+            print(f"⚠️ {tts_model} failed: {error_str}")
+            
+            error_kind = classify_error(error_str)
+            if error_kind == "local_budget":
+                return self.handle_local_budget(error_str, tts_model)
+            elif error_kind == "rate_limited":
+                return await self.handle_rate_limiting_async(error_str, tts_model, prompt, voice_api_name,
+                                                             temperature, auto_fallback_to_flash, retry_delay,
+                                                             use_paid_tier, billing_project_id, max_retries,
+                                                             show_voice_info, use_cache)
+            elif error_kind == "invalid_key":
+                print("🔄 Falling back to working Gemini model for TTS simulation...")
+                return await asyncio.to_thread(self.fallback_tts_simulation, prompt, voice_api_name, temperature)
+            elif error_kind == "billing":
+                return self.handle_billing_error(error_str, use_paid_tier, billing_project_id)
+            else:
+                return self.handle_complete_failure(error_str, retry_delay, tts_model)
+
+    async def synthesize_async(self, prompt, tts_model, voice, temperature, use_paid_tier=False,
+                               billing_project_id="", max_retries=1, show_voice_info=False, use_cache=True):
+        """Route a request to chunked or single-request synthesis on the event loop"""
+        if getattr(self, "chunk_options", None):
+            result = await self.try_chunked_tts_async(prompt, tts_model, voice, temperature, use_paid_tier,
+                                                      billing_project_id, max_retries, show_voice_info,
+                                                      use_cache, **self.chunk_options)
+        else:
+            result = await self.try_official_tts_async(prompt, tts_model, voice, temperature, use_paid_tier,
+                                                       billing_project_id, max_retries, show_voice_info,
+                                                       use_cache)
+        # Post-processing a long render takes a moment of numpy work; keep it off the event loop
+        return await asyncio.to_thread(self.apply_postprocess, result)
+
+    async def try_chunked_tts_async(self, prompt, tts_model, voice, temperature, use_paid_tier=False,
+                                    billing_project_id="", max_retries=1, show_voice_info=False,
+                                    use_cache=True, max_chars=1500, workers=3, pause_ms=250,
+                                    crossfade_ms=20, retry_rounds=2):
+        """Synthesize chunks as concurrent tasks, retrying only the failed ones"""
+        import time
+        
+        instruction, body = split_instruction(prompt)
+        texts = [instruction + chunk for chunk in split_text(body, max_chars)]
+        segments = [None] * len(texts)
+        errors = {}
+        pending = list(range(len(texts)))
+        limit = asyncio.Semaphore(max(1, workers))
+        print(f"✂️ Chunked synthesis (async): {len(texts)} chunks (≤{max_chars} chars), {workers} in parallel")
+        
+        async def one(i):
+            async with limit:
+                audio, _ = await self.try_official_tts_async(texts[i], tts_model, voice, temperature,
+                                                             use_paid_tier, billing_project_id, max_retries,
+                                                             False, use_cache)
+            return audio["waveform"][0, 0].numpy()
+        
+        start = time.time()
+        for round_index in range(retry_rounds + 1):
+            results = await asyncio.gather(*(one(i) for i in pending), return_exceptions=True)
+            for i, result in zip(pending, results):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                if isinstance(result, Exception):
+                    errors[i] = str(result)
+                else:
+                    segments[i] = result
+                    errors.pop(i, None)
+            
+            pending = [i for i in pending if segments[i] is None]
+            if not pending:
+                break
+            if round_index < retry_rounds:
+                backoff_time = 2 ** round_index
+                print(f"⚠️ {len(pending)} chunk(s) failed, retrying only those in {backoff_time} seconds...")
+                await asyncio.sleep(backoff_time)
+        
+        if pending:
+            first_error = errors[pending[0]]
+            raise Exception(f"{len(pending)}/{len(texts)} chunks failed after retries: {first_error}")
+        
+        stitched = stitch_pcm(segments, sample_rate=24000, pause_ms=pause_ms, crossfade_ms=crossfade_ms)
+        audio_dict = {
+            "waveform": torch.from_numpy(stitched).unsqueeze(0).unsqueeze(0),
+            "sample_rate": 24000
+        }
+        
+        tier_label = "💰 Paid" if use_paid_tier else "🆓 Free"
+        success_msg = f"✅ Chunked TTS Success: {tts_model} with {voice} voice\n"
+        success_msg += f"🏪 Tier: {tier_label} | ✂️ {len(texts)} chunks in {time.time() - start:.1f}s | "
+        success_msg += f"📊 Generated {len(stitched)} samples at 24kHz\n"
+        success_msg += get_async_engine().status_line()
+        if show_voice_info and voice in VOICE_CHARACTERISTICS_UPDATED:
+            success_msg += f"\n🎭 Voice: {VOICE_CHARACTERISTICS_UPDATED[voice]}"
+        return (audio_dict, success_msg)
+
+    async def try_official_tts_async(self, prompt, tts_model, voice, temperature, use_paid_tier=False,
+                                     billing_project_id="", max_retries=1, show_voice_info=False,
+                                     use_cache=True):
+        """Single REST request through the async engine, sharing cache, limiter, breaker and metrics"""
+        if tts_model == AUTO_MODEL:
+            return await self.try_routed_tts_async(prompt, voice, temperature, use_paid_tier, billing_project_id,
+                                                   max_retries, show_voice_info, use_cache)
+        trace = get_metrics().trace(tts_model, voice_label(voice))
+        flight = get_single_flight()
+        leader = {}
+        
+        async def run():
+            audio_dict, leader["status"] = await self.send_request_async(prompt, tts_model, voice, temperature,
+                                                                         use_paid_tier, billing_project_id,
+                                                                         max_retries, show_voice_info, use_cache,
+                                                                         trace)
+            return audio_dict
+        
+        try:
+            # Coalesced like try_official_tts, but followers await the leader instead of blocking a thread
+            audio_dict, shared = await flight.do_async(
+                self.flight_key(prompt, tts_model, voice, temperature, use_paid_tier, billing_project_id), run)
+        except asyncio.CancelledError:
+            trace.finish("cancelled")
+            raise
+        except Exception as error:
+            self.fail_request(trace, error)
+            raise
+        
+        if shared:
+            outcome = "coalesced"
+            success_msg = self.coalesced_status(tts_model, voice, use_paid_tier, audio_dict, show_voice_info)
+        else:
+            outcome = "success" if ("http" in trace.stages or "hedge_wait" in trace.stages) else "cache_hit"
+            success_msg = leader["status"]
+        success_msg = self.finish_request(trace, outcome, audio_dict["waveform"].shape[-1] / 24000, success_msg)
+        return (audio_dict, success_msg)
+
+    async def send_request_async(self, prompt, tts_model, voice, temperature, use_paid_tier, billing_project_id,
+                                 max_retries, show_voice_info, use_cache, trace):
+        """Cache lookup, then one (possibly hedged) engine request; returns (audio, status)"""
+        data = build_tts_payload(prompt, voice, temperature)
+        tier = "paid" if use_paid_tier else "free"
+        cache = get_audio_cache() if use_cache else None
+        cache_key = AudioCache.make_key(tts_model, data) if cache else None
+        
+        if cache:
+            cached = self.cached_result(cache, cache_key, tts_model, voice, use_paid_tier, show_voice_info, trace)
+            if cached is not None:
+                return cached
+        
+        engine = get_async_engine()
+        breaker = get_circuit_breaker()
+        limiter = get_rate_limiter()
+        pool = get_key_pool()
+        policy = get_hedge_policy()
+        backup_model = policy.backup_model(tts_model) if policy else tts_model
+        print(f"🌐 Making async REST request: Model={tts_model}, Voice={voice}, Temp={temperature}")
+        
+        router = get_model_router()
+        
+        async def primary(attempt_trace):
+            try:
+                result = await self.request_audio_async(tts_model, data, tier, max_retries, use_paid_tier,
+                                                        billing_project_id, attempt_trace)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.record_attempt(router, policy, tts_model, prompt, attempt_trace, ok=False)
+                raise
+            self.record_attempt(router, policy, tts_model, prompt, attempt_trace, ok=True)
+            return result
+        
+        # As in send_hedged_request, each side of a hedge has its own trace and the winner's is merged
+        primary_trace = get_metrics().trace(tts_model, voice_label(voice)) if policy else trace
+        primary_trace.sent = asyncio.Event() if policy else None
+        backup_trace = get_metrics().trace(backup_model, voice_label(voice))
+        
+        async def backup():
+            try:
+                result = await self.request_audio_async(backup_model, data, tier, max_retries, use_paid_tier,
+                                                        billing_project_id, backup_trace)
+            except asyncio.CancelledError:
+                backup_trace.finish("cancelled")
+                raise
+            except Exception:
+                backup_trace.finish("error")
+                raise
+            backup_trace.finish("hedge", audio_seconds=len(result[0]) / 24000)
+            return result
+        
+        try:
+            if policy:
+                result, hedge_delay, backup_won = await run_hedged_async(
+                    lambda: primary(primary_trace), backup, policy, tts_model, sent=primary_trace.sent)
+                trace.merge(backup_trace if backup_won else primary_trace)
+            else:
+                result, hedge_delay, backup_won = await primary(trace), None, False
+        except Exception:
+            if policy:
+                trace.merge(primary_trace)
+            raise
+        audio_np, waited, api_key, key_tier = result
+        model_used = backup_model if backup_won else tts_model
+        
+        with trace.stage("tensor_build"):
+            audio_dict = self.pcm_to_audio(audio_np)
+        success_msg = self.request_status(model_used, voice, use_paid_tier, len(audio_np),
+                                          "\n" + engine.status_line(), limiter, key_tier, waited, api_key,
+                                          breaker, pool)
+        if cache:
+            success_msg += self.store_audio(cache, AudioCache.make_key(model_used, data), audio_np)
+        success_msg += voice_details(voice, show_voice_info)
+        success_msg += self.hedge_status(trace, policy, tts_model, backup_model, hedge_delay, backup_won)
+        return (audio_dict, success_msg)
+
+    async def try_routed_tts_async(self, prompt, voice, temperature, use_paid_tier=False, billing_project_id="",
+                                   max_retries=1, show_voice_info=False, use_cache=True):
+        """try_routed_tts on the event loop"""
+        model, reason = self.route_model(prompt, use_paid_tier)
+        try:
+            audio_dict, success_msg = await self.try_official_tts_async(prompt, model, voice, temperature,
+                                                                        use_paid_tier, billing_project_id,
+                                                                        max_retries, show_voice_info, use_cache)
+        except Exception as error:
+            if not self.should_reroute(model, error):
+                raise
+            model, reason = FLASH_MODEL, reason + ", then Pro was rate limited"
+            audio_dict, success_msg = await self.try_official_tts_async(prompt, model, voice, temperature,
+                                                                        use_paid_tier, billing_project_id,
+                                                                        max_retries, show_voice_info, use_cache)
+        return (audio_dict, success_msg + self.routed_status(model, reason))
+
+    async def request_audio_async(self, tts_model, data, tier, max_retries, use_paid_tier, billing_project_id,
+                                  trace):
+        """One engine request, failing over between pooled keys; returns (pcm, waited, api_key, tier)"""
+        return await get_async_engine().generate_pooled(
+            get_key_pool(), tts_model, self.api_key, data, tier, max_retries,
+            limiter=get_rate_limiter(), breaker=get_circuit_breaker(),
+            trace=trace, max_wait=get_request_settings()["max_wait"],
+            billing_project_id=billing_project_id)
+
+    async def handle_rate_limiting_async(self, error_str, tts_model, prompt, voice, temperature,
+                                         auto_fallback_to_flash, retry_delay, use_paid_tier,
+                                         billing_project_id, max_retries, show_voice_info, use_cache=True):
+        """handle_rate_limiting with the Flash fallback awaited on the event loop"""
+        if use_paid_tier or "pro" not in tts_model.lower() or not auto_fallback_to_flash:
+            # Message-only paths, or the simulation fallback which uses the blocking genai SDK
+            return await asyncio.to_thread(self.handle_rate_limiting, error_str, tts_model, prompt, voice,
+                                           temperature, auto_fallback_to_flash, retry_delay, use_paid_tier,
+                                           billing_project_id, max_retries, show_voice_info, use_cache)
+        
+        flash_model = "gemini-2.5-flash-preview-tts"
+        try:
+            audio, _ = await self.synthesize_async(prompt, flash_model, voice, temperature, use_paid_tier,
+                                                   billing_project_id, max_retries, show_voice_info, use_cache)
+        except Exception as flash_error:
+            flash_error_str = str(flash_error)
+            if is_rate_limited(flash_error_str):
+                return await asyncio.to_thread(self.fallback_tts_simulation, prompt, voice, temperature, True)
+            return self.handle_complete_failure(flash_error_str, retry_delay, "both models")
+        
+        return (audio, self.flash_fallback_status(tts_model, flash_model, voice))
+
+class GeminiTTSBatch(GeminiTTS):
+    """Synthesize a list of prompts concurrently with the same request code as GeminiTTS"""
+
+    # Default worker count per tier; free-tier TTS quotas only allow a few requests per minute
+    WORKERS_BY_TIER = {"free": 2, "paid": 8}
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "prompts": ("STRING", {"default": "Say: First line.\n[F] Kore | Say: Second line in another voice.", "multiline": True}),
+                "tts_model": (["gemini-2.5-pro-preview-tts", "gemini-2.5-flash-preview-tts", AUTO_MODEL], {"default": "gemini-2.5-flash-preview-tts"}),
+                "voice": (GEMINI_VOICES_DISPLAY, {"default": "[M] Puck"}),
+                "temperature": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 2.0, "step": 0.1}),
+            },
+            "optional": {
+                "api_key": ("STRING", {"default": ""}),
+                "auto_fallback_to_flash": ("BOOLEAN", {"default": True}),
+                "use_paid_tier": ("BOOLEAN", {"default": False}),
+                "billing_project_id": ("STRING", {"default": ""}),
+                "max_workers": ("INT", {"default": 0, "min": 0, "max": 32}),
+                "use_cache": ("BOOLEAN", {"default": True}),
+                "output_sample_rate": (OUTPUT_SAMPLE_RATES, {"default": "24000"}),
+                "trim_silence_db": ("FLOAT", {"default": 0.0, "min": -90.0, "max": 0.0, "step": 1.0}),
+                "normalize_loudness": (NORMALIZE_MODES, {"default": "off"}),
+                "target_level": ("FLOAT", {"default": -16.0, "min": -40.0, "max": -1.0, "step": 0.5}),
+                "pack_short_lines": ("BOOLEAN", {"default": False}),
+                "pack_max_lines": ("INT", {"default": 8, "min": 2, "max": 20}),
+                "dataset_dir": ("STRING", {"default": ""}),
+                "auto_preference": (PREFERENCES, {"default": "balanced"}),
+            }
+        }
+
+    RETURN_TYPES = ("AUDIO", "AUDIO", "STRING", "STRING")
+    RETURN_NAMES = ("audio_batch", "audio_list", "lengths", "status")
+    OUTPUT_IS_LIST = (False, True, False, False)
+    FUNCTION = "generate_batch"
+    CATEGORY = "Gemini TTS"
+
+    def generate_batch(self, prompts, tts_model="gemini-2.5-flash-preview-tts", voice="[M] Puck",
+                       temperature=1.0, api_key="", auto_fallback_to_flash=True, use_paid_tier=False,
+                       billing_project_id="", max_workers=0, use_cache=True, output_sample_rate="24000",
+                       trim_silence_db=0.0, normalize_loudness="off", target_level=-16.0, pack_short_lines=False,
+                       pack_max_lines=8, dataset_dir="", auto_preference=None):
+        """Synthesize every prompt through a worker pool; failed items do not discard the rest"""
+        import time
+        
+        self.auto_preference = auto_preference
+        empty_audio = {"waveform": torch.zeros(1, 1, 24000), "sample_rate": 24000}
+        
+        error_msg = self.check_credentials(api_key, use_paid_tier, billing_project_id)
+        if not error_msg:
+            try:
+                items = parse_batch_prompts(prompts)
+            except ValueError as parse_error:
+                error_msg = f"❌ Could not parse batch prompts: {parse_error}"
+            else:
+                if not items:
+                    error_msg = "❌ No prompts found. Enter one prompt per line or a JSON list."
+        if error_msg:
+            return (empty_audio, [empty_audio], "[]", error_msg)
+        
+        default_voice = resolve_voice(voice)
+        billing_project_id = billing_project_id.strip()
+        max_retries = 5 if use_paid_tier else 1
+        workers = max_workers or self.WORKERS_BY_TIER["paid" if use_paid_tier else "free"]
+        workers = max(1, min(workers, len(items)))
+        print(f"📚 Batch TTS: {len(items)} prompts, {workers} workers, Model={tts_model}")
+        
+        def synthesize_item(prompt, item_voice):
+            # "auto" is routed here rather than in try_official_tts so the report shows the model used
+            model = self.route_model(prompt, use_paid_tier)[0] if tts_model == AUTO_MODEL else tts_model
+            try:
+                audio, _ = self.try_official_tts(prompt, model, item_voice, temperature, use_paid_tier,
+                                                 billing_project_id, max_retries, False, use_cache)
+                return audio, model
+            except Exception as error:
+                error_str = str(error)
+                rate_limited = is_rate_limited(error_str)
+                fallback = auto_fallback_to_flash or tts_model == AUTO_MODEL
+                if not (rate_limited and fallback and "pro" in model.lower()):
+                    raise
+                flash_model = "gemini-2.5-flash-preview-tts"
+                audio, _ = self.try_official_tts(prompt, flash_model, item_voice, temperature, use_paid_tier,
+                                                 billing_project_id, max_retries, False, use_cache)
+                return audio, flash_model
+        
+        def synthesize_pack(indices, api_voice, instruction):
+            lines = [split_instruction(items[i][0])[1] for i in indices]
+            audio, model_used = synthesize_item(packed_prompt(lines, instruction), api_voice)
+            return split_packed(audio["waveform"][0, 0].numpy(), [len(line) for line in lines]), model_used
+        
+        segments = [None] * len(items)
+        report = [None] * len(items)
+        voices = [None] * len(items)
+        models = [tts_model] * len(items)
+        for i, (prompt, item_voice) in enumerate(items):
+            voices[i] = resolve_voice(item_voice) if item_voice else default_voice
+            if voices[i] not in GEMINI_VOICES_API:
+                report[i] = f"#{i + 1} ❌ Unknown voice '{item_voice}'"
+        valid = [i for i in range(len(items)) if report[i] is None]
+        
+        # Short lines for the same voice and instruction can share one request, split again by silence
+        packs = [[i] for i in valid]
+        if pack_short_lines:
+            packs = [[valid[j] for j in pack] for pack in plan_packs(
+                [((voices[i], split_instruction(items[i][0])[0].lower()), split_instruction(items[i][0])[1])
+                 for i in valid], max_lines=pack_max_lines)]
+        requests_sent = 0
+        unpacked = 0
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            
+            def submit(indices):
+                nonlocal requests_sent
+                requests_sent += 1
+                if len(indices) == 1:
+                    i = indices[0]
+                    futures[pool.submit(synthesize_item, items[i][0], voices[i])] = indices
+                else:
+                    instruction = split_instruction(items[indices[0]][0])[0]
+                    futures[pool.submit(synthesize_pack, indices, voices[indices[0]], instruction)] = indices
+            
+            for pack in packs:
+                submit(pack)
+            
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    indices = futures.pop(future)
+                    api_voice = voices[indices[0]]
+                    try:
+                        result, model_used = future.result()
+                    except Exception as item_error:
+                        for i in indices:
+                            report[i] = f"#{i + 1} ❌ {api_voice}: {str(item_error)[:120]}"
+                        continue
+                    if tts_model == AUTO_MODEL:
+                        note = f" ({short_name(model_used)})"
+                    else:
+                        note = " (Flash fallback)" if model_used != tts_model else ""
+                    if len(indices) == 1:
+                        parts = [result["waveform"][0, 0].numpy()]
+                    elif result is None:
+                        print(f"📦 Packed request for {len(indices)} lines did not split cleanly, sending them one by one")
+                        unpacked += len(indices)
+                        for i in indices:
+                            submit([i])
+                        continue
+                    else:
+                        parts = result
+                        note += f" (packed ×{len(indices)})"
+                    for i, part in zip(indices, parts):
+                        segments[i] = part
+                        models[i] = model_used
+                        report[i] = f"#{i + 1} ✅ {api_voice} {len(part) / 24000:.1f}s{note}"
+        
+        batch, lengths = pad_segments(segments)
+        batch = batch[:, None, :]
+        sample_rate = 24000
+        options = postprocess_options(output_sample_rate, trim_silence_db, normalize_loudness, target_level)
+        post_report = None
+        if options:
+            # The whole padded batch goes through post-processing in one pass
+            batch, sample_rate, lengths, post_report = postprocess_waveform(batch, 24000, lengths, **options)
+            lengths = [int(n) if segment is not None else 0 for n, segment in zip(lengths, segments)]
+        audio_batch = {"waveform": torch.from_numpy(batch), "sample_rate": sample_rate}
+        audio_list = []
+        for i, segment in enumerate(segments):
+            if segment is None:
+                audio_list.append(empty_audio)
+            else:
+                audio_list.append({"waveform": audio_batch["waveform"][i:i + 1, :, :lengths[i]],
+                                   "sample_rate": sample_rate})
+        
+        succeeded = sum(1 for segment in segments if segment is not None)
+        status = f"📚 Batch TTS: {succeeded}/{len(items)} succeeded in {time.time() - start:.1f}s "
+        status += f"({workers} workers, {tts_model})\n"
+        if pack_short_lines:
+            status += f"📦 {requests_sent} requests for {len(valid)} prompts"
+            status += f" ({unpacked} lines re-sent unpacked)\n" if unpacked else "\n"
+        status += "\n".join(report)
+        if post_report:
+            status += f"\n🎚️ Post-processing: {json.dumps(post_report)}"
+        if tts_model == AUTO_MODEL:
+            status += "\n" + get_model_router().status_line()
+        if dataset_dir.strip() and succeeded:
+            try:
+                writer = get_dataset_writer(dataset_dir)
+                written = 0
+                for i, segment in enumerate(segments):
+                    if segment is not None:
+                        _, new_clip = writer.append(float32_to_int16(batch[i, 0, :lengths[i]]), items[i][0],
+                                                    voices[i], models[i], sample_rate)
+                        written += new_clip
+                writer.close()
+                status += f"\n{writer.status_line()} | {written} new, {succeeded - written} already stored"
+            except OSError as dataset_error:
+                status += f"\n⚠️ Could not write dataset: {dataset_error}"
+        return (audio_batch, audio_list, json.dumps(lengths), status)
+
+class GeminiTTSDialogue(GeminiTTS):
+    """Speak a speaker-tagged script with multiSpeakerVoiceConfig, two speakers per request"""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "script": ("STRING", {"default": "TTS the following conversation between Joe and Jane:\nJoe: How's it going today, Jane?\nJane: Not too bad, how about you?", "multiline": True}),
+                "speaker_voices": ("STRING", {"default": "Joe = [M] Charon\nJane = [F] Kore", "multiline": True}),
+                "tts_model": (["gemini-2.5-pro-preview-tts", "gemini-2.5-flash-preview-tts", AUTO_MODEL], {"default": "gemini-2.5-flash-preview-tts"}),
+                "temperature": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 2.0, "step": 0.1}),
+            },
+            "optional": {
+                "api_key": ("STRING", {"default": ""}),
+                "auto_fallback_to_flash": ("BOOLEAN", {"default": True}),
+                "use_paid_tier": ("BOOLEAN", {"default": False}),
+                "billing_project_id": ("STRING", {"default": ""}),
+                "use_cache": ("BOOLEAN", {"default": True}),
+                "max_chunk_chars": ("INT", {"default": 3000, "min": 300, "max": 8000, "step": 100}),
+                "parallel_requests": ("INT", {"default": 2, "min": 1, "max": 8}),
+                "chunk_pause_ms": ("INT", {"default": 300, "min": 0, "max": 2000, "step": 10}),
+                "return_timestamps": ("BOOLEAN", {"default": False}),
+            }
+        }
+
+    RETURN_TYPES = ("AUDIO", "STRING", "STRING")
+    RETURN_NAMES = ("audio", "timestamps", "status")
+    FUNCTION = "generate_dialogue"
+    CATEGORY = "Gemini TTS"
+
+    def generate_dialogue(self, script, speaker_voices, tts_model="gemini-2.5-flash-preview-tts", temperature=1.0,
+                          api_key="", auto_fallback_to_flash=True, use_paid_tier=False, billing_project_id="",
+                          use_cache=True, max_chunk_chars=3000, parallel_requests=2, chunk_pause_ms=300,
+                          return_timestamps=False):
+        """Synthesize the script in as few multi-speaker requests as the API allows and stitch them"""
+        import time
+        
+        empty_audio = {"waveform": torch.zeros(1, 1, 24000), "sample_rate": 24000}
+        
+        error_msg = self.check_credentials(api_key, use_paid_tier, billing_project_id)
+        if not error_msg:
+            try:
+                mapping = parse_speaker_voices(speaker_voices)
+            except ValueError as parse_error:
+                mapping, error_msg = {}, f"❌ Could not parse speaker voices: {parse_error}"
+            voices = {speaker: resolve_voice(voice) for speaker, voice in mapping.items()}
+            unknown = [f"{speaker} = {mapping[speaker]}" for speaker, voice in voices.items()
+                       if voice not in GEMINI_VOICES_API]
+            if not error_msg and unknown:
+                error_msg = f"❌ Unknown voice(s): {', '.join(unknown)}"
+            if not error_msg:
+                instruction, turns = parse_dialogue(script, voices)
+                if not turns:
+                    error_msg = "❌ No dialogue turns found. Tag lines as 'Speaker: text' using the names in speaker_voices."
+        if error_msg:
+            return (empty_audio, "[]", error_msg)
+        
+        billing_project_id = billing_project_id.strip()
+        max_retries = 5 if use_paid_tier else 1
+        groups = plan_dialogue_requests(turns, max(200, max_chunk_chars - len(instruction)))
+        print(f"🎭 Dialogue TTS: {len(turns)} turns, {len(voices)} speakers -> {len(groups)} request(s), Model={tts_model}")
+        
+        def synthesize_group(group):
+            speakers = group_speakers(group)
+            voice = voices[speakers[0]] if len(speakers) == 1 else {s: voices[s] for s in speakers}
+            prompt = dialogue_prompt(group, instruction)
+            try:
+                audio, _ = self.try_official_tts(prompt, tts_model, voice, temperature, use_paid_tier,
+                                                 billing_project_id, max_retries, False, use_cache)
+                return audio, tts_model
+            except Exception as error:
+                error_str = str(error)
+                rate_limited = is_rate_limited(error_str)
+                if not (rate_limited and auto_fallback_to_flash and "pro" in tts_model.lower()):
+                    raise
+                flash_model = "gemini-2.5-flash-preview-tts"
+                audio, _ = self.try_official_tts(prompt, flash_model, voice, temperature, use_paid_tier,
+                                                 billing_project_id, max_retries, False, use_cache)
+                get_metrics().inc("gemini_tts_fallbacks_total", source=tts_model, target=flash_model)
+                return audio, flash_model
+        
+        start = time.time()
+        segments = [None] * len(groups)
+        models_used = set()
+        workers = max(1, min(parallel_requests, len(groups)))
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for i, (audio, model_used) in enumerate(pool.map(synthesize_group, groups)):
+                    segments[i] = trim_silence(audio["waveform"][0, 0].numpy())
+                    models_used.add(model_used)
+        except Exception as error:
+            error_str = str(error)
+            print(f"⚠️ Dialogue request failed: {error_str}")
+            if "PERMISSION_DENIED" in error_str or "billing" in error_str.lower() or "403" in error_str:
+                audio, msg = self.handle_billing_error(error_str, use_paid_tier, billing_project_id)
+            else:
+                audio, msg = self.handle_complete_failure(error_str, 30, tts_model)
+            return (audio, "[]", msg)
+        
+        stitched = stitch_pcm(segments, sample_rate=24000, pause_ms=chunk_pause_ms, trim=False)
+        audio_dict = {
+            "waveform": torch.from_numpy(stitched).unsqueeze(0).unsqueeze(0),
+            "sample_rate": 24000
+        }
+        
+        timestamps = []
+        if return_timestamps:
+            offsets = stitch_offsets([len(s) for s in segments], sample_rate=24000, pause_ms=chunk_pause_ms)
+            for group, segment, offset in zip(groups, segments, offsets):
+                for turn in estimate_turn_times(group, offset / 24000, len(segment) / 24000):
+                    turn["voice"] = voices[turn["speaker"]]
+                    timestamps.append(turn)
+        
+        status = f"✅ Dialogue TTS Success: {len(turns)} turns, {len(voices)} speakers in {len(groups)} request(s)\n"
+        status += f"🎭 Voices: {', '.join(f'{s} → {v}' for s, v in voices.items())}\n"
+        status += f"📊 Generated {len(stitched) / 24000:.1f}s at 24kHz in {time.time() - start:.1f}s"
+        if models_used != {tts_model}:
+            status += f" (Flash fallback used)"
+        if return_timestamps:
+            status += "\n⏱️ Timestamps are estimated from text length within each request"
+        return (audio_dict, json.dumps(timestamps), status)
+
+class GeminiTTSJobQueue(GeminiTTS):
+    """Queue bulk synthesis in a durable SQLite job that finishes in the background across quota windows"""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "prompts": ("STRING", {"default": "Say: First line.\n[F] Kore | Say: Second line in another voice.", "multiline": True}),
+                "job_name": ("STRING", {"default": "dataset"}),
+                "tts_model": (["gemini-2.5-pro-preview-tts", "gemini-2.5-flash-preview-tts", AUTO_MODEL], {"default": "gemini-2.5-flash-preview-tts"}),
+                "voice": (GEMINI_VOICES_DISPLAY, {"default": "[M] Puck"}),
+                "temperature": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 2.0, "step": 0.1}),
+            },
+            "optional": {
+                "api_key": ("STRING", {"default": ""}),
+                "use_paid_tier": ("BOOLEAN", {"default": False}),
+                "billing_project_id": ("STRING", {"default": ""}),
+                "action": (["enqueue", "status", "retry_failed"], {"default": "enqueue"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("status", "outputs")
+    FUNCTION = "manage_job"
+    CATEGORY = "Gemini TTS"
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        # Job progress changes between runs even when the inputs do not
+        return float("nan")
+
+    def manage_job(self, prompts, job_name, tts_model="gemini-2.5-flash-preview-tts", voice="[M] Puck",
+                   temperature=1.0, api_key="", use_paid_tier=False, billing_project_id="", action="enqueue"):
+        """Enqueue the prompts (idempotently), retry failed items or just report job progress"""
+        job = job_name.strip() or "default"
+        resume_pending_jobs()
+        queue = get_job_queue()
+        status = ""
+        
+        if action == "enqueue":
+            error_msg = self.check_credentials(api_key, use_paid_tier, billing_project_id)
+            if not error_msg:
+                try:
+                    items = parse_batch_prompts(prompts)
+                except ValueError as parse_error:
+                    error_msg = f"❌ Could not parse prompts: {parse_error}"
+                else:
+                    if not items:
+                        error_msg = "❌ No prompts found. Enter one prompt per line or a JSON list."
+            if not error_msg:
+                default_voice = resolve_voice(voice)
+                queued = []
+                for prompt, item_voice in items:
+                    api_voice = resolve_voice(item_voice) if item_voice else default_voice
+                    if api_voice not in GEMINI_VOICES_API:
+                        error_msg = f"❌ Unknown voice '{item_voice}'"
+                        break
+                    options = {"use_paid_tier": use_paid_tier, "billing_project_id": billing_project_id.strip()}
+                    queued.append((prompt, tts_model, api_voice, temperature, options))
+            if error_msg:
+                return (error_msg, "[]")
+            added = queue.add_items(job, queued)
+            get_job_runner().start()
+            status += f"🗂️ Queued {added} new item(s); {len(queued) - added} were already in job '{job}'\n"
+        elif action == "retry_failed":
+            retried = queue.retry_failed(job)
+            get_job_runner().start()
+            status += f"🔁 Re-queued {retried} failed item(s)\n"
+        
+        runner = get_job_runner()
+        status += queue.status_line(job) + "\n"
+        status += f"⚙️ Runner: {'running' if runner.running else 'stopped'} ({runner.workers} worker(s)) | "
+        status += f"📁 {os.path.join(runner.output_dir, '')}"
+        outputs = [
+            {"index": item["idx"], "status": item["status"], "path": item["output_path"],
+             "seconds": round(item["samples"] / 24000, 2) if item["samples"] else 0, "error": item["error"]}
+            for item in queue.items(job)
+        ]
+        return (status, json.dumps(outputs))
+
 NODE_CLASS_MAPPINGS = {
     "GeminiTTS": GeminiTTS,
+    "GeminiTTSAsync": GeminiTTSAsync,
+    "GeminiTTSBatch": GeminiTTSBatch,
+    "GeminiTTSDialogue": GeminiTTSDialogue,
+    "GeminiTTSJobQueue": GeminiTTSJobQueue,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "GeminiTTS": "🎙️ Gemini Text-to-Speech",
-}
\ No newline at end of file
+    "GeminiTTSAsync": "⚡ Gemini Text-to-Speech (Async)",
+    "GeminiTTSBatch": "📚 Gemini TTS Batch",
+    "GeminiTTSDialogue": "🎭 Gemini TTS Dialogue",
+    "GeminiTTSJobQueue": "🗂️ Gemini TTS Job Queue",
+}
+
+def register_server_hooks():
+    """Hook into ComfyUI's server when it exists; nothing is read or started while nodes are loading.
+
+    Unfinished jobs resume once the server has started (or on first use of the job queue node), and
+    prefetch_prompt sees every queued prompt (it reads prefetch_enabled the first time it runs).
+    """
+    prompt_server = getattr(sys.modules.get("server"), "PromptServer", None)
+    instance = getattr(prompt_server, "instance", None)
+    if instance is None:
+        return
+    try:
+        instance.add_on_prompt_handler(prefetch_prompt)
+    except AttributeError as hook_error:
+        print(f"⚠️ Gemini TTS prefetch needs ComfyUI's PromptServer: {hook_error}")
+    
+    async def resume_on_startup(app):
+        await asyncio.to_thread(resume_pending_jobs)
+    
+    try:
+        instance.app.on_startup.append(resume_on_startup)
+    except (AttributeError, RuntimeError) as hook_error:
+        print(f"⚠️ Queued TTS jobs will resume on first use of the job queue node: {hook_error}")
+
+register_server_hooks()